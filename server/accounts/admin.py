@@ -1,5 +1,9 @@
 from django.contrib import admin
 
-from .models import Account
+from .models import Account, AccountHistory, Credentials, PortfolioSnapshot, Position
 
 admin.site.register(Account)
+admin.site.register(AccountHistory)
+admin.site.register(Credentials)
+admin.site.register(Position)
+admin.site.register(PortfolioSnapshot)
@@ -0,0 +1,101 @@
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+
+from core.alpaca import TradeApiRest
+from core.ratelimit import TokenBucket
+from django.conf import settings
+
+from .models import Credentials
+
+logger = logging.getLogger(__name__)
+
+Client = namedtuple("Client", ["account_id", "api", "bucket", "updated_at"])
+
+
+class ClientManager:
+    """
+    A bounded pool of Alpaca clients, one for each account with credentials.
+
+    Clients are kept authenticated between calls, and the least recently used
+    client is dropped once the pool is full. Each account has its own rate
+    limit, as Alpaca limits requests per account. A client is replaced when
+    its account's credentials change.
+    """
+
+    def __init__(self, size=None, rate_limit=None):
+        """
+        :param size(int): maximum number of clients, defaults to
+        `ALPACA_CLIENT_POOL_SIZE`
+        :param rate_limit(int): requests per minute allowed for each account,
+        defaults to `ALPACA_RATE_LIMIT`
+        """
+        self.size = size or settings.ALPACA_CLIENT_POOL_SIZE
+        self.rate_limit = rate_limit or settings.ALPACA_RATE_LIMIT
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def client(self, user):
+        """
+        Return the client of a user's account.
+
+        :param user(User): user, or user id
+        :return(Client): client, or None if the user's account has no
+        credentials
+        """
+        credentials = (
+            Credentials.objects.filter(account__user=user)
+            .only("account_id", "updated_at")
+            .first()
+        )
+        if credentials is None:
+            return None
+        return self.get(credentials)
+
+    def get(self, credentials):
+        """Return the client of an account's credentials."""
+        with self._lock:
+            client = self._clients.get(credentials.account_id)
+            if client is not None and client.updated_at == credentials.updated_at:
+                self._clients.move_to_end(credentials.account_id)
+                return client
+
+        # The secret key is only loaded, and decrypted, to create a client
+        credentials = Credentials.objects.get(pk=credentials.pk)
+        api = TradeApiRest(
+            credentials.key_id, credentials.secret_key, credentials.base_url
+        )
+        with self._lock:
+            previous = self._clients.pop(credentials.account_id, None)
+            bucket = (
+                previous.bucket
+                if previous is not None
+                else TokenBucket(rate=self.rate_limit / 60, capacity=self.rate_limit)
+            )
+            client = Client(credentials.account_id, api, bucket, credentials.updated_at)
+            self._clients[credentials.account_id] = client
+            while len(self._clients) > self.size:
+                account_id, _ = self._clients.popitem(last=False)
+                logger.debug(f"Alpaca client dropped from the pool: {account_id}")
+        return client
+
+    def clear(self):
+        """Drop every client."""
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self):
+        return len(self._clients)
+
+
+_client_manager = None
+_client_manager_lock = threading.Lock()
+
+
+def client_manager():
+    """Return the pool of Alpaca clients shared by this process."""
+    global _client_manager
+    with _client_manager_lock:
+        if _client_manager is None:
+            _client_manager = ClientManager()
+        return _client_manager
@@ -0,0 +1,136 @@
+import logging
+from datetime import datetime
+from decimal import Decimal
+
+import pytz
+from assets.compaction import MARKET_TIMEZONE
+from django.db import transaction
+from django.db.models import F, Max
+
+from .models import PortfolioSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Period of the portfolio history fetched the first time a timeframe is synced.
+# Alpaca only returns intraday timeframes for periods under 30 days
+INITIAL_PERIODS = {
+    PortfolioSnapshot.MIN_1: "1W",
+    PortfolioSnapshot.MIN_5: "1W",
+    PortfolioSnapshot.MIN_15: "1W",
+    PortfolioSnapshot.HOUR_1: "1W",
+    PortfolioSnapshot.DAY_1: "1A",
+}
+
+# Fields of a snapshot set from Alpaca's portfolio history
+SNAPSHOT_FIELDS = ["equity", "profit_loss", "profit_loss_pct", "base_value"]
+
+# Lengths of the periods snapshots can be resampled to, in seconds
+RESAMPLE_SECONDS = {
+    "1H": 60 * 60,
+    "1D": 24 * 60 * 60,
+    "1W": 7 * 24 * 60 * 60,
+}
+
+# Seconds added before bucketing, so weeks start on Monday rather than on the
+# Thursday of the Unix epoch
+RESAMPLE_OFFSETS = {"1W": 3 * 24 * 60 * 60}
+
+
+def to_decimal(name, value):
+    """Return a portfolio history value at the precision of its field."""
+    if value is None:
+        return None
+    places = PortfolioSnapshot._meta.get_field(name).decimal_places
+    return Decimal(str(value)).quantize(Decimal(1).scaleb(-places))
+
+
+def history_window(account, timeframe):
+    """
+    Return the arguments of the portfolio history request which continues
+    the stored history of a timeframe.
+
+    The history is fetched from the day of the latest stored point, or for
+    the initial period if none is stored.
+    """
+    latest = PortfolioSnapshot.objects.filter(
+        account=account, timeframe=timeframe
+    ).aggregate(t=Max("t"))["t"]
+    if latest is None:
+        return {"period": INITIAL_PERIODS[timeframe], "timeframe": timeframe}
+
+    market_timezone = pytz.timezone(MARKET_TIMEZONE)
+    start = datetime.fromtimestamp(latest, market_timezone).date()
+    end = datetime.now(market_timezone).date()
+    return {
+        "date_start": start.isoformat(),
+        "date_end": end.isoformat(),
+        "timeframe": timeframe,
+    }
+
+
+def write_snapshots(account, timeframe, history):
+    """
+    Store the points of a portfolio history, creating new points and
+    updating points which have changed.
+
+    :param account(Account): account of the history
+    :param timeframe(str): timeframe of the history eg. 1D
+    :param history(dict): portfolio history returned from Alpaca
+    :return(tuple): number of points created and updated
+    """
+    points = {}
+    for index, t in enumerate(history.get("timestamp") or []):
+        if history["equity"][index] is None:
+            continue
+        points[int(t)] = {
+            "equity": to_decimal("equity", history["equity"][index]),
+            "profit_loss": to_decimal(
+                "profit_loss", history["profit_loss"][index] or 0
+            ),
+            "profit_loss_pct": to_decimal(
+                "profit_loss_pct", history["profit_loss_pct"][index]
+            ),
+            "base_value": to_decimal("base_value", history.get("base_value") or 0),
+        }
+    if not points:
+        return 0, 0
+
+    existing = {
+        snapshot.t: snapshot
+        for snapshot in PortfolioSnapshot.objects.filter(
+            account=account, timeframe=timeframe, t__gte=min(points)
+        )
+    }
+    created = []
+    updated = []
+    for t, values in points.items():
+        snapshot = existing.get(t)
+        if snapshot is None:
+            created.append(
+                PortfolioSnapshot(account=account, timeframe=timeframe, t=t, **values)
+            )
+        elif any(getattr(snapshot, name) != value for name, value in values.items()):
+            for name, value in values.items():
+                setattr(snapshot, name, value)
+            updated.append(snapshot)
+
+    with transaction.atomic():
+        PortfolioSnapshot.objects.bulk_create(created, ignore_conflicts=True)
+        PortfolioSnapshot.objects.bulk_update(updated, SNAPSHOT_FIELDS)
+    return len(created), len(updated)
+
+
+def resample(snapshots, period):
+    """
+    Return the last snapshot of each period, grouped by the database.
+
+    :param snapshots(QuerySet): snapshots of one timeframe
+    :param period(str): one of `RESAMPLE_SECONDS` eg. 1W
+    """
+    seconds = RESAMPLE_SECONDS[period]
+    offset = RESAMPLE_OFFSETS.get(period, 0)
+    return (
+        snapshots.annotate(bucket=(F("t") + offset) / seconds)
+        .order_by("account", "bucket", "-t")
+        .distinct("account", "bucket")
+    )
@@ -0,0 +1,269 @@
+import logging
+import uuid
+from decimal import Decimal
+
+from alpaca_trade_api.entity import Account as AlpacaAccount
+from alpaca_trade_api.entity import Position as AlpacaPosition
+from alpaca_trade_api.rest import APIError
+from assets.models import Asset
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Account, AccountHistory, Position
+
+logger = logging.getLogger(__name__)
+
+# Account fields which are reported by Alpaca and reconciled
+ACCOUNT_FIELDS = [
+    field.name
+    for field in Account._meta.concrete_fields
+    if field.name not in ("id", "user", "created_at")
+]
+
+# Account fields recorded in the account's history when one of them changes
+HISTORY_FIELDS = [
+    "equity",
+    "cash",
+    "buying_power",
+    "long_market_value",
+    "short_market_value",
+]
+
+
+def apply_fill(user, asset, side, qty, price):
+    """
+    Apply a fill to a user's position in an asset, and to their cash.
+
+    :param user(User): user who placed the order
+    :param asset(Asset): asset traded
+    :param side(str): buy or sell
+    :param qty(Decimal): quantity filled
+    :param price(Decimal): fill price
+    :return(Position): updated position
+    """
+    qty = Decimal(str(qty))
+    price = Decimal(str(price))
+    signed_qty = qty if side == "buy" else -qty
+
+    with transaction.atomic():
+        position, _ = Position.objects.select_for_update().get_or_create(
+            user=user, asset=asset
+        )
+        held = position.qty
+        if held == 0 or (held > 0) == (signed_qty > 0):
+            position.cost_basis += signed_qty * price
+        else:
+            # Close the position at the average entry price, realising the
+            # difference, and open any remainder in the other direction
+            closed = min(qty, abs(held))
+            direction = 1 if held > 0 else -1
+            position.realized_pl += (
+                (price - position.avg_entry_price) * closed * direction
+            )
+            if qty > abs(held):
+                position.cost_basis = (held + signed_qty) * price
+            else:
+                position.cost_basis = (held + signed_qty) * position.avg_entry_price
+        position.qty = held + signed_qty
+        position.avg_entry_price = (
+            position.cost_basis / position.qty if position.qty else 0
+        )
+        position.save()
+
+        Account.objects.filter(user=user).update(cash=F("cash") - signed_qty * price)
+
+    return position
+
+
+def reconcile(user, positions, account=None):
+    """
+    Correct a user's ledger to match Alpaca's positions and account.
+
+    Positions which Alpaca no longer holds are closed. Realised profit/loss
+    is kept.
+
+    :param user(User): user whose ledger is reconciled
+    :param positions(list): positions returned from Alpaca
+    :param account(dict): account returned from Alpaca
+    :return(int): number of positions whose quantity was corrected
+    """
+    positions = [
+        position.__dict__["_raw"] if isinstance(position, AlpacaPosition) else position
+        for position in positions
+    ]
+    assets = Asset.objects.in_bulk(
+        [position["symbol"] for position in positions], field_name="symbol"
+    )
+    existing = {
+        position.asset_id: position
+        for position in Position.objects.filter(user=user).select_related("asset")
+    }
+    now = timezone.now()
+
+    created = []
+    updated = []
+    corrected = 0
+    for raw_position in positions:
+        asset = assets.get(raw_position["symbol"])
+        if asset is None:
+            logger.warning(f"Unknown asset in positions: {raw_position['symbol']}")
+            continue
+        values = {
+            "qty": Decimal(raw_position["qty"]),
+            "avg_entry_price": Decimal(raw_position["avg_entry_price"]),
+            "cost_basis": Decimal(raw_position["cost_basis"]),
+            "market_value": Decimal(raw_position["market_value"]),
+            "reconciled_at": now,
+        }
+        position = existing.pop(asset.pk, None)
+        if position is None:
+            created.append(Position(user=user, asset=asset, **values))
+            corrected += 1
+            continue
+        if position.qty != values["qty"]:
+            corrected += 1
+            # auto_now isn't applied by bulk_update
+            position.updated_at = now
+        for key, value in values.items():
+            setattr(position, key, value)
+        updated.append(position)
+
+    for position in existing.values():
+        if position.qty:
+            corrected += 1
+            position.updated_at = now
+        position.qty = position.avg_entry_price = position.cost_basis = 0
+        position.market_value = 0
+        position.reconciled_at = now
+        updated.append(position)
+
+    with transaction.atomic():
+        Position.objects.bulk_create(created)
+        Position.objects.bulk_update(
+            updated,
+            [
+                "qty",
+                "avg_entry_price",
+                "cost_basis",
+                "market_value",
+                "reconciled_at",
+                "updated_at",
+            ],
+        )
+        if account is not None:
+            write_accounts([account])
+
+    if corrected:
+        logger.info(f"Positions corrected for user {user.pk}: {corrected}")
+    return corrected
+
+
+def write_accounts(accounts):
+    """
+    Update accounts from Alpaca, writing only the fields which have changed.
+
+    Accounts are read and updated with one query each, and a history row is
+    added for each account whose balances changed. Accounts which haven't
+    been linked to a user are skipped.
+
+    :param accounts(list): accounts returned from Alpaca
+    :return(int): number of accounts updated
+    """
+    accounts = [
+        account.__dict__["_raw"] if isinstance(account, AlpacaAccount) else account
+        for account in accounts
+    ]
+    existing = Account.objects.in_bulk([account["id"] for account in accounts])
+    fields = {name: Account._meta.get_field(name) for name in ACCOUNT_FIELDS}
+    now = timezone.now()
+
+    updated = []
+    changed_fields = set()
+    history = []
+    for raw_account in accounts:
+        account = existing.get(uuid.UUID(str(raw_account["id"])))
+        if account is None:
+            logger.info(f"Account not linked to a user: {raw_account['id']}")
+            continue
+        changed = set()
+        for name, field in fields.items():
+            if name not in raw_account:
+                continue
+            value = field.to_python(raw_account[name])
+            if getattr(account, name) != value:
+                setattr(account, name, value)
+                changed.add(name)
+        if not changed:
+            continue
+        updated.append(account)
+        changed_fields |= changed
+        if changed & set(HISTORY_FIELDS):
+            history.append(
+                AccountHistory(
+                    account=account,
+                    created_at=now,
+                    **{name: getattr(account, name) for name in HISTORY_FIELDS},
+                )
+            )
+
+    if not updated:
+        return 0
+    with transaction.atomic():
+        Account.objects.bulk_update(updated, sorted(changed_fields))
+        AccountHistory.objects.bulk_create(history)
+    return len(updated)
+
+
+class Ledger:
+    """
+    A user's account and positions, loaded once for a strategy cycle.
+
+    Orders are sized from the ledger without calling Alpaca. Users without
+    an account fall back to Alpaca's account and positions.
+    """
+
+    def __init__(self, user, api, local=True):
+        """
+        :param user(User): user whose orders are sized
+        :param api(TradeApiRest): Alpaca api, used without an account
+        :param local(bool): size orders from the ledger, rather than Alpaca
+        """
+        self.user = user
+        self.api = api
+        self.account = Account.objects.filter(user=user).first() if local else None
+        self.positions = {}
+        if self.account is not None:
+            self.positions = {
+                str(position.asset_id): position
+                for position in Position.objects.filter(user=user)
+            }
+
+    def equity(self):
+        """Return the user's equity."""
+        if self.account is None:
+            return float(self.api.account_info().__dict__["_raw"]["equity"])
+        return float(self.account.equity)
+
+    def long_value(self, asset, price):
+        """
+        Return the market value of a user's long position in an asset.
+
+        :param asset(Asset): asset
+        :param price(float): latest price of the asset
+        :return(float): market value, or None without a long position
+        """
+        if self.account is None:
+            try:
+                position = self.api.list_position_by_symbol(asset.symbol)
+            except APIError:
+                return None
+            position = position.__dict__["_raw"]
+            if position["side"] == "short":
+                return None
+            return float(position["market_value"])
+
+        position = self.positions.get(str(asset.pk))
+        if position is None or position.qty <= 0:
+            return None
+        return float(position.qty) * price
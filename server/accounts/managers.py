@@ -14,3 +14,21 @@ class AccountQuerySet(QuerySet):
         if user.is_staff:
             return self.all()
         return self.filter(user=user)
+
+
+class PositionQuerySet(QuerySet):
+    """Custom queryset methods for positions."""
+
+    def visible(self, user):
+        """
+        Return visible positions for the given user.
+
+        Admins can see all positions, other users only their own.
+        """
+        if user.is_staff:
+            return self.all()
+        return self.filter(user=user)
+
+    def open(self):
+        """Return positions with a non-zero quantity."""
+        return self.exclude(qty=0)
@@ -0,0 +1,111 @@
+# Generated by Django 3.1.2 on 2026-10-19 11:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0007_trading_session"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Position",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "qty",
+                    models.DecimalField(
+                        decimal_places=9,
+                        default=0,
+                        max_digits=18,
+                        verbose_name="quantity",
+                    ),
+                ),
+                (
+                    "avg_entry_price",
+                    models.DecimalField(
+                        decimal_places=5,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="average entry price",
+                    ),
+                ),
+                (
+                    "cost_basis",
+                    models.DecimalField(
+                        decimal_places=5,
+                        default=0,
+                        max_digits=14,
+                        verbose_name="cost basis",
+                    ),
+                ),
+                (
+                    "realized_pl",
+                    models.DecimalField(
+                        decimal_places=5,
+                        default=0,
+                        max_digits=14,
+                        verbose_name="realized profit/loss",
+                    ),
+                ),
+                (
+                    "market_value",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=5,
+                        help_text="Market value when the position was last reconciled.",
+                        max_digits=14,
+                        null=True,
+                        verbose_name="market value",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="modified"),
+                ),
+                (
+                    "reconciled_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="reconciled"
+                    ),
+                ),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="assets.asset",
+                        verbose_name="asset",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="positions",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "position",
+                "verbose_name_plural": "positions",
+                "unique_together": {("user", "asset")},
+            },
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 3.1.2 on 2026-10-19 12:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_position"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PortfolioSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "timeframe",
+                    models.CharField(
+                        choices=[
+                            ("1Min", "1 minute"),
+                            ("5Min", "5 minute"),
+                            ("15Min", "15 minute"),
+                            ("1H", "1 hour"),
+                            ("1D", "1 day"),
+                        ],
+                        max_length=56,
+                        verbose_name="timeframe",
+                    ),
+                ),
+                (
+                    "t",
+                    models.PositiveIntegerField(
+                        help_text="the time of the point as a Unix epoch in seconds",
+                        verbose_name="time",
+                    ),
+                ),
+                (
+                    "equity",
+                    models.DecimalField(
+                        decimal_places=5, max_digits=14, verbose_name="equity"
+                    ),
+                ),
+                (
+                    "profit_loss",
+                    models.DecimalField(
+                        decimal_places=5, max_digits=14, verbose_name="profit/loss"
+                    ),
+                ),
+                (
+                    "profit_loss_pct",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=9,
+                        max_digits=12,
+                        null=True,
+                        verbose_name="profit/loss percentage",
+                    ),
+                ),
+                (
+                    "base_value",
+                    models.DecimalField(
+                        decimal_places=5, max_digits=14, verbose_name="base value"
+                    ),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="accounts.account",
+                        verbose_name="account",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "portfolio snapshot",
+                "verbose_name_plural": "portfolio snapshots",
+                "unique_together": {("account", "timeframe", "t")},
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 3.1.2 on 2026-10-19 12:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_portfoliosnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccountHistory",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "equity",
+                    models.DecimalField(
+                        decimal_places=5, max_digits=12, verbose_name="equity"
+                    ),
+                ),
+                (
+                    "cash",
+                    models.DecimalField(
+                        decimal_places=5, max_digits=12, verbose_name="cash"
+                    ),
+                ),
+                (
+                    "buying_power",
+                    models.DecimalField(
+                        decimal_places=5, max_digits=12, verbose_name="buying power"
+                    ),
+                ),
+                (
+                    "long_market_value",
+                    models.DecimalField(
+                        decimal_places=5,
+                        max_digits=12,
+                        verbose_name="long market value",
+                    ),
+                ),
+                (
+                    "short_market_value",
+                    models.DecimalField(
+                        decimal_places=5,
+                        max_digits=12,
+                        verbose_name="short market value",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(verbose_name="created")),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="history",
+                        to="accounts.account",
+                        verbose_name="account",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "account history",
+                "verbose_name_plural": "account history",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="accounthistory",
+            index=models.Index(
+                fields=["account", "created_at"], name="accounts_ac_account_8b4a55_idx"
+            ),
+        ),
+    ]
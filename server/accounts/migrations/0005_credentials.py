@@ -0,0 +1,62 @@
+# Generated by Django 3.1.2 on 2026-10-19 12:20
+
+import core.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_accounthistory"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Credentials",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key_id", models.CharField(max_length=128, verbose_name="key id")),
+                (
+                    "secret_key",
+                    core.fields.EncryptedTextField(verbose_name="secret key"),
+                ),
+                (
+                    "base_url",
+                    models.URLField(
+                        choices=[
+                            ("https://paper-api.alpaca.markets", "paper"),
+                            ("https://api.alpaca.markets", "live"),
+                        ],
+                        default="https://paper-api.alpaca.markets",
+                        verbose_name="base url",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="modified"),
+                ),
+                (
+                    "account",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="credentials",
+                        to="accounts.account",
+                        verbose_name="account",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "credentials",
+                "verbose_name_plural": "credentials",
+            },
+        ),
+    ]
@@ -1,8 +1,12 @@
+from decimal import Decimal
+
+from assets.models import Asset
+from core.fields import EncryptedTextField
 from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
-from .managers import AccountQuerySet
+from .managers import AccountQuerySet, PositionQuerySet
 
 
 class Account(models.Model):
@@ -136,3 +140,222 @@ class Account(models.Model):
 
     def __str__(self):
         return f"{self.user.first_name} {self.user.last_name} Account"
+
+
+class Position(models.Model):
+    """
+    A user's position in an asset, maintained from order fills and reconciled
+    against Alpaca's positions.
+
+    Quantities are signed, short positions being negative. Cost basis and
+    average entry price use average cost accounting, and closing fills realise
+    profit and loss.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name=_("user"),
+        related_name="positions",
+        on_delete=models.CASCADE,
+    )
+    asset = models.ForeignKey(
+        Asset,
+        verbose_name=_("asset"),
+        related_name="+",
+        on_delete=models.CASCADE,
+    )
+    qty = models.DecimalField(
+        verbose_name=_("quantity"),
+        max_digits=18,
+        decimal_places=9,
+        default=0,
+    )
+    avg_entry_price = models.DecimalField(
+        verbose_name=_("average entry price"),
+        max_digits=12,
+        decimal_places=5,
+        default=0,
+    )
+    cost_basis = models.DecimalField(
+        verbose_name=_("cost basis"),
+        max_digits=14,
+        decimal_places=5,
+        default=0,
+    )
+    realized_pl = models.DecimalField(
+        verbose_name=_("realized profit/loss"),
+        max_digits=14,
+        decimal_places=5,
+        default=0,
+    )
+    market_value = models.DecimalField(
+        verbose_name=_("market value"),
+        max_digits=14,
+        decimal_places=5,
+        blank=True,
+        null=True,
+        help_text=_("Market value when the position was last reconciled."),
+    )
+    updated_at = models.DateTimeField(verbose_name=_("modified"), auto_now=True)
+    reconciled_at = models.DateTimeField(
+        verbose_name=_("reconciled"), blank=True, null=True
+    )
+
+    objects = PositionQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "position"
+        verbose_name_plural = "positions"
+        unique_together = ["user", "asset"]
+
+    def __str__(self):
+        return f"{self.qty} no. of {self.asset.symbol}"
+
+    def unrealized_pl(self, price):
+        """Return the unrealized profit/loss of the position at a price."""
+        return self.qty * Decimal(str(price)) - self.cost_basis
+
+
+class PortfolioSnapshot(models.Model):
+    """
+    A point of an account's portfolio history, at the close of a period of a
+    timeframe.
+    """
+
+    MIN_1 = "1Min"
+    MIN_5 = "5Min"
+    MIN_15 = "15Min"
+    HOUR_1 = "1H"
+    DAY_1 = "1D"
+    TIMEFRAME_CHOICES = [
+        (MIN_1, _("1 minute")),
+        (MIN_5, _("5 minute")),
+        (MIN_15, _("15 minute")),
+        (HOUR_1, _("1 hour")),
+        (DAY_1, _("1 day")),
+    ]
+
+    account = models.ForeignKey(
+        Account,
+        verbose_name=_("account"),
+        related_name="snapshots",
+        on_delete=models.CASCADE,
+    )
+    timeframe = models.CharField(
+        verbose_name=_("timeframe"),
+        choices=TIMEFRAME_CHOICES,
+        max_length=56,
+    )
+    t = models.PositiveIntegerField(
+        verbose_name=_("time"),
+        help_text=_("the time of the point as a Unix epoch in seconds"),
+    )
+    equity = models.DecimalField(
+        verbose_name=_("equity"),
+        max_digits=14,
+        decimal_places=5,
+    )
+    profit_loss = models.DecimalField(
+        verbose_name=_("profit/loss"),
+        max_digits=14,
+        decimal_places=5,
+    )
+    profit_loss_pct = models.DecimalField(
+        verbose_name=_("profit/loss percentage"),
+        max_digits=12,
+        decimal_places=9,
+        blank=True,
+        null=True,
+    )
+    base_value = models.DecimalField(
+        verbose_name=_("base value"),
+        max_digits=14,
+        decimal_places=5,
+    )
+
+    class Meta:
+        verbose_name = "portfolio snapshot"
+        verbose_name_plural = "portfolio snapshots"
+        # The constraint's index also serves range queries of a timeframe
+        unique_together = ["account", "timeframe", "t"]
+
+    def __str__(self):
+        return f"{self.account_id} {self.timeframe} at {self.t}: {self.equity}"
+
+
+class AccountHistory(models.Model):
+    """The balances of an account when they were synced from Alpaca."""
+
+    account = models.ForeignKey(
+        Account,
+        verbose_name=_("account"),
+        related_name="history",
+        on_delete=models.CASCADE,
+    )
+    equity = models.DecimalField(
+        verbose_name=_("equity"),
+        max_digits=12,
+        decimal_places=5,
+    )
+    cash = models.DecimalField(
+        verbose_name=_("cash"),
+        max_digits=12,
+        decimal_places=5,
+    )
+    buying_power = models.DecimalField(
+        verbose_name=_("buying power"),
+        max_digits=12,
+        decimal_places=5,
+    )
+    long_market_value = models.DecimalField(
+        verbose_name=_("long market value"),
+        max_digits=12,
+        decimal_places=5,
+    )
+    short_market_value = models.DecimalField(
+        verbose_name=_("short market value"),
+        max_digits=12,
+        decimal_places=5,
+    )
+    created_at = models.DateTimeField(verbose_name=_("created"))
+
+    class Meta:
+        verbose_name = "account history"
+        verbose_name_plural = "account history"
+        indexes = [models.Index(fields=["account", "created_at"])]
+
+    def __str__(self):
+        return f"{self.account_id} at {self.created_at}: {self.equity}"
+
+
+class Credentials(models.Model):
+    """Alpaca api credentials of an account, with the secret key encrypted."""
+
+    PAPER_URL = "https://paper-api.alpaca.markets"
+    LIVE_URL = "https://api.alpaca.markets"
+    BASE_URL_CHOICES = [
+        (PAPER_URL, _("paper")),
+        (LIVE_URL, _("live")),
+    ]
+
+    account = models.OneToOneField(
+        Account,
+        verbose_name=_("account"),
+        related_name="credentials",
+        on_delete=models.CASCADE,
+    )
+    key_id = models.CharField(verbose_name=_("key id"), max_length=128)
+    secret_key = EncryptedTextField(verbose_name=_("secret key"))
+    base_url = models.URLField(
+        verbose_name=_("base url"),
+        choices=BASE_URL_CHOICES,
+        default=PAPER_URL,
+    )
+    updated_at = models.DateTimeField(verbose_name=_("modified"), auto_now=True)
+
+    class Meta:
+        verbose_name = "credentials"
+        verbose_name_plural = "credentials"
+
+    def __str__(self):
+        return f"{self.account_id}: {self.key_id}"
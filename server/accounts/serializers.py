@@ -2,7 +2,7 @@ from rest_framework import serializers
 from users.models import User
 from users.serializers import UserSerializer
 
-from .models import Account
+from .models import Account, PortfolioSnapshot, Position
 
 
 class AccountSerializer(serializers.ModelSerializer):
@@ -24,3 +24,30 @@ class AccountSerializer(serializers.ModelSerializer):
             instance.user, fields=("id", "first_name", "last_name")
         ).data
         return ret
+
+
+class PositionSerializer(serializers.ModelSerializer):
+    """Serializer for reading positions from the ledger of a user."""
+
+    symbol = serializers.CharField(source="asset.symbol")
+    unrealized_pl = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Position
+        fields = "__all__"
+        read_only_fields = [f.name for f in Position._meta.get_fields()]
+
+    def get_unrealized_pl(self, instance):
+        """Return the unrealized profit/loss at the reconciled market value."""
+        if instance.market_value is None:
+            return None
+        return str(instance.market_value - instance.cost_basis)
+
+
+class PortfolioSnapshotSerializer(serializers.ModelSerializer):
+    """Serializer for reading the stored portfolio history of an account."""
+
+    class Meta:
+        model = PortfolioSnapshot
+        fields = "__all__"
+        read_only_fields = [f.name for f in PortfolioSnapshot._meta.get_fields()]
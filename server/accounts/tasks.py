@@ -0,0 +1,129 @@
+import logging
+
+from config import celery_app
+from core.alpaca import TradeApiRest
+from django.conf import settings
+
+from .clients import client_manager
+from .history import history_window, write_snapshots
+from .ledger import reconcile, write_accounts
+from .models import Account, Credentials
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(ignore_result=True)
+def reconcile_positions():
+    """
+    Reconcile the position ledgers of the user holding the Alpaca account, and
+    of every account with credentials, against Alpaca's positions and accounts.
+    """
+    api = TradeApiRest()
+    raw_account = api.account_info().__dict__["_raw"]
+    account = Account.objects.filter(pk=raw_account["id"]).first()
+    corrected = 0
+    if account is None:
+        logger.info(f"No account to reconcile: {raw_account['id']}")
+    else:
+        corrected += reconcile(account.user, api.list_positions(), raw_account)
+
+    # Accounts with their own credentials are reconciled with their own client
+    manager = client_manager()
+    credentials_list = (
+        Credentials.objects.exclude(account_id=raw_account["id"])
+        .select_related("account__user")
+        .defer("secret_key")
+    )
+    for credentials in credentials_list:
+        try:
+            client = manager.get(credentials)
+            client.bucket.acquire()
+            alpaca_account = client.api.account_info().__dict__["_raw"]
+            client.bucket.acquire()
+            positions = client.api.list_positions()
+        except Exception as e:
+            logger.warning(f"Unable to reconcile account {credentials.account_id}: {e}")
+            continue
+        corrected += reconcile(credentials.account.user, positions, alpaca_account)
+
+    return corrected
+
+
+@celery_app.task(ignore_result=True)
+def sync_accounts():
+    """
+    Sync the Alpaca account, and every account with credentials, to the
+    database, so account state is read from the database rather than
+    requested from Alpaca.
+    """
+    api = TradeApiRest()
+    accounts = [api.account_info()]
+
+    # Accounts with their own credentials are fetched with their own client
+    manager = client_manager()
+    for credentials in Credentials.objects.only("account_id", "updated_at"):
+        try:
+            client = manager.get(credentials)
+            client.bucket.acquire()
+            accounts.append(client.api.account_info())
+        except Exception as e:
+            logger.warning(f"Unable to fetch account {credentials.account_id}: {e}")
+
+    updated = write_accounts(accounts)
+    logger.info(f"Accounts updated: {updated}")
+    return updated
+
+
+@celery_app.task(ignore_result=True)
+def sync_portfolio_history(timeframes=None):
+    """
+    Store the portfolio history of the Alpaca account, and of every account
+    with credentials, fetching each timeframe from its latest stored point.
+
+    :param timeframes(list): timeframes to sync, defaults to
+    `PORTFOLIO_HISTORY_TIMEFRAMES`
+    """
+    timeframes = timeframes or settings.PORTFOLIO_HISTORY_TIMEFRAMES
+    api = TradeApiRest()
+    raw_account = api.account_info().__dict__["_raw"]
+    account = Account.objects.filter(pk=raw_account["id"]).first()
+    if account is None:
+        logger.info(f"No account to sync portfolio history for: {raw_account['id']}")
+    else:
+        update_history(account, api, timeframes)
+
+    # Accounts with their own credentials are synced with their own client
+    manager = client_manager()
+    credentials_list = (
+        Credentials.objects.exclude(account_id=raw_account["id"])
+        .select_related("account")
+        .defer("secret_key")
+    )
+    for credentials in credentials_list:
+        try:
+            client = manager.get(credentials)
+            update_history(credentials.account, client.api, timeframes, client.bucket)
+        except Exception as e:
+            logger.warning(
+                f"Unable to sync portfolio history of {credentials.account_id}: {e}"
+            )
+
+
+def update_history(account, api, timeframes, bucket=None):
+    """
+    Store the portfolio history of an account for each timeframe.
+
+    :param account(Account): account
+    :param api(TradeApiRest): Alpaca api of the account
+    :param timeframes(list): timeframes to sync
+    :param bucket(TokenBucket): rate limit acquired before each request
+    """
+    for timeframe in timeframes:
+        if bucket is not None:
+            bucket.acquire()
+        history = api.get_portfolio_history(**history_window(account, timeframe))
+        created, updated = write_snapshots(account, timeframe, history.__dict__["_raw"])
+        logger.info(
+            f"Portfolio history {timeframe} of {account.pk} created: {created}, "
+            f"updated: {updated}"
+        )
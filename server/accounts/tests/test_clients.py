@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from accounts.clients import ClientManager
+from accounts.models import Credentials
+from cryptography.fernet import Fernet
+from django.db import connection
+from django.test import TestCase, override_settings
+from users.tests.factories import UserFactory
+
+from .factories import AccountFactory
+
+KEY = Fernet.generate_key().decode()
+
+
+@override_settings(CREDENTIALS_ENCRYPTION_KEYS=[KEY])
+@patch("accounts.clients.TradeApiRest")
+class ClientManagerTests(TestCase):
+    def setUp(self):
+        self.users = [UserFactory() for _ in range(3)]
+        self.credentials = [
+            Credentials.objects.create(
+                account=AccountFactory(user=user, account_number=f"ACCOUNT{index}"),
+                key_id=f"KEY{index}",
+                secret_key=f"secret{index}",
+            )
+            for index, user in enumerate(self.users)
+        ]
+
+    def test_secret_key_encrypted(self, mock_trade_api):
+        """Secret keys are stored encrypted, and decrypted when loaded."""
+        credentials = self.credentials[0]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT secret_key FROM accounts_credentials WHERE id = %s",
+                [credentials.pk],
+            )
+            stored = cursor.fetchone()[0]
+
+        self.assertNotIn("secret0", stored)
+        self.assertEqual(Fernet(KEY).decrypt(stored.encode()).decode(), "secret0")
+        with override_settings(
+            CREDENTIALS_ENCRYPTION_KEYS=[Fernet.generate_key().decode(), KEY]
+        ):
+            self.assertEqual(
+                Credentials.objects.get(pk=credentials.pk).secret_key, "secret0"
+            )
+
+    def test_client_pool(self, mock_trade_api):
+        """Clients are reused, and the least recently used dropped when full."""
+        manager = ClientManager(size=2, rate_limit=60)
+
+        first = manager.client(self.users[0])
+        self.assertIs(manager.client(self.users[0]), first)
+        manager.client(self.users[1])
+        manager.client(self.users[0])
+        manager.client(self.users[2])
+
+        self.assertEqual(len(manager), 2)
+        self.assertIs(manager.client(self.users[0]), first)
+        self.assertIsNot(manager.client(self.users[1]), first)
+        self.assertIsNot(first.bucket, manager.client(self.users[2]).bucket)
+        mock_trade_api.assert_any_call("KEY0", "secret0", Credentials.PAPER_URL)
+        self.assertEqual(mock_trade_api.call_count, 5)
+        self.assertIsNone(manager.client(UserFactory()))
+
+    def test_credentials_changed(self, mock_trade_api):
+        """Clients are replaced when their credentials change."""
+        manager = ClientManager(size=2, rate_limit=60)
+        first = manager.client(self.users[0])
+
+        self.credentials[0].secret_key = "rotated"
+        self.credentials[0].save()
+        client = manager.client(self.users[0])
+
+        self.assertIsNot(client, first)
+        self.assertIs(client.bucket, first.bucket)
+        mock_trade_api.assert_called_with("KEY0", "rotated", Credentials.PAPER_URL)
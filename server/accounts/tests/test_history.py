@@ -0,0 +1,168 @@
+from unittest.mock import patch
+
+from accounts.clients import client_manager
+from accounts.history import history_window, write_snapshots
+from accounts.models import Credentials, PortfolioSnapshot
+from accounts.tasks import sync_portfolio_history
+from accounts.tests.factories import AccountFactory
+from alpaca_trade_api.entity import Account as AlpacaAccount
+from alpaca_trade_api.entity import PortfolioHistory
+from cryptography.fernet import Fernet
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from users.tests.factories import UserFactory
+
+DAY = 24 * 60 * 60
+# Monday 15 March 2021, 00:00 ET
+MONDAY = 1615780800
+
+
+def portfolio_history(timestamps, equity):
+    return {
+        "timestamp": timestamps,
+        "equity": equity,
+        "profit_loss": [0 if value is None else value - 100 for value in equity],
+        "profit_loss_pct": [
+            0 if value is None else value / 100 - 1 for value in equity
+        ],
+        "base_value": 100,
+        "timeframe": "1D",
+    }
+
+
+class PortfolioHistoryTests(TestCase):
+    def setUp(self):
+        self.account = AccountFactory()
+
+    def test_write_snapshots(self):
+        """New points are created, changed points updated and others kept."""
+        days = [MONDAY + day * DAY for day in range(3)]
+        write_snapshots(self.account, "1D", portfolio_history(days, [None, 100, 101]))
+
+        counts = write_snapshots(
+            self.account,
+            "1D",
+            portfolio_history(days[1:] + [days[2] + DAY], [100, 102, 103]),
+        )
+
+        self.assertEqual(counts, (1, 1))
+        self.assertEqual(
+            list(PortfolioSnapshot.objects.order_by("t").values_list("t", "equity")),
+            [(days[1], 100), (days[2], 102), (days[2] + DAY, 103)],
+        )
+
+    def test_history_window(self):
+        """History is fetched from the day of the latest stored point."""
+        self.assertEqual(
+            history_window(self.account, "1D"), {"period": "1A", "timeframe": "1D"}
+        )
+
+        write_snapshots(self.account, "1D", portfolio_history([MONDAY], [100]))
+        window = history_window(self.account, "1D")
+
+        self.assertEqual(window["date_start"], "2021-03-15")
+        self.assertNotIn("period", window)
+
+    @patch("accounts.tasks.TradeApiRest")
+    def test_sync_portfolio_history(self, mock_trade_api):
+        """Each timeframe of the Alpaca account's history is stored."""
+        mock_trade_api.return_value.account_info.return_value = AlpacaAccount(
+            {"id": str(self.account.id)}
+        )
+        mock_trade_api.return_value.get_portfolio_history.return_value = (
+            PortfolioHistory(portfolio_history([MONDAY], [100]))
+        )
+
+        sync_portfolio_history(["1D", "15Min"])
+
+        self.assertEqual(
+            set(PortfolioSnapshot.objects.values_list("timeframe", flat=True)),
+            {"1D", "15Min"},
+        )
+
+    @patch("accounts.clients.TradeApiRest")
+    @patch("accounts.tasks.TradeApiRest")
+    def test_sync_portfolio_history_credentials(self, mock_trade_api, mock_client_api):
+        """
+        Accounts with credentials are synced with their own client, skipping
+        credentials which can't be decrypted.
+        """
+        self.addCleanup(client_manager().clear)
+        old_key, key = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+        accounts = [
+            AccountFactory(account_number="ROTATED"),
+            AccountFactory(account_number="CREDENTIALS"),
+        ]
+        for account, encryption_key in zip(accounts, [old_key, key]):
+            with override_settings(CREDENTIALS_ENCRYPTION_KEYS=[encryption_key]):
+                Credentials.objects.create(
+                    account=account, key_id="KEY", secret_key="secret"
+                )
+        mock_trade_api.return_value.account_info.return_value = AlpacaAccount(
+            {"id": str(self.account.id)}
+        )
+        mock_trade_api.return_value.get_portfolio_history.return_value = (
+            PortfolioHistory(portfolio_history([MONDAY], [100]))
+        )
+        mock_client_api.return_value.get_portfolio_history.return_value = (
+            PortfolioHistory(portfolio_history([MONDAY], [200]))
+        )
+
+        with override_settings(CREDENTIALS_ENCRYPTION_KEYS=[key]):
+            sync_portfolio_history(["1D"])
+
+        self.assertEqual(
+            dict(
+                PortfolioSnapshot.objects.values_list(
+                    "account__account_number", "equity"
+                )
+            ),
+            {self.account.account_number: 100, "CREDENTIALS": 200},
+        )
+
+
+class PortfolioSnapshotViewTests(APITestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.user.auth_token.key)
+        account = AccountFactory(user=self.user)
+        days = [MONDAY + day * DAY for day in range(8)]
+        write_snapshots(account, "1D", portfolio_history(days, list(range(100, 108))))
+        write_snapshots(
+            AccountFactory(account_number="OTHER"),
+            "1D",
+            portfolio_history(days, list(range(100, 108))),
+        )
+
+    def test_list_snapshots(self):
+        """Users can get a range of their portfolio history."""
+        response = self.client.get(
+            reverse("v1:portfolio-history-list"),
+            {"start": MONDAY + DAY, "end": MONDAY + 2 * DAY},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [point["equity"] for point in response.data], ["101.00000", "102.00000"]
+        )
+
+    def test_resample_snapshots(self):
+        """Resampled history has the last point of each period."""
+        response = self.client.get(
+            reverse("v1:portfolio-history-list"), {"resample": "1W"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [point["t"] for point in response.data],
+            [MONDAY + 6 * DAY, MONDAY + 7 * DAY],
+        )
+
+    def test_invalid_params(self):
+        """Invalid query parameters are rejected."""
+        for params in ({"resample": "1M"}, {"timeframe": "2D"}, {"start": "x"}):
+            response = self.client.get(reverse("v1:portfolio-history-list"), params)
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,228 @@
+import uuid
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from accounts.clients import client_manager
+from accounts.ledger import Ledger, apply_fill, reconcile, write_accounts
+from accounts.models import Account, AccountHistory, Credentials, Position
+from accounts.tasks import reconcile_positions, sync_accounts
+from alpaca_trade_api.entity import Account as AlpacaAccount
+from assets.tests.factories import AssetFactory
+from cryptography.fernet import Fernet
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from users.tests.factories import UserFactory
+
+from .factories import AccountFactory
+
+
+def alpaca_position(symbol, qty, avg_entry_price, market_value):
+    return {
+        "symbol": symbol,
+        "qty": str(qty),
+        "side": "long" if qty >= 0 else "short",
+        "avg_entry_price": str(avg_entry_price),
+        "cost_basis": str(qty * avg_entry_price),
+        "market_value": str(market_value),
+    }
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.account = AccountFactory(user=self.user, cash=10000, equity=20000)
+        self.tsla = AssetFactory(symbol="TSLA")
+        self.aapl = AssetFactory(symbol="AAPL")
+        self.msft = AssetFactory(symbol="MSFT")
+
+    def test_apply_fill(self):
+        """Fills update the average entry price, cash and realised P&L."""
+        apply_fill(self.user, self.tsla, "buy", 10, 100)
+        apply_fill(self.user, self.tsla, "buy", 10, 200)
+        position = apply_fill(self.user, self.tsla, "sell", 5, 250)
+
+        self.assertEqual(position.qty, 15)
+        self.assertEqual(position.avg_entry_price, 150)
+        self.assertEqual(position.cost_basis, 2250)
+        self.assertEqual(position.realized_pl, 500)
+        self.assertEqual(position.unrealized_pl(160), 150)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.cash, 10000 - 3000 + 1250)
+
+    def test_apply_fill_reverses_position(self):
+        """Selling more than is held closes the position and opens a short."""
+        apply_fill(self.user, self.tsla, "buy", 10, 100)
+        position = apply_fill(self.user, self.tsla, "sell", 15, 90)
+
+        self.assertEqual(position.qty, -5)
+        self.assertEqual(position.avg_entry_price, 90)
+        self.assertEqual(position.cost_basis, -450)
+        self.assertEqual(position.realized_pl, -100)
+
+        position = apply_fill(self.user, self.tsla, "buy", 5, 80)
+
+        self.assertEqual(position.qty, 0)
+        self.assertEqual(position.cost_basis, 0)
+        self.assertEqual(position.realized_pl, -50)
+
+    def test_reconcile(self):
+        """Positions and account are corrected to match Alpaca."""
+        apply_fill(self.user, self.tsla, "buy", 10, 100)
+        apply_fill(self.user, self.aapl, "buy", 3, 50)
+        apply_fill(self.user, self.msft, "buy", 5, 20)
+        before = {
+            position.asset.symbol: position.updated_at
+            for position in Position.objects.select_related("asset")
+        }
+
+        corrected = reconcile(
+            self.user,
+            [
+                alpaca_position("TSLA", 12, 100, 1300),
+                alpaca_position("MSFT", 5, 20, 110),
+            ],
+            {"id": str(self.account.id), "cash": "500", "equity": "1800"},
+        )
+        tsla = Position.objects.get(asset__symbol="TSLA")
+        aapl = Position.objects.get(asset__symbol="AAPL")
+        msft = Position.objects.get(asset__symbol="MSFT")
+        self.account.refresh_from_db()
+
+        self.assertEqual(corrected, 2)
+        # Positions whose quantity was corrected have changed
+        self.assertGreater(tsla.updated_at, before["TSLA"])
+        self.assertGreater(aapl.updated_at, before["AAPL"])
+        self.assertEqual(msft.updated_at, before["MSFT"])
+        self.assertEqual(tsla.qty, 12)
+        self.assertEqual(tsla.market_value, 1300)
+        self.assertIsNotNone(tsla.reconciled_at)
+        self.assertEqual(aapl.qty, 0)
+        self.assertEqual(self.account.cash, 500)
+        self.assertEqual(self.account.equity, 1800)
+
+    def test_write_accounts(self):
+        """Only changed fields are written, and balance changes recorded."""
+        raw_account = {
+            "id": str(self.account.id),
+            "cash": "10000",
+            "equity": "20500.5",
+            "daytrade_count": 2,
+            "trading_blocked": False,
+        }
+
+        updated = write_accounts([raw_account])
+        unchanged = write_accounts([raw_account, {"id": str(uuid.uuid4())}])
+        with patch.object(Account.objects, "bulk_update") as bulk_update:
+            write_accounts([{**raw_account, "daytrade_count": 3}])
+        self.account.refresh_from_db()
+
+        self.assertEqual((updated, unchanged), (1, 0))
+        self.assertEqual(bulk_update.call_args.args[1], ["daytrade_count"])
+        self.assertEqual(self.account.equity, Decimal("20500.5"))
+        self.assertEqual(
+            list(AccountHistory.objects.values_list("equity", flat=True)),
+            [Decimal("20500.5")],
+        )
+
+    @patch("accounts.tasks.TradeApiRest")
+    def test_sync_accounts(self, mock_trade_api):
+        """The Alpaca account is synced to its linked account."""
+        mock_trade_api.return_value.account_info.return_value = AlpacaAccount(
+            {"id": str(self.account.id), "buying_power": "1234.5"}
+        )
+
+        updated = sync_accounts()
+
+        self.assertEqual(updated, 1)
+        self.assertEqual(
+            Account.objects.get(pk=self.account.pk).buying_power, Decimal("1234.5")
+        )
+        mock_trade_api.return_value.account_info.assert_called_once()
+
+    def test_ledger(self):
+        """Orders are sized from the ledger without calling Alpaca."""
+        apply_fill(self.user, self.tsla, "buy", 10, 100)
+        api = MagicMock()
+
+        ledger = Ledger(self.user, api)
+
+        self.assertEqual(ledger.equity(), 20000)
+        self.assertEqual(ledger.long_value(self.tsla, 120.0), 1200)
+        self.assertIsNone(ledger.long_value(self.aapl, 10.0))
+        api.account_info.assert_not_called()
+        api.list_position_by_symbol.assert_not_called()
+
+    def test_ledger_without_account(self):
+        """Users without an account fall back to Alpaca."""
+        api = MagicMock()
+        api.account_info.return_value = AlpacaAccount({"equity": "500"})
+
+        ledger = Ledger(UserFactory(), api)
+
+        self.assertEqual(ledger.equity(), 500)
+        api.account_info.assert_called_once()
+
+    @patch("accounts.tasks.TradeApiRest")
+    def test_reconcile_positions(self, mock_trade_api):
+        """The ledger of the user holding the Alpaca account is reconciled."""
+        mock_trade_api.return_value.account_info.return_value = AlpacaAccount(
+            {"id": str(self.account.id), "cash": "100"}
+        )
+        mock_trade_api.return_value.list_positions.return_value = [
+            alpaca_position("TSLA", 2, 100, 210)
+        ]
+
+        corrected = reconcile_positions()
+
+        self.assertEqual(corrected, 1)
+        self.assertEqual(Position.objects.get(user=self.user).qty, 2)
+        self.assertEqual(Account.objects.get(pk=self.account.pk).cash, 100)
+
+    @override_settings(CREDENTIALS_ENCRYPTION_KEYS=[Fernet.generate_key().decode()])
+    @patch("accounts.clients.TradeApiRest")
+    @patch("accounts.tasks.TradeApiRest")
+    def test_reconcile_positions_credentials(self, mock_trade_api, mock_client_api):
+        """Accounts with credentials are reconciled with their own client."""
+        self.addCleanup(client_manager().clear)
+        user = UserFactory()
+        account = AccountFactory(user=user, account_number="CREDENTIALS")
+        Credentials.objects.create(account=account, key_id="KEY", secret_key="secret")
+        mock_trade_api.return_value.account_info.return_value = AlpacaAccount(
+            {"id": str(self.account.id), "cash": "100"}
+        )
+        mock_trade_api.return_value.list_positions.return_value = []
+        mock_client_api.return_value.account_info.return_value = AlpacaAccount(
+            {"id": str(account.id), "cash": "500"}
+        )
+        mock_client_api.return_value.list_positions.return_value = [
+            alpaca_position("AAPL", 3, 100, 300)
+        ]
+
+        corrected = reconcile_positions()
+
+        self.assertEqual(corrected, 1)
+        self.assertEqual(Position.objects.get(user=user).qty, 3)
+        self.assertFalse(Position.objects.filter(user=self.user).exists())
+        self.assertEqual(Account.objects.get(pk=account.pk).cash, 500)
+        mock_client_api.assert_called_once_with("KEY", "secret", Credentials.PAPER_URL)
+
+
+class PositionViewTests(APITestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.user.auth_token.key)
+        AccountFactory(user=self.user)
+        self.tsla = AssetFactory(symbol="TSLA")
+        apply_fill(self.user, self.tsla, "buy", 10, 100)
+        apply_fill(UserFactory(), self.tsla, "buy", 5, 100)
+
+    def test_list_positions(self):
+        """Users can list their open positions."""
+        response = self.client.get(reverse("v1:positions-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["symbol"], "TSLA")
+        self.assertEqual(Decimal(response.data[0]["qty"]), 10)
@@ -1,9 +1,13 @@
 from rest_framework.routers import DefaultRouter
 
-from .views import AccountView
+from .views import AccountView, PortfolioSnapshotView, PositionView
 
 router = DefaultRouter()
 
+router.register(r"positions", PositionView, basename="positions")
+router.register(
+    r"portfolio-history", PortfolioSnapshotView, basename="portfolio-history"
+)
 router.register(r"", AccountView, basename="accounts")
 
 urlpatterns = router.urls
@@ -1,9 +1,17 @@
+import uuid
+
 from core.permissions import IsAdminOrOwner
 from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
-from .models import Account
-from .serializers import AccountSerializer
+from .history import RESAMPLE_SECONDS, resample
+from .models import Account, PortfolioSnapshot, Position
+from .serializers import (
+    AccountSerializer,
+    PortfolioSnapshotSerializer,
+    PositionSerializer,
+)
 
 
 class AccountView(viewsets.ModelViewSet):
@@ -26,3 +34,61 @@ class AccountView(viewsets.ModelViewSet):
 
     def get_serializer_class(self):
         return AccountSerializer
+
+
+class PositionView(viewsets.ReadOnlyModelViewSet):
+    permission_classes = [IsAuthenticated]
+    serializer_class = PositionSerializer
+
+    def get_queryset(self, *args, **kwargs):
+        """Return open positions from the ledger to requesting user."""
+        return (
+            Position.objects.visible(self.request.user).open().select_related("asset")
+        )
+
+
+class PortfolioSnapshotView(viewsets.ReadOnlyModelViewSet):
+    permission_classes = [IsAuthenticated]
+    serializer_class = PortfolioSnapshotSerializer
+
+    def get_queryset(self, *args, **kwargs):
+        """
+        Return the stored portfolio history of the requesting user's accounts.
+
+        Query parameters:
+        * `timeframe`: timeframe of the history, defaults to 1D
+        * `start`/`end`: only points from/until this Unix epoch
+        * `resample`: only the last point of each 1H, 1D or 1W period
+        """
+        accounts = Account.objects.visible(self.request.user)
+        queryset = PortfolioSnapshot.objects.filter(account__in=accounts)
+        params = self.request.query_params
+        timeframe = params.get("timeframe", PortfolioSnapshot.DAY_1)
+        period = params.get("resample")
+
+        if timeframe not in dict(PortfolioSnapshot.TIMEFRAME_CHOICES):
+            raise ValidationError(
+                "`timeframe` must be one of 1Min, 5Min, 15Min, 1H, 1D"
+            )
+        queryset = queryset.filter(timeframe=timeframe)
+
+        for param, lookup in (("start", "t__gte"), ("end", "t__lte")):
+            value = params.get(param)
+            if value:
+                if not value.isdigit():
+                    raise ValidationError(f"`{param}` must be a Unix epoch")
+                queryset = queryset.filter(**{lookup: value})
+
+        account = params.get("account")
+        if account:
+            try:
+                queryset = queryset.filter(account=uuid.UUID(account))
+            except ValueError:
+                raise ValidationError("`account` must be an account id")
+
+        if period:
+            if period not in RESAMPLE_SECONDS:
+                raise ValidationError("`resample` must be one of 1H, 1D, 1W")
+            return resample(queryset, period)
+
+        return queryset.order_by("account", "t")
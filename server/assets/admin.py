@@ -2,7 +2,7 @@ import uuid
 
 from django.contrib import admin
 
-from .models import Asset, AssetClass, Bar, Exchange
+from .models import Asset, AssetClass, Bar, BarCoverage, Exchange, TradingSession
 
 
 class AssetClassAdmin(admin.ModelAdmin):
@@ -50,3 +50,5 @@ admin.site.register(Exchange, ExchangeAdmin)
 admin.site.register(Asset, AssetAdmin)
 admin.site.register(AssetClass, AssetClassAdmin)
 admin.site.register(Bar)
+admin.site.register(TradingSession)
+admin.site.register(BarCoverage)
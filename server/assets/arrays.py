@@ -0,0 +1,62 @@
+from collections import namedtuple
+
+import numpy as np
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from .models import Bar
+
+BAR_COLUMNS = ("t", "o", "h", "l", "c", "v")
+BAR_DTYPE = np.dtype(
+    [
+        ("t", np.int64),
+        ("o", np.float64),
+        ("h", np.float64),
+        ("l", np.float64),
+        ("c", np.float64),
+        ("v", np.int64),
+    ]
+)
+
+BarArrays = namedtuple("BarArrays", BAR_COLUMNS)
+
+
+def empty_bar_arrays():
+    """Return an empty set of bar columns."""
+    return BarArrays(*(np.empty(0, dtype=BAR_DTYPE[name]) for name in BAR_COLUMNS))
+
+
+def bar_arrays(queryset):
+    """
+    Return bar data for a queryset as typed NumPy columns ordered by time.
+
+    Prices are cast to double precision by the database, so no ``Decimal``
+    objects are created while loading large histories.
+
+    :param queryset(QuerySet): bars to load
+    """
+    rows = (
+        queryset.order_by("t")
+        .annotate(
+            o_float=Cast("o", FloatField()),
+            h_float=Cast("h", FloatField()),
+            l_float=Cast("l", FloatField()),
+            c_float=Cast("c", FloatField()),
+        )
+        .values_list("t", "o_float", "h_float", "l_float", "c_float", "v")
+    )
+    records = np.array(list(rows), dtype=BAR_DTYPE)
+    return BarArrays(*(np.ascontiguousarray(records[name]) for name in BAR_COLUMNS))
+
+
+def latest_bar_arrays(asset_id, timeframe, count):
+    """
+    Return the latest bars of an asset as NumPy columns ordered by time.
+
+    :param asset_id(uuid): asset id
+    :param timeframe(str): bar timeframe eg. 15Min
+    :param count(int): maximum number of bars to return
+    """
+    bars = Bar.objects.filter(asset_id=asset_id, timeframe=timeframe)
+    first = list(bars.order_by("-t").values_list("t", flat=True)[count - 1 : count])
+    return bar_arrays(bars.filter(t__gte=first[0]) if first else bars)
@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+
+import numpy as np
+from django.conf import settings
+
+from .arrays import BAR_COLUMNS, BAR_DTYPE, BarArrays, bar_arrays, empty_bar_arrays
+from .models import Bar
+
+logger = logging.getLogger(__name__)
+
+
+class BarCache:
+    """
+    Local on-disk cache of bar data for backtests and batch analytics.
+
+    Each symbol and timeframe is stored as one fixed width binary file per
+    column (int64 times/volumes, float64 prices), so columns can be memory
+    mapped into NumPy without copying or converting ``Decimal`` values. A small
+    metadata file records the number of cached bars and the latest bar time
+    (the watermark) which is used to sync incrementally from the database.
+    """
+
+    META_FILENAME = "meta.json"
+
+    def __init__(self, root=None):
+        self.root = root or settings.BAR_CACHE_DIR
+
+    def path(self, symbol, timeframe):
+        """Return the cache directory of a symbol and timeframe."""
+        return os.path.join(self.root, str(symbol), timeframe)
+
+    def cached(self):
+        """Return a list of (symbol, timeframe) pairs held in the cache."""
+        if not os.path.isdir(self.root):
+            return []
+        return [
+            (symbol, timeframe)
+            for symbol in sorted(os.listdir(self.root))
+            for timeframe in sorted(os.listdir(os.path.join(self.root, symbol)))
+            if os.path.exists(
+                os.path.join(self.root, symbol, timeframe, self.META_FILENAME)
+            )
+        ]
+
+    def load(self, symbol, timeframe, start=None, end=None):
+        """
+        Return memory mapped bar columns for a symbol and timeframe.
+
+        :param symbol(str): asset symbol
+        :param timeframe(str): bar timeframe eg. 15Min
+        :param start(int): return bars at or after this Unix epoch
+        :param end(int): return bars before this Unix epoch
+        """
+        directory = self.path(symbol, timeframe)
+        count = self._read_meta(directory)["count"]
+        if not count:
+            return empty_bar_arrays()
+
+        arrays = BarArrays(
+            *(
+                np.memmap(
+                    os.path.join(directory, name),
+                    dtype=BAR_DTYPE[name],
+                    mode="r",
+                    shape=(count,),
+                )
+                for name in BAR_COLUMNS
+            )
+        )
+        if start is None and end is None:
+            return arrays
+
+        lower = 0 if start is None else np.searchsorted(arrays.t, start, "left")
+        upper = count if end is None else np.searchsorted(arrays.t, end, "left")
+        return BarArrays(*(column[lower:upper] for column in arrays))
+
+    def sync(self, asset, timeframe):
+        """
+        Append bars newer than the cached watermark from the database.
+
+        If bars have been added or removed at or before the watermark (eg. a
+        backfill) the cache for the symbol and timeframe is rebuilt.
+
+        :param asset(Asset): asset to sync
+        :param timeframe(str): bar timeframe eg. 15Min
+        :return(int): number of bars written to the cache
+        """
+        directory = self.path(asset.symbol, timeframe)
+        meta = self._read_meta(directory)
+        bars = Bar.objects.filter(asset=asset, timeframe=timeframe)
+
+        rebuild = not meta["count"]
+        if not rebuild:
+            behind_watermark = bars.filter(t__lte=meta["watermark"]).count()
+            rebuild = behind_watermark != meta["count"]
+            if rebuild:
+                logger.info(f"Rebuilding bar cache: {asset.symbol} {timeframe}")
+            else:
+                bars = bars.filter(t__gt=meta["watermark"])
+
+        arrays = bar_arrays(bars)
+        if not len(arrays.t) and not (rebuild and meta["count"]):
+            return 0
+
+        if rebuild:
+            self._write_columns(directory, arrays)
+            count = len(arrays.t)
+        else:
+            self._append_columns(directory, arrays, meta["count"])
+            count = meta["count"] + len(arrays.t)
+
+        watermark = int(arrays.t[-1]) if len(arrays.t) else None
+        self._write_meta(directory, {"count": count, "watermark": watermark})
+        return len(arrays.t)
+
+    def _read_meta(self, directory):
+        try:
+            with open(os.path.join(directory, self.META_FILENAME)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"count": 0, "watermark": None}
+
+    def _write_meta(self, directory, meta):
+        path = os.path.join(directory, self.META_FILENAME)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _write_columns(self, directory, arrays):
+        """
+        Replace all columns.
+
+        Columns are written to temporary files and renamed, so existing memory
+        maps of the previous files remain valid.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name, column in zip(BAR_COLUMNS, arrays):
+            path = os.path.join(directory, name)
+            column.astype(BAR_DTYPE[name]).tofile(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+
+    def _append_columns(self, directory, arrays, count):
+        """
+        Append to columns after the given number of cached bars.
+
+        Any bytes past the cached count (eg. from an interrupted sync) are
+        overwritten.
+        """
+        for name, column in zip(BAR_COLUMNS, arrays):
+            path = os.path.join(directory, name)
+            with open(path, "r+b") as f:
+                f.seek(count * BAR_DTYPE[name].itemsize)
+                f.write(column.astype(BAR_DTYPE[name]).tobytes())
+                f.truncate()
@@ -0,0 +1,236 @@
+import logging
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pytz
+from alpaca_trade_api.entity import Calendar as AlpacaCalendar
+from core.alpaca import TradeApiRest
+from django.db import transaction
+from django.utils import timezone
+
+from .compaction import MARKET_TIMEZONE
+from .models import Bar, BarCoverage, TradingSession
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of bars Alpaca returns for a symbol in one request
+MAX_BARS_PER_REQUEST = 1000
+
+
+def market_datetime(session_date, session_time):
+    """
+    Return a date and time in the market's timezone as a UTC datetime.
+
+    :param session_date(date): session date
+    :param session_time(str | time): time eg. 09:30
+    """
+    if isinstance(session_time, str):
+        session_time = time.fromisoformat(session_time)
+    market_timezone = pytz.timezone(MARKET_TIMEZONE)
+    local = market_timezone.localize(datetime.combine(session_date, session_time))
+    return local.astimezone(pytz.utc)
+
+
+def update_calendar(start, end, calendar=None):
+    """
+    Update the trading sessions between two dates from Alpaca's calendar.
+
+    Sessions which have become holidays are removed, along with their bar
+    coverage.
+
+    :param start(date): first date to update
+    :param end(date): last date to update
+    :param calendar(list): calendar days, fetched from Alpaca if not given
+    :return(int): number of sessions created or updated
+    """
+    if calendar is None:
+        api = TradeApiRest()
+        calendar = api.get_calendar(start.isoformat(), end.isoformat())
+
+    existing = TradingSession.objects.filter(date__gte=start, date__lte=end)
+    existing = {session.date: session for session in existing}
+    created = []
+    updated = []
+    for day in calendar:
+        # Transform Alpaca response into dict required by session model
+        if isinstance(day, AlpacaCalendar):
+            day = day.__dict__["_raw"]
+        session_date = date.fromisoformat(day["date"])
+        values = {
+            "open": market_datetime(session_date, day["open"]),
+            "close": market_datetime(session_date, day["close"]),
+            "early_close": day["close"] < TradingSession.REGULAR_CLOSE,
+        }
+        session = existing.pop(session_date, None)
+        if session is None:
+            created.append(TradingSession(date=session_date, **values))
+        elif any(getattr(session, key) != value for key, value in values.items()):
+            for key, value in values.items():
+                setattr(session, key, value)
+            updated.append(session)
+
+    with transaction.atomic():
+        TradingSession.objects.filter(date__in=list(existing)).delete()
+        TradingSession.objects.bulk_create(created)
+        TradingSession.objects.bulk_update(updated, ["open", "close", "early_close"])
+
+    return len(created) + len(updated)
+
+
+def latest_sessions(bars, timeframe, now=None):
+    """
+    Return the latest trading sessions which hold a number of bars.
+
+    The session in progress is included, holding the bars begun so far.
+
+    :param bars(int): number of bars required
+    :param timeframe(str): bar timeframe eg. 15Min
+    :param now(datetime): time sessions must have opened by, defaults to now
+    :return(list): sessions oldest first, or None if the calendar doesn't have
+    enough sessions
+    """
+    now = now or timezone.now()
+    sessions = []
+    expected = 0
+    # Every closed session holds at least one bar, and only the latest
+    # session can be in progress
+    opened = TradingSession.objects.filter(open__lte=now)
+    for session in opened.order_by("-date")[: bars + 1]:
+        if expected >= bars:
+            break
+        sessions.append(session)
+        expected += session.elapsed_bars(timeframe, now)
+    if expected < bars:
+        return None
+    return sessions[::-1]
+
+
+def session_bounds(session, timeframe):
+    """
+    Return the [start, end) Unix epoch range of the bars of a session.
+
+    Daily bars begin at the start of the (market timezone) day, rather than
+    at the open.
+    """
+    if timeframe == Bar.DAY_1:
+        start = market_datetime(session.date, time.min)
+        end = market_datetime(session.date + timedelta(days=1), time.min)
+    else:
+        start, end = session.open, session.close
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def session_bar_counts(asset, timeframe, sessions):
+    """
+    Return the number of stored bars of an asset in each session.
+
+    Bars are loaded with one query and counted per session with a binary
+    search.
+    """
+    bounds = np.array(
+        [session_bounds(session, timeframe) for session in sessions], dtype=np.int64
+    ).reshape(-1, 2)
+    if not len(bounds):
+        return np.empty(0, dtype=np.int64)
+    t = np.array(
+        Bar.objects.filter(
+            asset=asset,
+            timeframe=timeframe,
+            t__gte=bounds[:, 0].min(),
+            t__lt=bounds[:, 1].max(),
+        ).values_list("t", flat=True),
+        dtype=np.int64,
+    )
+    t.sort()
+    return np.searchsorted(t, bounds[:, 1]) - np.searchsorted(t, bounds[:, 0])
+
+
+def update_coverage(asset, timeframe, sessions, fetched=False):
+    """
+    Record the stored bars of an asset in each session.
+
+    :param asset(Asset): asset
+    :param timeframe(str): bar timeframe eg. 15Min
+    :param sessions(list): sessions to record
+    :param fetched(bool): the bars of the sessions have just been fetched from
+    Alpaca, so closed sessions with bars are complete, even if periods without
+    trades have no bars
+    :return(list): sessions which are incomplete
+    """
+    counts = session_bar_counts(asset, timeframe, sessions)
+    existing = BarCoverage.objects.filter(
+        asset=asset, timeframe=timeframe, session__in=sessions
+    )
+    existing = {coverage.session_id: coverage for coverage in existing}
+    now = timezone.now()
+
+    created = []
+    updated = []
+    incomplete = []
+    for session, count in zip(sessions, counts.tolist()):
+        complete = count >= session.expected_bars(timeframe) or (
+            fetched and count > 0 and session.close <= now
+        )
+        coverage = existing.get(session.id)
+        if coverage is None:
+            created.append(
+                BarCoverage(
+                    asset=asset,
+                    timeframe=timeframe,
+                    session=session,
+                    bars=count,
+                    complete=complete,
+                )
+            )
+        else:
+            complete = complete or coverage.complete
+            if (coverage.bars, coverage.complete) != (count, complete):
+                coverage.bars = count
+                coverage.complete = complete
+                updated.append(coverage)
+        if not complete:
+            incomplete.append(session)
+
+    with transaction.atomic():
+        BarCoverage.objects.bulk_create(created, ignore_conflicts=True)
+        BarCoverage.objects.bulk_update(updated, ["bars", "complete"])
+
+    return incomplete
+
+
+def missing_sessions(asset, timeframe, sessions):
+    """Return the sessions which the coverage index doesn't record as complete."""
+    complete = set(
+        BarCoverage.objects.filter(
+            asset=asset, timeframe=timeframe, session__in=sessions, complete=True
+        ).values_list("session_id", flat=True)
+    )
+    return [session for session in sessions if session.id not in complete]
+
+
+def session_ranges(sessions, missing, timeframe):
+    """
+    Group missing sessions into runs of consecutive sessions, each small
+    enough to be fetched in one request.
+
+    :param sessions(list): consecutive sessions, oldest first
+    :param missing(list): sessions to fetch, oldest first
+    :param timeframe(str): bar timeframe eg. 15Min
+    :return(list): (first session, last session, number of bars) tuples
+    """
+    positions = {session.id: index for index, session in enumerate(sessions)}
+    ranges = []
+    previous = None
+    for session in missing:
+        bars = session.expected_bars(timeframe)
+        if (
+            ranges
+            and positions[session.id] == positions[previous.id] + 1
+            and ranges[-1][2] + bars <= MAX_BARS_PER_REQUEST
+        ):
+            first, _, count = ranges[-1]
+            ranges[-1] = (first, session, count + bars)
+        else:
+            ranges.append((session, session, bars))
+        previous = session
+    return ranges
@@ -0,0 +1,167 @@
+import logging
+from datetime import datetime, time, timedelta
+
+import pytz
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Bar, BarCoverage
+
+logger = logging.getLogger(__name__)
+
+INTRADAY_TIMEFRAMES = [Bar.MIN_1, Bar.MIN_5, Bar.MIN_15, Bar.HOUR_1]
+MARKET_TIMEZONE = "America/New_York"
+
+# Unix epoch of the start of the (market timezone) day a bar belongs to, which
+# matches the `t` of daily bars returned by Alpaca.
+DAY_START_SQL = f"""
+    extract(epoch FROM date_trunc(
+        'day', to_timestamp({{column}}) AT TIME ZONE '{MARKET_TIMEZONE}'
+    ) AT TIME ZONE '{MARKET_TIMEZONE}')::integer
+"""
+
+
+def compaction_cutoff(days=None, now=None):
+    """
+    Return the Unix epoch before which intraday bars are compacted.
+
+    The cutoff is aligned to the start of a market day, so only whole days are
+    rolled up.
+
+    :param days(int): number of days of intraday bars to keep
+    :param now(datetime): time the cutoff is relative to, defaults to now
+    """
+    if days is None:
+        days = settings.BAR_COMPACTION_DAYS
+    market_timezone = pytz.timezone(MARKET_TIMEZONE)
+    now = (now or datetime.now(pytz.utc)).astimezone(market_timezone)
+    cutoff_date = now.date() - timedelta(days=days)
+    cutoff = market_timezone.localize(datetime.combine(cutoff_date, time.min))
+    return int(cutoff.timestamp())
+
+
+def rollup_daily_bars(cutoff):
+    """
+    Aggregate intraday bars before the cutoff into daily bars.
+
+    Daily bars which already exist (eg. fetched from Alpaca) are kept. Where a
+    day has bars in more than one intraday timeframe, the finest timeframe is
+    used.
+
+    :param cutoff(int): Unix epoch to roll up bars before
+    :return(int): number of daily bars created
+    """
+    table = Bar._meta.db_table
+    day_start = DAY_START_SQL.format(column="t")
+    created = 0
+    with connection.cursor() as cursor:
+        for timeframe in INTRADAY_TIMEFRAMES:
+            # Volume is clamped to the range of the integer `v` column
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (asset_id, timeframe, t, o, h, l, c, v)
+                SELECT
+                    asset_id,
+                    %s,
+                    {day_start} AS day,
+                    (array_agg(o ORDER BY t))[1],
+                    max(h),
+                    min(l),
+                    (array_agg(c ORDER BY t DESC))[1],
+                    least(sum(v), 2147483647)
+                FROM {table}
+                WHERE timeframe = %s AND t < %s
+                GROUP BY asset_id, day
+                ON CONFLICT (asset_id, timeframe, t) DO NOTHING
+                """,
+                [Bar.DAY_1, timeframe, cutoff],
+            )
+            created += cursor.rowcount
+    return created
+
+
+def delete_intraday_bars(cutoff, batch_size=None):
+    """
+    Delete intraday bars before the cutoff which have been rolled up.
+
+    Bars are deleted in bounded batches, each in its own transaction, to avoid
+    holding long locks on the bar table. Only bars for days which have a daily
+    bar are deleted.
+
+    :param cutoff(int): Unix epoch to delete bars before
+    :param batch_size(int): maximum number of bars deleted per transaction
+    :return(int): number of bars deleted
+    """
+    if batch_size is None:
+        batch_size = settings.BAR_COMPACTION_BATCH_SIZE
+    table = Bar._meta.db_table
+    day_start = DAY_START_SQL.format(column="intraday.t")
+    deleted = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                DELETE FROM {table}
+                WHERE t < %s AND (id, t) IN (
+                    SELECT intraday.id, intraday.t
+                    FROM {table} intraday
+                    WHERE intraday.timeframe = ANY(%s)
+                    AND intraday.t < %s
+                    AND EXISTS (
+                        SELECT 1 FROM {table} daily
+                        WHERE daily.asset_id = intraday.asset_id
+                        AND daily.timeframe = %s
+                        AND daily.t = {day_start}
+                    )
+                    LIMIT %s
+                )
+                """,
+                [cutoff, INTRADAY_TIMEFRAMES, cutoff, Bar.DAY_1, batch_size],
+            )
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                return deleted
+
+
+def average_bar_size():
+    """Return the estimated size in bytes of a stored bar, including indexes."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT sum(pg_total_relation_size(relation.oid)),
+                sum(greatest(relation.reltuples, 0))
+            FROM pg_class relation
+            WHERE relation.relname = %s OR relation.oid IN (
+                SELECT inhrelid FROM pg_inherits
+                WHERE inhparent = %s::regclass
+            )
+            """,
+            [Bar._meta.db_table, Bar._meta.db_table],
+        )
+        size, rows = cursor.fetchone()
+    if not size or not rows:
+        return None
+    return size / rows
+
+
+def compact_bars(days=None, batch_size=None, now=None):
+    """
+    Roll up aged intraday bars into daily bars and delete them.
+
+    :param days(int): number of days of intraday bars to keep
+    :param batch_size(int): maximum number of bars deleted per transaction
+    :param now(datetime): time the retention period is relative to
+    :return(dict): daily bars created, intraday bars deleted and the estimated
+    bytes reclaimed (once vacuumed)
+    """
+    cutoff = compaction_cutoff(days, now)
+    bar_size = average_bar_size()
+    rolled_up = rollup_daily_bars(cutoff)
+    deleted = delete_intraday_bars(cutoff, batch_size)
+    # Intraday bars of compacted sessions are no longer loaded
+    BarCoverage.objects.filter(
+        timeframe__in=INTRADAY_TIMEFRAMES,
+        session__open__lt=datetime.fromtimestamp(cutoff, pytz.utc),
+    ).delete()
+    reclaimed = int(deleted * bar_size) if bar_size else None
+    return {"rolled_up": rolled_up, "deleted": deleted, "reclaimed_bytes": reclaimed}
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from assets.parquet import export_bars, import_bars
+
+
+class Command(BaseCommand):
+    help = "Export bar data to, or import bar data from, Parquet files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=["export", "import"],
+            help="Export bars to Parquet files, or import bars from them.",
+        )
+        parser.add_argument(
+            "--symbols",
+            nargs="+",
+            help="Symbols to export/import. Defaults to all symbols.",
+        )
+        parser.add_argument(
+            "--start",
+            type=int,
+            help="Export bars at or after this Unix epoch.",
+        )
+        parser.add_argument(
+            "--end",
+            type=int,
+            help="Export bars before this Unix epoch.",
+        )
+        parser.add_argument(
+            "--path",
+            default=settings.BAR_EXPORT_DIR,
+            help="Directory of Parquet partitions.",
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs["action"] == "export":
+            self.stdout.write("Exporting bars...")
+            count = export_bars(
+                kwargs["path"], kwargs["symbols"], kwargs["start"], kwargs["end"]
+            )
+        else:
+            self.stdout.write("Importing bars...")
+            count = import_bars(kwargs["path"], kwargs["symbols"])
+        self.stdout.write(f"Done: {count} bars")
@@ -0,0 +1,33 @@
+# Generated by Django 3.1.2 on 2026-10-19 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0004_bars_unique_together"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bar",
+            name="timeframe",
+            field=models.CharField(
+                choices=[
+                    ("1Min", "1 minute"),
+                    ("5Min", "5 minute"),
+                    ("15Min", "15 minute"),
+                    ("1H", "1 hour"),
+                    ("1D", "1 day"),
+                ],
+                default="15Min",
+                max_length=56,
+                verbose_name="timeframe",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="bar",
+            unique_together={("asset_id", "timeframe", "t")},
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 3.1.2 on 2026-10-19 12:10
+
+from datetime import date, datetime
+
+import pytz
+from django.db import migrations
+
+# Declarative partitioning with primary keys and foreign keys requires
+# Postgresql 11 or later. Older databases keep the unpartitioned table.
+MINIMUM_PG_VERSION = 110000
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_epoch(month):
+    return int(datetime(month.year, month.month, 1, tzinfo=pytz.utc).timestamp())
+
+
+def can_partition(schema_editor):
+    connection = schema_editor.connection
+    return (
+        connection.vendor == "postgresql"
+        and connection.pg_version >= MINIMUM_PG_VERSION
+    )
+
+
+def partition_bar_table(apps, schema_editor):
+    """
+    Recreate the bar table range partitioned by month on `t`.
+
+    Partitions are created for every month with existing bars and the
+    following three months, plus a default partition for any other bars.
+    """
+    if not can_partition(schema_editor):
+        return
+
+    cursor = schema_editor.connection.cursor()
+    cursor.execute("ALTER TABLE assets_bar RENAME TO assets_bar_unpartitioned")
+    cursor.execute(
+        """
+        CREATE TABLE assets_bar (
+            LIKE assets_bar_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+        ) PARTITION BY RANGE (t)
+        """
+    )
+    cursor.execute("ALTER SEQUENCE assets_bar_id_seq OWNED BY assets_bar.id")
+    cursor.execute("ALTER TABLE assets_bar ADD PRIMARY KEY (id, t)")
+    cursor.execute("ALTER TABLE assets_bar ADD UNIQUE (asset_id, timeframe, t)")
+    cursor.execute(
+        """
+        ALTER TABLE assets_bar ADD FOREIGN KEY (asset_id)
+        REFERENCES assets_asset (id) DEFERRABLE INITIALLY DEFERRED
+        """
+    )
+    cursor.execute("CREATE TABLE assets_bar_default PARTITION OF assets_bar DEFAULT")
+
+    cursor.execute("SELECT min(t), max(t) FROM assets_bar_unpartitioned")
+    min_t, max_t = cursor.fetchone()
+    this_month = date.today().replace(day=1)
+    month = this_month
+    if min_t is not None:
+        month = min(month, datetime.utcfromtimestamp(min_t).date().replace(day=1))
+        this_month = max(
+            this_month, datetime.utcfromtimestamp(max_t).date().replace(day=1)
+        )
+    while month <= add_months(this_month, 3):
+        next_month = add_months(month, 1)
+        cursor.execute(
+            f"""
+            CREATE TABLE assets_bar_p{month.year:04d}_{month.month:02d}
+            PARTITION OF assets_bar
+            FOR VALUES FROM ({month_epoch(month)}) TO ({month_epoch(next_month)})
+            """
+        )
+        month = next_month
+
+    cursor.execute("INSERT INTO assets_bar SELECT * FROM assets_bar_unpartitioned")
+    cursor.execute("DROP TABLE assets_bar_unpartitioned")
+
+
+def unpartition_bar_table(apps, schema_editor):
+    """Recreate the bar table as a single unpartitioned table."""
+    if not can_partition(schema_editor):
+        return
+
+    cursor = schema_editor.connection.cursor()
+    cursor.execute("ALTER TABLE assets_bar RENAME TO assets_bar_partitioned")
+    cursor.execute(
+        """
+        CREATE TABLE assets_bar (
+            LIKE assets_bar_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+        )
+        """
+    )
+    cursor.execute("ALTER SEQUENCE assets_bar_id_seq OWNED BY assets_bar.id")
+    cursor.execute("ALTER TABLE assets_bar ADD PRIMARY KEY (id)")
+    cursor.execute("ALTER TABLE assets_bar ADD UNIQUE (asset_id, timeframe, t)")
+    cursor.execute(
+        """
+        ALTER TABLE assets_bar ADD FOREIGN KEY (asset_id)
+        REFERENCES assets_asset (id) DEFERRABLE INITIALLY DEFERRED
+        """
+    )
+    cursor.execute("CREATE INDEX ON assets_bar (asset_id)")
+    cursor.execute("INSERT INTO assets_bar SELECT * FROM assets_bar_partitioned")
+    cursor.execute("DROP TABLE assets_bar_partitioned")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0005_bar_timeframe"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_bar_table, unpartition_bar_table),
+    ]
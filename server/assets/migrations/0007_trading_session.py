@@ -0,0 +1,97 @@
+# Generated by Django 3.1.2 on 2026-10-19 11:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0006_partition_bar"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TradingSession",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True, verbose_name="date")),
+                ("open", models.DateTimeField(verbose_name="open")),
+                ("close", models.DateTimeField(verbose_name="close")),
+                (
+                    "early_close",
+                    models.BooleanField(default=False, verbose_name="early close"),
+                ),
+            ],
+            options={
+                "verbose_name": "trading session",
+                "verbose_name_plural": "trading sessions",
+                "ordering": ("date",),
+            },
+        ),
+        migrations.CreateModel(
+            name="BarCoverage",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "timeframe",
+                    models.CharField(
+                        choices=[
+                            ("1Min", "1 minute"),
+                            ("5Min", "5 minute"),
+                            ("15Min", "15 minute"),
+                            ("1H", "1 hour"),
+                            ("1D", "1 day"),
+                        ],
+                        default="15Min",
+                        max_length=56,
+                        verbose_name="timeframe",
+                    ),
+                ),
+                ("bars", models.PositiveIntegerField(default=0, verbose_name="bars")),
+                (
+                    "complete",
+                    models.BooleanField(default=False, verbose_name="complete"),
+                ),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bar_coverage",
+                        to="assets.asset",
+                        verbose_name="asset",
+                    ),
+                ),
+                (
+                    "session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bar_coverage",
+                        to="assets.tradingsession",
+                        verbose_name="session",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "bar coverage",
+                "verbose_name_plural": "bar coverage",
+                "unique_together": {("asset", "timeframe", "session")},
+            },
+        ),
+    ]
@@ -1,3 +1,5 @@
+import math
+
 from django.contrib.postgres.fields import CICharField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -105,12 +107,39 @@ class Asset(models.Model):
 class Bar(models.Model):
     """Asset bar data for a tradeable asset."""
 
+    MIN_1 = "1Min"
+    MIN_5 = "5Min"
+    MIN_15 = "15Min"
+    HOUR_1 = "1H"
+    DAY_1 = "1D"
+    TIMEFRAME_CHOICES = [
+        (MIN_1, _("1 minute")),
+        (MIN_5, _("5 minute")),
+        (MIN_15, _("15 minute")),
+        (HOUR_1, _("1 hour")),
+        (DAY_1, _("1 day")),
+    ]
+    # Length of a bar of each timeframe in seconds
+    TIMEFRAME_SECONDS = {
+        MIN_1: 60,
+        MIN_5: 5 * 60,
+        MIN_15: 15 * 60,
+        HOUR_1: 60 * 60,
+        DAY_1: 24 * 60 * 60,
+    }
+
     asset = models.ForeignKey(
         Asset,
         verbose_name=_("asset"),
         related_name="quotes",
         on_delete=models.CASCADE,
     )
+    timeframe = models.CharField(
+        verbose_name=_("timeframe"),
+        choices=TIMEFRAME_CHOICES,
+        max_length=56,
+        default=MIN_15,
+    )
     t = models.PositiveIntegerField(
         verbose_name=_("time"),
         help_text=_("the beginning time of this bar as a Unix epoch in seconds"),
@@ -142,9 +171,82 @@ class Bar(models.Model):
 
     class Meta:
         ordering = ("-t",)
-        unique_together = ("asset_id", "t")
+        unique_together = ("asset_id", "timeframe", "t")
         verbose_name = _("bar")
         verbose_name_plural = _("bars")
 
     def __str__(self):
-        return f"{self.asset.symbol} Bar - {self.t}"
+        return f"{self.asset.symbol} {self.timeframe} Bar - {self.t}"
+
+
+class TradingSession(models.Model):
+    """A regular trading session of the market, from Alpaca's calendar."""
+
+    # Close of a full regular session in the market's timezone
+    REGULAR_CLOSE = "16:00"
+
+    date = models.DateField(verbose_name=_("date"), unique=True)
+    open = models.DateTimeField(verbose_name=_("open"))
+    close = models.DateTimeField(verbose_name=_("close"))
+    early_close = models.BooleanField(verbose_name=_("early close"), default=False)
+
+    class Meta:
+        ordering = ("date",)
+        verbose_name = _("trading session")
+        verbose_name_plural = _("trading sessions")
+
+    def __str__(self):
+        return f"{self.date}"
+
+    def expected_bars(self, timeframe):
+        """Return the number of bars of a timeframe in the session."""
+        if timeframe == Bar.DAY_1:
+            return 1
+        duration = (self.close - self.open).total_seconds()
+        return math.ceil(duration / Bar.TIMEFRAME_SECONDS[timeframe])
+
+    def elapsed_bars(self, timeframe, now):
+        """Return the number of bars of a timeframe which have begun by a time."""
+        if now >= self.close:
+            return self.expected_bars(timeframe)
+        if now <= self.open:
+            return 0
+        if timeframe == Bar.DAY_1:
+            return 1
+        duration = (now - self.open).total_seconds()
+        return math.ceil(duration / Bar.TIMEFRAME_SECONDS[timeframe])
+
+
+class BarCoverage(models.Model):
+    """The bars of an asset and timeframe loaded for a trading session."""
+
+    asset = models.ForeignKey(
+        Asset,
+        verbose_name=_("asset"),
+        related_name="bar_coverage",
+        on_delete=models.CASCADE,
+    )
+    timeframe = models.CharField(
+        verbose_name=_("timeframe"),
+        choices=Bar.TIMEFRAME_CHOICES,
+        max_length=56,
+        default=Bar.MIN_15,
+    )
+    session = models.ForeignKey(
+        TradingSession,
+        verbose_name=_("session"),
+        related_name="bar_coverage",
+        on_delete=models.CASCADE,
+    )
+    bars = models.PositiveIntegerField(verbose_name=_("bars"), default=0)
+    # True once every bar of the session is loaded, or the bars of a closed
+    # session have been fetched from Alpaca (which omits periods without trades)
+    complete = models.BooleanField(verbose_name=_("complete"), default=False)
+
+    class Meta:
+        unique_together = ("asset", "timeframe", "session")
+        verbose_name = _("bar coverage")
+        verbose_name_plural = _("bar coverage")
+
+    def __str__(self):
+        return f"{self.asset.symbol} {self.timeframe} {self.session}: {self.bars}"
@@ -0,0 +1,158 @@
+import glob
+import logging
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .arrays import BAR_COLUMNS, BAR_DTYPE, BarArrays, bar_arrays
+from .models import Asset, Bar
+
+logger = logging.getLogger(__name__)
+
+BAR_SCHEMA = pa.schema(
+    [(name, pa.from_numpy_dtype(BAR_DTYPE[name])) for name in BAR_COLUMNS]
+)
+PARTITION_FILENAME = "bars.parquet"
+
+
+def partition_path(root, symbol, timeframe, month):
+    """
+    Return the file path of a bar partition.
+
+    Partitions are laid out hive style, one file per asset, timeframe and month
+    eg. ``<root>/symbol=TSLA/timeframe=15Min/month=2021-03/bars.parquet``.
+    """
+    return os.path.join(
+        root,
+        f"symbol={symbol}",
+        f"timeframe={timeframe}",
+        f"month={month}",
+        PARTITION_FILENAME,
+    )
+
+
+def export_bars(root, symbols=None, start=None, end=None, compression="zstd"):
+    """
+    Export bar data to compressed Parquet files partitioned by asset,
+    timeframe and month.
+
+    Existing partitions are merged with the exported bars, so exporting a
+    partial range does not discard previously exported data.
+
+    :param root(str): directory to write partitions to
+    :param symbols(list): symbols to export, defaults to every asset with bars
+    :param start(int): export bars at or after this Unix epoch
+    :param end(int): export bars before this Unix epoch
+    :param compression(str): Parquet compression codec
+    :return(int): number of bars exported
+    """
+    if symbols:
+        assets = Asset.objects.filter(symbol__in=symbols)
+    else:
+        assets = Asset.objects.filter(quotes__isnull=False).distinct()
+
+    exported = 0
+    for asset in assets:
+        bars = Bar.objects.filter(asset=asset)
+        if start is not None:
+            bars = bars.filter(t__gte=start)
+        if end is not None:
+            bars = bars.filter(t__lt=end)
+
+        timeframes = bars.order_by().values_list("timeframe", flat=True).distinct()
+        for timeframe in list(timeframes):
+            arrays = bar_arrays(bars.filter(timeframe=timeframe))
+            exported += _export_arrays(
+                root, asset.symbol, timeframe, arrays, compression
+            )
+
+    logger.info(f"Bars exported to parquet: {exported}")
+    return exported
+
+
+def _export_arrays(root, symbol, timeframe, arrays, compression):
+    """Write bar columns to one partition per month."""
+    months = arrays.t.astype("datetime64[s]").astype("datetime64[M]")
+    boundaries = np.flatnonzero(months[1:] != months[:-1]) + 1
+    for chunk in np.split(np.arange(len(arrays.t)), boundaries):
+        month = str(months[chunk[0]])
+        table = pa.Table.from_arrays(
+            [pa.array(column[chunk]) for column in arrays], schema=BAR_SCHEMA
+        )
+        _write_partition(
+            partition_path(root, symbol, timeframe, month), table, compression
+        )
+    return len(arrays.t)
+
+
+def _write_partition(path, table, compression):
+    """Write a partition, merging with and replacing any overlapping bars."""
+    if os.path.exists(path):
+        existing = pq.read_table(path, schema=BAR_SCHEMA)
+        new_t = table.column("t").to_numpy()
+        keep = ~np.isin(existing.column("t").to_numpy(), new_t)
+        table = pa.concat_tables([existing.filter(pa.array(keep)), table])
+        order = np.argsort(table.column("t").to_numpy(), kind="stable")
+        table = table.take(pa.array(order))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, path, compression=compression)
+
+
+def read_partition(path):
+    """Read a bar partition as typed NumPy columns."""
+    table = pq.read_table(path, schema=BAR_SCHEMA)
+    return BarArrays(
+        *(table.column(name).to_numpy().astype(BAR_DTYPE[name]) for name in BAR_COLUMNS)
+    )
+
+
+def import_bars(root, symbols=None, batch_size=5000):
+    """
+    Bulk load bar data from Parquet partitions written by ``export_bars``.
+
+    Bars which already exist are skipped.
+
+    :param root(str): directory to read partitions from
+    :param symbols(list): symbols to import, defaults to every partition
+    :param batch_size(int): number of bars inserted per query
+    :return(int): number of bars read from partitions
+    """
+    paths = sorted(glob.glob(partition_path(root, "*", "*", "*")))
+    partitions = {}
+    for path in paths:
+        keys = dict(
+            part.split("=", 1)
+            for part in os.path.relpath(path, root).split(os.sep)
+            if "=" in part
+        )
+        if symbols and keys["symbol"] not in symbols:
+            continue
+        partitions.setdefault(keys["symbol"], []).append((keys["timeframe"], path))
+
+    asset_ids = dict(
+        Asset.objects.filter(symbol__in=list(partitions)).values_list("symbol", "id")
+    )
+
+    imported = 0
+    for symbol, symbol_paths in partitions.items():
+        asset_id = asset_ids.get(symbol)
+        if asset_id is None:
+            logger.warning(f"Unknown asset, unable to import bars: {symbol}")
+            continue
+
+        for timeframe, path in symbol_paths:
+            arrays = read_partition(path)
+            objs = [
+                Bar(
+                    asset_id=asset_id, timeframe=timeframe, t=t, o=o, h=h, l=l, c=c, v=v
+                )
+                for t, o, h, l, c, v in zip(*(column.tolist() for column in arrays))
+            ]
+            Bar.objects.bulk_create(objs, batch_size=batch_size, ignore_conflicts=True)
+            imported += len(objs)
+
+    logger.info(f"Bars imported from parquet: {imported}")
+    return imported
@@ -0,0 +1,175 @@
+import logging
+import re
+from datetime import date, datetime
+
+import pytz
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Bar, BarCoverage
+from .parquet import export_bars
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION = f"{Bar._meta.db_table}_default"
+PARTITION_PATTERN = re.compile(rf"^{Bar._meta.db_table}_p(\d{{4}})_(\d{{2}})$")
+
+
+def is_partitioned():
+    """Return true if the bar table is range partitioned by time."""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE relname = %s",
+            [Bar._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def add_months(month, months):
+    """Return the first day of the month a number of months from a month."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_epochs(month):
+    """Return the [start, end) Unix epoch range of a month."""
+    start = datetime(month.year, month.month, 1, tzinfo=pytz.utc)
+    end = datetime.combine(add_months(month, 1), datetime.min.time(), pytz.utc)
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def partition_name(month):
+    """Return the table name of the partition for a month."""
+    return f"{Bar._meta.db_table}_p{month.year:04d}_{month.month:02d}"
+
+
+def list_partitions():
+    """Return the months of existing monthly partitions, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+            JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+            WHERE parent.relname = %s
+            """,
+            [Bar._meta.db_table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    months = []
+    for name in names:
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def create_partition(month):
+    """
+    Create the partition for a month.
+
+    Bars for the month which were stored in the default partition are moved
+    into the new partition.
+    """
+    table = Bar._meta.db_table
+    name = partition_name(month)
+    start, end = month_epochs(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TEMPORARY TABLE {name}_moved (LIKE {table})")
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE t >= %s AND t < %s
+                RETURNING *
+            )
+            INSERT INTO {name}_moved SELECT * FROM moved
+            """,
+            [start, end],
+        )
+        cursor.execute(
+            f"CREATE TABLE {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ({start}) TO ({end})"
+        )
+        cursor.execute(f"INSERT INTO {table} SELECT * FROM {name}_moved")
+        cursor.execute(f"DROP TABLE {name}_moved")
+    logger.info(f"Created bar partition: {name}")
+
+
+def create_partitions(months_ahead=None, today=None):
+    """
+    Create partitions for upcoming months, and for any month with bars held in
+    the default partition (eg. bars imported from before partitioning).
+
+    :param months_ahead(int): number of future months to create partitions for
+    :param today(date): date to create partitions from, defaults to today
+    :return(list): months partitions were created for
+    """
+    if not is_partitioned():
+        return []
+
+    if months_ahead is None:
+        months_ahead = settings.BAR_PARTITION_MONTHS_AHEAD
+    this_month = (today or date.today()).replace(day=1)
+    months = {add_months(this_month, i) for i in range(months_ahead + 1)}
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT DISTINCT date_trunc('month', to_timestamp(t) AT TIME ZONE 'UTC')
+            FROM {DEFAULT_PARTITION}
+            """
+        )
+        months.update(row[0].date() for row in cursor.fetchall())
+
+    created = sorted(months - set(list_partitions()))
+    for month in created:
+        create_partition(month)
+    return created
+
+
+def drop_partitions(retention_months=None, archive=None, today=None):
+    """
+    Drop monthly partitions older than the retention period.
+
+    Dropping a partition is a cheap metadata operation, unlike deleting the
+    rows it contains. Partitions can optionally be archived to Parquet files
+    before being dropped.
+
+    :param retention_months(int): number of months of bars to keep
+    :param archive(bool): export partitions to Parquet before dropping them
+    :param today(date): date the retention period is relative to
+    :return(list): months partitions were dropped for
+    """
+    if retention_months is None:
+        retention_months = settings.BAR_RETENTION_MONTHS
+    if archive is None:
+        archive = settings.BAR_RETENTION_ARCHIVE
+    if retention_months is None or not is_partitioned():
+        return []
+
+    this_month = (today or date.today()).replace(day=1)
+    cutoff = add_months(this_month, -retention_months)
+    expired = [month for month in list_partitions() if month < cutoff]
+
+    table = Bar._meta.db_table
+    for month in expired:
+        name = partition_name(month)
+        if archive:
+            export_bars(settings.BAR_EXPORT_DIR, None, *month_epochs(month))
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Tables with pending deferred foreign key checks can't be dropped
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+            cursor.execute(f"DROP TABLE {name}")
+        start, end = month_epochs(month)
+        BarCoverage.objects.filter(
+            session__open__gte=datetime.fromtimestamp(start, pytz.utc),
+            session__open__lt=datetime.fromtimestamp(end, pytz.utc),
+        ).delete()
+        logger.info(f"Dropped bar partition: {name}")
+    return expired
@@ -1,11 +1,25 @@
 import logging
+from datetime import date, datetime, timedelta
 
+import pytz
 from alpaca_trade_api.entity import Asset as AlpacaAsset
 from config import celery_app
 from core.alpaca import TradeApiRest
+from django.conf import settings
 from django.db.utils import IntegrityError
 
-from .models import Asset, AssetClass, Exchange
+from .cache import BarCache
+from .calendar import (
+    missing_sessions,
+    session_bounds,
+    session_ranges,
+    update_calendar,
+    update_coverage,
+)
+from .compaction import compact_bars
+from .models import Asset, AssetClass, Bar, Exchange
+from .parquet import export_bars, import_bars
+from .partitions import create_partitions, drop_partitions
 from .serializers import AssetSerializer, BarSerializer
 
 logger = logging.getLogger(__name__)
@@ -119,6 +133,7 @@ def update_bars(
         for bar in assets_bars[asset_symbol]:
             bar = bar.__dict__["_raw"]
             bar["asset"] = asset_symbol
+            bar["timeframe"] = timeframe
             serializer = BarSerializer(data=bar)
             if serializer.is_valid():
                 try:
@@ -128,3 +143,141 @@ def update_bars(
                     pass
 
     return assets_bars
+
+
+def load_sessions(asset, timeframe, sessions):
+    """
+    Ensure the bars of an asset are loaded for trading sessions.
+
+    Sessions the bar coverage index records as complete are skipped, and only
+    runs of missing sessions are fetched from Alpaca.
+
+    :param asset(Asset): asset
+    :param timeframe(str): bar timeframe eg. 15Min
+    :param sessions(list): consecutive sessions, oldest first
+    :return(list): sessions which are still incomplete
+    """
+    missing = missing_sessions(asset, timeframe, sessions)
+    if missing:
+        # Bars may have been stored since their coverage was last recorded
+        missing = update_coverage(asset, timeframe, missing)
+    if not missing:
+        return []
+
+    for first, last, count in session_ranges(sessions, missing, timeframe):
+        start = session_bounds(first, timeframe)[0]
+        # The end of the range is inclusive
+        end = session_bounds(last, timeframe)[1] - 1
+        update_bars(
+            [asset.symbol],
+            timeframe,
+            limit=count,
+            start=datetime.fromtimestamp(start, pytz.utc).isoformat(),
+            end=datetime.fromtimestamp(end, pytz.utc).isoformat(),
+        )
+
+    return update_coverage(asset, timeframe, missing, fetched=True)
+
+
+@celery_app.task(ignore_result=True)
+def update_trading_calendar(past_days=None, future_days=None):
+    """
+    Refresh trading sessions from Alpaca's calendar.
+
+    :param past_days(int): days before today to refresh, defaults to
+    `TRADING_CALENDAR_PAST_DAYS`
+    :param future_days(int): days after today to refresh, defaults to
+    `TRADING_CALENDAR_FUTURE_DAYS`
+    """
+    if past_days is None:
+        past_days = settings.TRADING_CALENDAR_PAST_DAYS
+    if future_days is None:
+        future_days = settings.TRADING_CALENDAR_FUTURE_DAYS
+    today = date.today()
+    updated = update_calendar(
+        today - timedelta(days=past_days), today + timedelta(days=future_days)
+    )
+    logger.info(f"Trading sessions updated: {updated}")
+    return updated
+
+
+@celery_app.task(ignore_result=True)
+def export_bars_to_parquet(symbols=None, start=None, end=None, path=None):
+    """
+    Export bar data to Parquet files partitioned by asset and month.
+
+    :param symbols(list): symbols to export, defaults to every asset with bars
+    :param start(int): export bars at or after this Unix epoch
+    :param end(int): export bars before this Unix epoch
+    :param path(str): directory to export to, defaults to `BAR_EXPORT_DIR`
+    """
+    return export_bars(path or settings.BAR_EXPORT_DIR, symbols, start, end)
+
+
+@celery_app.task(ignore_result=True)
+def import_bars_from_parquet(symbols=None, path=None):
+    """
+    Bulk load bar data from Parquet files written by `export_bars_to_parquet`.
+
+    :param symbols(list): symbols to import, defaults to every partition
+    :param path(str): directory to import from, defaults to `BAR_EXPORT_DIR`
+    """
+    return import_bars(path or settings.BAR_EXPORT_DIR, symbols)
+
+
+@celery_app.task(ignore_result=True)
+def sync_bar_cache(symbols=None, timeframe=None):
+    """
+    Incrementally sync the local bar cache from the database.
+
+    Every symbol and timeframe already held in the cache is synced, along with
+    any additional symbols given.
+
+    :param symbols(list): additional symbols to add to the cache
+    :param timeframe(str): timeframe of additional symbols, defaults to 15Min
+    """
+    cache = BarCache()
+    pairs = set(cache.cached())
+    for symbol in symbols or []:
+        pairs.add((symbol, timeframe or Bar.MIN_15))
+
+    assets = Asset.objects.in_bulk([symbol for symbol, _ in pairs], field_name="symbol")
+    synced = 0
+    for symbol, pair_timeframe in sorted(pairs):
+        asset = assets.get(symbol)
+        if asset is None:
+            logger.warning(f"Unknown asset, unable to sync bar cache: {symbol}")
+            continue
+        synced += cache.sync(asset, pair_timeframe)
+
+    logger.info(f"Bars synced to cache: {synced}")
+    return synced
+
+
+@celery_app.task(ignore_result=True)
+def maintain_bar_partitions():
+    """
+    Create upcoming monthly bar partitions, and drop (optionally archiving)
+    partitions older than the `BAR_RETENTION_MONTHS` retention period.
+    """
+    created = create_partitions()
+    dropped = drop_partitions()
+    logger.info(
+        f"Bar partitions created: {len(created)}, bar partitions dropped: "
+        f"{len(dropped)}"
+    )
+
+
+@celery_app.task(ignore_result=True)
+def compact_intraday_bars():
+    """
+    Roll up intraday bars older than `BAR_COMPACTION_DAYS` into daily bars, and
+    delete them in batches.
+    """
+    report = compact_bars()
+    logger.info(
+        f"Daily bars rolled up: {report['rolled_up']}, intraday bars deleted: "
+        f"{report['deleted']}, estimated bytes reclaimed: "
+        f"{report['reclaimed_bytes']}"
+    )
+    return report
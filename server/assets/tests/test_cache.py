@@ -0,0 +1,75 @@
+import tempfile
+
+import numpy as np
+from assets.cache import BarCache
+from assets.models import Bar
+from assets.tasks import sync_bar_cache
+from assets.tests.factories import AssetFactory, BarFactory
+from django.test import TestCase, override_settings
+
+
+class BarCacheTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = BarCache(self.directory.name)
+        self.tsla = AssetFactory(symbol="TSLA")
+        for t in range(1000, 1010):
+            BarFactory(asset=self.tsla, t=t, c=t / 10, v=t)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_sync(self):
+        """Bars are written to the cache as typed columns."""
+        synced = self.cache.sync(self.tsla, Bar.MIN_15)
+        bars = self.cache.load("TSLA", Bar.MIN_15)
+
+        self.assertEqual(synced, 10)
+        self.assertIsInstance(bars.t, np.memmap)
+        self.assertEqual(bars.t.dtype, np.int64)
+        self.assertEqual(bars.c.dtype, np.float64)
+        np.testing.assert_array_equal(bars.t, np.arange(1000, 1010))
+        np.testing.assert_allclose(bars.c, np.arange(1000, 1010) / 10)
+        self.assertEqual(self.cache.cached(), [("TSLA", Bar.MIN_15)])
+
+    def test_sync_incremental(self):
+        """Only bars after the watermark are appended to the cache."""
+        self.cache.sync(self.tsla, Bar.MIN_15)
+        BarFactory(asset=self.tsla, t=1010)
+
+        synced = self.cache.sync(self.tsla, Bar.MIN_15)
+
+        self.assertEqual(synced, 1)
+        self.assertEqual(self.cache.sync(self.tsla, Bar.MIN_15), 0)
+        bars = self.cache.load("TSLA", Bar.MIN_15)
+        np.testing.assert_array_equal(bars.t, np.arange(1000, 1011))
+
+    def test_sync_backfill(self):
+        """Bars loaded behind the watermark rebuild the cache."""
+        self.cache.sync(self.tsla, Bar.MIN_15)
+        BarFactory(asset=self.tsla, t=999)
+
+        synced = self.cache.sync(self.tsla, Bar.MIN_15)
+
+        self.assertEqual(synced, 11)
+        bars = self.cache.load("TSLA", Bar.MIN_15)
+        np.testing.assert_array_equal(bars.t, np.arange(999, 1010))
+
+    def test_load_range(self):
+        """Cached bars can be sliced by time."""
+        self.cache.sync(self.tsla, Bar.MIN_15)
+
+        bars = self.cache.load("TSLA", Bar.MIN_15, start=1002, end=1005)
+
+        np.testing.assert_array_equal(bars.t, [1002, 1003, 1004])
+        self.assertEqual(len(self.cache.load("AAPL", Bar.MIN_15).t), 0)
+
+    def test_sync_bar_cache_task(self):
+        """Cached and requested symbols are synced."""
+        with override_settings(BAR_CACHE_DIR=self.directory.name):
+            synced = sync_bar_cache(symbols=["TSLA"])
+            BarFactory(asset=self.tsla, t=1010)
+            synced_again = sync_bar_cache()
+
+        self.assertEqual(synced, 10)
+        self.assertEqual(synced_again, 1)
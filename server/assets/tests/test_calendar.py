@@ -0,0 +1,146 @@
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+import pytz
+from assets.calendar import (
+    latest_sessions,
+    missing_sessions,
+    session_ranges,
+    update_calendar,
+    update_coverage,
+)
+from assets.models import Bar, BarCoverage, TradingSession
+from assets.tasks import load_sessions
+from django.test import TestCase
+
+from .factories import AssetFactory, BarFactory
+
+CALENDAR = [
+    {"date": "2021-03-01", "open": "09:30", "close": "16:00"},
+    {"date": "2021-03-02", "open": "09:30", "close": "16:00"},
+    {"date": "2021-03-03", "open": "09:30", "close": "13:00"},
+    {"date": "2021-03-05", "open": "09:30", "close": "16:00"},
+]
+# Market open of 2021-03-01 (EST) as a Unix epoch
+OPEN = int(datetime(2021, 3, 1, 14, 30, tzinfo=pytz.utc).timestamp())
+NOW = datetime(2021, 3, 8, tzinfo=pytz.utc)
+
+
+def create_session_bars(asset, session, count=None):
+    start = int(session.open.timestamp())
+    for index in range(session.expected_bars(Bar.MIN_15) if count is None else count):
+        BarFactory(asset=asset, timeframe=Bar.MIN_15, t=start + index * 900)
+
+
+class CalendarTests(TestCase):
+    def setUp(self):
+        update_calendar(date(2021, 3, 1), date(2021, 3, 5), CALENDAR)
+        self.sessions = list(TradingSession.objects.all())
+        self.tsla = AssetFactory(symbol="TSLA")
+
+    def test_update_calendar(self):
+        """Sessions are stored in UTC, and early closes are flagged."""
+        early_close = TradingSession.objects.get(date=date(2021, 3, 3))
+
+        self.assertEqual(len(self.sessions), 4)
+        self.assertEqual(int(self.sessions[0].open.timestamp()), OPEN)
+        self.assertTrue(early_close.early_close)
+        self.assertEqual(early_close.expected_bars(Bar.MIN_15), 14)
+        self.assertEqual(self.sessions[0].expected_bars(Bar.MIN_15), 26)
+        self.assertEqual(self.sessions[0].expected_bars(Bar.DAY_1), 1)
+
+    def test_update_calendar_changes(self):
+        """Changed sessions are updated, and new holidays removed."""
+        calendar = [
+            {"date": "2021-03-01", "open": "09:30", "close": "13:00"},
+            {"date": "2021-03-02", "open": "09:30", "close": "16:00"},
+        ]
+
+        updated = update_calendar(date(2021, 3, 1), date(2021, 3, 3), calendar)
+
+        self.assertEqual(updated, 1)
+        self.assertTrue(TradingSession.objects.get(date=date(2021, 3, 1)).early_close)
+        self.assertFalse(TradingSession.objects.filter(date=date(2021, 3, 3)).exists())
+        self.assertTrue(TradingSession.objects.filter(date=date(2021, 3, 5)).exists())
+
+    def test_latest_sessions(self):
+        """The latest closed sessions holding enough bars are returned."""
+        sessions = latest_sessions(30, Bar.MIN_15, now=NOW)
+
+        self.assertEqual([session.date.day for session in sessions], [3, 5])
+        self.assertEqual(len(latest_sessions(4, Bar.DAY_1, now=NOW)), 4)
+        self.assertIsNone(latest_sessions(5, Bar.DAY_1, now=NOW))
+        self.assertIsNone(latest_sessions(1, Bar.MIN_15, now=self.sessions[0].open))
+
+    def test_latest_sessions_in_progress(self):
+        """The session in progress holds the bars begun so far."""
+        now = self.sessions[3].open + timedelta(hours=2)
+
+        self.assertEqual(self.sessions[3].elapsed_bars(Bar.MIN_15, now), 8)
+        self.assertEqual(latest_sessions(8, Bar.MIN_15, now=now), self.sessions[3:])
+        self.assertEqual(latest_sessions(9, Bar.MIN_15, now=now), self.sessions[2:])
+        self.assertEqual(latest_sessions(4, Bar.DAY_1, now=now), self.sessions)
+
+    def test_update_coverage(self):
+        """Stored bars are counted per session, and missing sessions found."""
+        create_session_bars(self.tsla, self.sessions[0])
+        create_session_bars(self.tsla, self.sessions[1], count=10)
+
+        incomplete = update_coverage(self.tsla, Bar.MIN_15, self.sessions[:2])
+        coverage = BarCoverage.objects.get(session=self.sessions[1])
+
+        self.assertEqual(incomplete, [self.sessions[1]])
+        self.assertEqual(coverage.bars, 10)
+        self.assertFalse(coverage.complete)
+        self.assertEqual(
+            missing_sessions(self.tsla, Bar.MIN_15, self.sessions), self.sessions[1:]
+        )
+
+    def test_update_coverage_fetched(self):
+        """Closed sessions with bars are complete once fetched."""
+        create_session_bars(self.tsla, self.sessions[0], count=20)
+
+        incomplete = update_coverage(
+            self.tsla, Bar.MIN_15, self.sessions[:2], fetched=True
+        )
+
+        self.assertEqual(incomplete, [self.sessions[1]])
+
+    def test_session_ranges(self):
+        """Runs of consecutive missing sessions are fetched together."""
+        missing = [self.sessions[0], self.sessions[1], self.sessions[3]]
+
+        ranges = session_ranges(self.sessions, missing, Bar.MIN_15)
+
+        self.assertEqual(
+            ranges,
+            [
+                (self.sessions[0], self.sessions[1], 52),
+                (self.sessions[3], self.sessions[3], 26),
+            ],
+        )
+
+    @patch("assets.tasks.update_bars")
+    def test_load_sessions(self, mock_update_bars):
+        """Only sessions missing bars are fetched."""
+        create_session_bars(self.tsla, self.sessions[0])
+        create_session_bars(self.tsla, self.sessions[2])
+        mock_update_bars.side_effect = lambda *args, **kwargs: create_session_bars(
+            self.tsla, self.sessions[1]
+        )
+
+        incomplete = load_sessions(self.tsla, Bar.MIN_15, self.sessions[:3])
+
+        self.assertEqual(incomplete, [])
+        mock_update_bars.assert_called_once_with(
+            ["TSLA"],
+            Bar.MIN_15,
+            limit=26,
+            start="2021-03-02T14:30:00+00:00",
+            end="2021-03-02T20:59:59+00:00",
+        )
+
+        mock_update_bars.reset_mock()
+        load_sessions(self.tsla, Bar.MIN_15, self.sessions[:3])
+
+        mock_update_bars.assert_not_called()
@@ -0,0 +1,97 @@
+from datetime import datetime
+
+import pytz
+from assets.compaction import compact_bars, compaction_cutoff
+from assets.models import Bar
+from assets.tests.factories import AssetFactory, BarFactory
+from django.test import TestCase
+
+NEW_YORK = pytz.timezone("America/New_York")
+
+
+def epoch(*args):
+    return int(NEW_YORK.localize(datetime(*args)).timestamp())
+
+
+class CompactionTests(TestCase):
+    def setUp(self):
+        self.tsla = AssetFactory(symbol="TSLA")
+        self.now = datetime(2021, 6, 1, tzinfo=pytz.utc)
+        # Two aged days of intraday bars, and one recent day
+        for day in (25, 26):
+            BarFactory(
+                asset=self.tsla,
+                t=epoch(2021, 2, day, 9, 30),
+                o=10,
+                h=12,
+                l=9,
+                c=11,
+                v=100,
+            )
+            BarFactory(
+                asset=self.tsla,
+                t=epoch(2021, 2, day, 9, 45),
+                o=11,
+                h=15,
+                l=10,
+                c=14,
+                v=200,
+            )
+            BarFactory(
+                asset=self.tsla,
+                t=epoch(2021, 2, day, 15, 45),
+                o=14,
+                h=14,
+                l=8,
+                c=13,
+                v=300,
+            )
+        BarFactory(asset=self.tsla, t=epoch(2021, 5, 28, 9, 30))
+
+    def test_compaction_cutoff(self):
+        """The cutoff is aligned to the start of a market day."""
+        self.assertEqual(
+            compaction_cutoff(days=90, now=self.now), epoch(2021, 3, 2, 0, 0)
+        )
+
+    def test_compact_bars(self):
+        """Aged intraday bars are rolled up into daily bars and deleted."""
+        report = compact_bars(days=90, batch_size=2, now=self.now)
+
+        self.assertEqual(report["rolled_up"], 2)
+        self.assertEqual(report["deleted"], 6)
+
+        daily_bar = Bar.objects.get(
+            asset=self.tsla, timeframe=Bar.DAY_1, t=epoch(2021, 2, 25, 0, 0)
+        )
+        self.assertEqual(daily_bar.o, 10)
+        self.assertEqual(daily_bar.h, 15)
+        self.assertEqual(daily_bar.l, 8)
+        self.assertEqual(daily_bar.c, 13)
+        self.assertEqual(daily_bar.v, 600)
+
+        # Recent intraday bars are kept
+        intraday_bars = Bar.objects.filter(asset=self.tsla, timeframe=Bar.MIN_15)
+        self.assertEqual(intraday_bars.count(), 1)
+
+    def test_compact_bars_keeps_daily_bars(self):
+        """Existing daily bars are not overwritten by rolled up bars."""
+        BarFactory(
+            asset=self.tsla,
+            timeframe=Bar.DAY_1,
+            t=epoch(2021, 2, 25, 0, 0),
+            o=1,
+            h=2,
+            l=1,
+            c=2,
+            v=5,
+        )
+
+        report = compact_bars(days=90, now=self.now)
+
+        self.assertEqual(report["rolled_up"], 1)
+        self.assertEqual(report["deleted"], 6)
+        daily_bar = Bar.objects.get(
+            asset=self.tsla, timeframe=Bar.DAY_1, t=epoch(2021, 2, 25, 0, 0)
+        )
+        self.assertEqual(daily_bar.v, 5)
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+
+from assets.models import Bar
+from assets.parquet import export_bars, import_bars, partition_path, read_partition
+from assets.tests.factories import AssetFactory
+from django.test import TestCase
+
+
+class ParquetTests(TestCase):
+    def setUp(self):
+        self.tsla = AssetFactory(symbol="TSLA")
+        with open("assets/tests/sample_tsla_bars.json") as f:
+            self.sample_bars = json.load(f)
+        Bar.objects.bulk_create(
+            [
+                Bar(
+                    asset=self.tsla,
+                    t=bar["t"],
+                    o=bar["o"],
+                    h=bar["h"],
+                    l=bar["l"],
+                    c=bar["c"],
+                    v=bar["v"],
+                )
+                for bar in self.sample_bars
+            ],
+            batch_size=1000,
+        )
+
+    def test_export_bars(self):
+        """Bars are exported to Parquet partitions per asset, timeframe and month."""
+        with tempfile.TemporaryDirectory() as root:
+            count = export_bars(root, symbols=["TSLA"])
+
+            self.assertEqual(count, len(self.sample_bars))
+            path = partition_path(root, "TSLA", "15Min", "2021-02")
+            self.assertTrue(os.path.exists(path))
+
+            bars = read_partition(path)
+            self.assertEqual(bars.t.dtype.name, "int64")
+            self.assertEqual(bars.c.dtype.name, "float64")
+            self.assertEqual(bars.t[0], 1614229200)
+            self.assertEqual(bars.c[0], 121)
+
+    def test_export_bars_merges_partitions(self):
+        """Exporting a partial range does not discard exported bars."""
+        with tempfile.TemporaryDirectory() as root:
+            export_bars(root, symbols=["TSLA"])
+            export_bars(root, symbols=["TSLA"], start=1614315600, end=1614315601)
+
+            bars = read_partition(partition_path(root, "TSLA", "15Min", "2021-02"))
+            self.assertEqual(bars.t[0], 1614229200)
+            self.assertEqual(len(set(bars.t)), len(bars.t))
+
+    def test_import_bars(self):
+        """Bars are bulk loaded from Parquet partitions."""
+        with tempfile.TemporaryDirectory() as root:
+            export_bars(root)
+            Bar.objects.all().delete()
+
+            count = import_bars(root, symbols=["TSLA"])
+
+            self.assertEqual(count, len(self.sample_bars))
+            self.assertEqual(
+                Bar.objects.filter(asset=self.tsla).count(), len(self.sample_bars)
+            )
+            bar = Bar.objects.get(asset=self.tsla, t=1614315600)
+            self.assertEqual(float(bar.c), 122.21)
+            self.assertEqual(float(bar.h), 128.321)
+
+    def test_import_duplicate_bars(self):
+        """Bars which already exist are not duplicated on import."""
+        with tempfile.TemporaryDirectory() as root:
+            export_bars(root)
+            import_bars(root)
+
+            self.assertEqual(
+                Bar.objects.filter(asset=self.tsla).count(), len(self.sample_bars)
+            )
@@ -0,0 +1,79 @@
+import os
+import tempfile
+from datetime import date
+from unittest import skipUnless
+
+from assets.models import Bar
+from assets.partitions import (
+    DEFAULT_PARTITION,
+    create_partitions,
+    drop_partitions,
+    is_partitioned,
+    list_partitions,
+    month_epochs,
+)
+from assets.tests.factories import AssetFactory, BarFactory
+from django.db import connection
+from django.test import TestCase, override_settings
+
+
+@skipUnless(is_partitioned(), "Bar table is not partitioned")
+class BarPartitionTests(TestCase):
+    def setUp(self):
+        self.tsla = AssetFactory(symbol="TSLA")
+
+    def default_partition_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {DEFAULT_PARTITION}")
+            return cursor.fetchone()[0]
+
+    def test_create_partitions(self):
+        """Partitions are created for upcoming months."""
+        created = create_partitions(months_ahead=2, today=date(2030, 11, 15))
+
+        self.assertEqual(
+            created, [date(2030, 11, 1), date(2030, 12, 1), date(2031, 1, 1)]
+        )
+        self.assertIn(date(2031, 1, 1), list_partitions())
+        self.assertEqual(
+            create_partitions(months_ahead=2, today=date(2030, 11, 15)), []
+        )
+
+    def test_create_partitions_from_default(self):
+        """Bars in the default partition are moved into a new partition."""
+        start, end = month_epochs(date(2000, 1, 1))
+        BarFactory(asset=self.tsla, t=start)
+        BarFactory(asset=self.tsla, t=end - 1)
+        self.assertEqual(self.default_partition_count(), 2)
+
+        created = create_partitions(months_ahead=0, today=date(2000, 1, 1))
+
+        self.assertEqual(created, [date(2000, 1, 1)])
+        self.assertEqual(self.default_partition_count(), 0)
+        self.assertEqual(Bar.objects.filter(asset=self.tsla).count(), 2)
+
+    def test_drop_partitions(self):
+        """Partitions older than the retention period are archived and dropped."""
+        start, _ = month_epochs(date(2000, 1, 1))
+        BarFactory(asset=self.tsla, t=start)
+        create_partitions(months_ahead=1, today=date(2000, 1, 1))
+
+        with tempfile.TemporaryDirectory() as root:
+            with override_settings(BAR_EXPORT_DIR=root):
+                dropped = drop_partitions(
+                    retention_months=1, archive=True, today=date(2000, 3, 1)
+                )
+
+            self.assertTrue(os.path.exists(os.path.join(root, "symbol=TSLA")))
+
+        self.assertEqual(dropped, [date(2000, 1, 1)])
+        self.assertNotIn(date(2000, 1, 1), list_partitions())
+        self.assertIn(date(2000, 2, 1), list_partitions())
+        self.assertEqual(Bar.objects.filter(asset=self.tsla).count(), 0)
+
+    def test_drop_partitions_without_retention(self):
+        """Partitions are kept if no retention period is set."""
+        create_partitions(months_ahead=0, today=date(2000, 1, 1))
+
+        with override_settings(BAR_RETENTION_MONTHS=None):
+            self.assertEqual(drop_partitions(today=date(2030, 1, 1)), [])
@@ -89,6 +89,7 @@ class BarView(viewsets.ModelViewSet):
         queryset = Bar.objects.visible(self.kwargs["asset_id"])
         start = self.request.query_params.get("start")
         end = self.request.query_params.get("end")
+        timeframe = self.request.query_params.get("timeframe")
 
         if (start and not end) or (not start and end):
             raise ValidationError("You must include both `start` and `end` params")
@@ -96,6 +97,9 @@ class BarView(viewsets.ModelViewSet):
         if start and end:
             queryset = queryset.filter(t__gte=start, t__lt=end)
 
+        if timeframe:
+            queryset = queryset.filter(timeframe=timeframe)
+
         return queryset
 
     def get_serializer_class(self):
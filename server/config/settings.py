@@ -222,6 +222,93 @@ CELERY_RESULT_SERIALIZER = "json"
 CELERY_TASK_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
 
+# Bar data settings
+
+# Directory used for Parquet exports/imports of bar data
+BAR_EXPORT_DIR = env("BAR_EXPORT_DIR", default=os.path.join(BASE_DIR, "data", "bars"))
+
+# Directory of the memory mapped bar cache used by backtests and analytics
+BAR_CACHE_DIR = env("BAR_CACHE_DIR", default=os.path.join(BASE_DIR, "data", "cache"))
+
+# Number of future monthly bar partitions to create ahead of time
+BAR_PARTITION_MONTHS_AHEAD = env.int("BAR_PARTITION_MONTHS_AHEAD", default=3)
+
+# Months of bar partitions to keep. Older partitions are dropped, and archived
+# to `BAR_EXPORT_DIR` first if `BAR_RETENTION_ARCHIVE` is true. Keep all bar data
+# if unset.
+BAR_RETENTION_MONTHS = env.int("BAR_RETENTION_MONTHS", default=None)
+BAR_RETENTION_ARCHIVE = env.bool("BAR_RETENTION_ARCHIVE", default=True)
+
+# Days of intraday bars to keep before they are rolled up into daily bars, and
+# the maximum number of intraday bars deleted per transaction when compacting
+BAR_COMPACTION_DAYS = env.int("BAR_COMPACTION_DAYS", default=90)
+BAR_COMPACTION_BATCH_SIZE = env.int("BAR_COMPACTION_BATCH_SIZE", default=10000)
+
+# Days of trading sessions before and after today refreshed from Alpaca's
+# calendar
+TRADING_CALENDAR_PAST_DAYS = env.int("TRADING_CALENDAR_PAST_DAYS", default=365)
+TRADING_CALENDAR_FUTURE_DAYS = env.int("TRADING_CALENDAR_FUTURE_DAYS", default=30)
+
+# Seconds after a bar closes that the strategy cycle for its timeframe runs,
+# allowing for Alpaca to aggregate the bar
+STRATEGY_CYCLE_OFFSET_SECONDS = env.int("STRATEGY_CYCLE_OFFSET_SECONDS", default=10)
+
+# Strategy optimisation settings
+
+# Number of processes used to run parameter sweeps, defaults to the CPU count
+SWEEP_WORKERS = env.int("SWEEP_WORKERS", default=None)
+
+# Maximum number of backtests of one symbol and timeframe run per worker task
+SWEEP_CHUNK_SIZE = env.int("SWEEP_CHUNK_SIZE", default=50)
+
+# Screener settings
+
+# Conditions screened across every active asset, matching assets whose latest
+# close crosses the moving average (`sma` or `ema`) of `window` bars
+SCREENER_CONDITIONS = env.json(
+    "SCREENER_CONDITIONS",
+    default=[
+        {"name": "sma_7d", "indicator": "sma", "window": 130, "timeframe": "15Min"},
+        {"name": "sma_14d", "indicator": "sma", "window": 260, "timeframe": "15Min"},
+    ],
+)
+
+# Order settings
+
+# Requests per minute allowed to the Alpaca api by each process, for each
+# account
+ALPACA_RATE_LIMIT = env.int("ALPACA_RATE_LIMIT", default=200)
+
+# Threads submitting the orders of a strategy cycle concurrently, and the
+# number of times a submission failing with a server or network error is
+# retried
+ORDER_SUBMISSION_WORKERS = env.int("ORDER_SUBMISSION_WORKERS", default=8)
+ORDER_SUBMISSION_RETRIES = env.int("ORDER_SUBMISSION_RETRIES", default=3)
+
+# Maximum number of trade updates from Alpaca's stream applied to orders in
+# one transaction, and milliseconds an update waits for others to batch with
+TRADE_UPDATE_BATCH_SIZE = env.int("TRADE_UPDATE_BATCH_SIZE", default=100)
+TRADE_UPDATE_INTERVAL_MS = env.int("TRADE_UPDATE_INTERVAL_MS", default=50)
+
+# Maximum dollar exposure of a user to a symbol, and to every symbol together,
+# which the orders of a strategy cycle are trimmed to. Unlimited if not set
+RISK_MAX_SYMBOL_EXPOSURE = env.float("RISK_MAX_SYMBOL_EXPOSURE", default=None)
+RISK_MAX_USER_EXPOSURE = env.float("RISK_MAX_USER_EXPOSURE", default=None)
+
+# Account settings
+
+# Fernet keys encrypting the Alpaca credentials of accounts. The first key
+# encrypts, and any of them decrypts, so keys can be rotated
+CREDENTIALS_ENCRYPTION_KEYS = env.list("CREDENTIALS_ENCRYPTION_KEYS", default=[])
+
+# Maximum number of accounts with an Alpaca client kept by each process
+ALPACA_CLIENT_POOL_SIZE = env.int("ALPACA_CLIENT_POOL_SIZE", default=256)
+
+# Timeframes of the portfolio history stored from Alpaca
+PORTFOLIO_HISTORY_TIMEFRAMES = env.list(
+    "PORTFOLIO_HISTORY_TIMEFRAMES", default=["1D", "15Min"]
+)
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.1/topics/i18n/
 
@@ -1,5 +1,9 @@
 from django.contrib import admin
 
-from .models import Strategy
+from .models import ScreenerMatch, Signal, Strategy, Sweep, SweepResult
 
 admin.site.register(Strategy)
+admin.site.register(Sweep)
+admin.site.register(SweepResult)
+admin.site.register(ScreenerMatch)
+admin.site.register(Signal)
@@ -8,13 +8,18 @@ logger = logging.getLogger(__name__)
 class TradeApiRest:
     """Base wrapper for TradeView REST requests."""
 
-    def __init__(self):
+    def __init__(self, key_id=None, secret_key=None, base_url=None):
+        """
+        :param key_id(str): api key id of an account
+        :param secret_key(str): api secret key of an account
+        :param base_url(str): api url of an account, paper or live
+        """
         try:
-            # Env variables set to initalise connection:
+            # Env variables set to initalise connection, unless given:
             #   * APCA_API_KEY_ID
             #   * APCA_API_SECRET_KEY
             #   * APCA_API_BASE_URL
-            self.api = tradeapi.REST()
+            self.api = tradeapi.REST(key_id, secret_key, base_url)
         except Exception as e:
             logger.error(f"Tradeview api connection failed: {e}")
             return
@@ -205,10 +210,10 @@ class TradeApiRest:
     def submit_order(
         self,
         symbol,
-        qty,
-        side,
-        type,
-        time_in_force,
+        qty=None,
+        side=None,
+        type=None,
+        time_in_force=None,
         limit_price=None,
         stop_price=None,
         client_order_id=None,
@@ -217,6 +222,8 @@ class TradeApiRest:
         stop_loss=None,
         trail_price=None,
         trail_percent=None,
+        extended_hours=None,
+        notional=None,
     ):
         """
         Submit an order.
@@ -225,7 +232,10 @@ class TradeApiRest:
 
         Params:
         :param symbol(str): symbol or asset ID to identify the asset to trade
-        :param qty(float): number of shares to trade
+        :param qty(float): number of shares to trade, or None for notional
+        orders
+        :param notional(float): dollar amount to trade, instead of a quantity.
+        Only works with type market and time_in_force day
         :param side(str): buy or sell
         :param type(str): market, limit, stop, stop_limit, or trailing_stop
         :param time_in_force(str):
@@ -264,18 +274,20 @@ class TradeApiRest:
         """
         return self.api.submit_order(
             symbol,
-            qty,
-            side,
-            type,
-            time_in_force,
-            limit_price,
-            stop_price,
-            client_order_id,
-            order_class,
-            take_profit,
-            stop_loss,
-            trail_price,
-            trail_percent,
+            qty=qty,
+            side=side,
+            type=type,
+            time_in_force=time_in_force,
+            limit_price=limit_price,
+            stop_price=stop_price,
+            client_order_id=client_order_id,
+            extended_hours=extended_hours,
+            order_class=order_class,
+            take_profit=take_profit,
+            stop_loss=stop_loss,
+            trail_price=trail_price,
+            trail_percent=trail_percent,
+            notional=notional,
         )
 
     def is_tradable(self, symbol):
@@ -299,6 +311,21 @@ class TradeApiRest:
         """Return true if the market is currently open."""
         return self.api.get_clock().__dict__["_raw"]["is_open"]
 
+    def get_calendar(self, start=None, end=None):
+        """
+        Get the market's trading sessions, including early closes. Holidays
+        are omitted.
+
+        Endpoint: GET /calendar
+
+        :param start(str): first date to return, in “YYYY-MM-DD” format
+        :param end(str): last date to return, in “YYYY-MM-DD” format
+        :response date(str): session date
+        :response open(str): open time in the market's timezone eg. 09:30
+        :response close(str): close time in the market's timezone eg. 16:00
+        """
+        return self.api.get_calendar(start, end)
+
     def cancel_orders(self, id):
         return self.api.cancel_order(id)
 
@@ -367,14 +394,25 @@ class TradeApiRest:
         """
         return self.api.get_last_quote(symbol)
 
+    def get_latest_trade(self, symbol):
+        """
+        Get the latest trade of a symbol.
+
+        Endpoint: GET /v2/stocks/{symbol}/trades/latest
+
+        :param symbol(str): symbol
+        :return(TradeV2): trade, with the trade price as `price`
+        """
+        return self.api.get_latest_trade(symbol)
+
     def is_account_blocked(self):
         """Return true if account if blocked from trading."""
-        account = self._account_info()
+        account = self.account_info()
         return account.trading_blocked
 
     def daily_balance(self):
         """Get change in equity from yesterday."""
-        account = self._account_info()
+        account = self.account_info()
         return float(account.equity) - float(account.last_equity)
 
     def open_orders(self):
@@ -0,0 +1,207 @@
+import logging
+from collections import defaultdict, namedtuple
+
+import numpy as np
+from assets.models import Bar
+from django.core.cache import cache
+from orders.models import Order
+
+from .metrics import (
+    TRADING_DAYS_PER_YEAR,
+    max_drawdown,
+    simple_returns,
+    sharpe_ratio,
+    sortino_ratio,
+    total_return,
+    win_rate,
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds the fills of a user or strategy are cached for between requests
+FILLS_CACHE_SECONDS = 24 * 60 * 60
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+Fill = namedtuple("Fill", ["t", "asset_id", "qty", "price"])
+
+Performance = namedtuple(
+    "Performance",
+    [
+        "t",
+        "equity",
+        "total_return",
+        "max_drawdown",
+        "sharpe_ratio",
+        "sortino_ratio",
+        "win_rate",
+        "trades",
+    ],
+)
+
+
+def filled_orders(user=None, strategy=None):
+    """Return the filled orders of a user or a strategy, oldest first."""
+    orders = Order.objects.filter(
+        filled_at__isnull=False, filled_qty__gt=0, filled_avg_price__isnull=False
+    )
+    if strategy is not None:
+        orders = orders.filter(strategy=strategy)
+    else:
+        orders = orders.filter(user=user)
+    return orders.order_by("filled_at", "pk")
+
+
+def to_fills(orders):
+    """Return the fills of orders, with signed quantities."""
+    return [
+        Fill(
+            filled_at.timestamp(),
+            str(asset_id),
+            float(qty) if side == Order.BUY else -float(qty),
+            float(price),
+        )
+        for filled_at, asset_id, side, qty, price in orders.values_list(
+            "filled_at", "asset_id", "side", "filled_qty", "filled_avg_price"
+        )
+    ]
+
+
+def load_fills(user=None, strategy=None):
+    """
+    Return the fills of a user or a strategy, oldest first.
+
+    Fills are cached, and only orders filled since the last fill cached are
+    read. If orders filled earlier have been stored since, eg. by an order
+    sync, the fills are read again.
+    """
+    if strategy is not None:
+        key = f"analytics:fills:strategy:{strategy.pk}"
+    else:
+        key = f"analytics:fills:user:{user.pk}"
+    orders = filled_orders(user, strategy)
+
+    cached = cache.get(key)
+    fills = None
+    if cached is not None:
+        new_orders = orders
+        if cached["cursor"] is not None:
+            new_orders = orders.filter(filled_at__gt=cached["cursor"])
+        new_fills = to_fills(new_orders)
+        if orders.count() == len(cached["fills"]) + len(new_fills):
+            fills = cached["fills"] + new_fills
+    if fills is None:
+        fills = to_fills(orders)
+
+    cursor = orders.values_list("filled_at", flat=True).last() if fills else None
+    cache.set(key, {"cursor": cursor, "fills": fills}, timeout=FILLS_CACHE_SECONDS)
+    return fills
+
+
+def forward_fill(values):
+    """Return a matrix with NaN values replaced by the last value above them."""
+    index = np.where(~np.isnan(values), np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    return values[index, np.arange(values.shape[1])]
+
+
+def equity_curve(fills):
+    """
+    Return the daily equity curve of fills, valued at daily bar closes.
+
+    Days are those with a daily bar of a traded asset, from the first fill,
+    or the days with fills if there are no daily bars. Assets are valued at
+    the fill price until they have a bar. The curve starts from the most
+    capital the fills had committed, so returns are of the capital used.
+
+    :param fills(list): fills, oldest first
+    :return(tuple): days (Unix epochs) and equity arrays
+    """
+    if not fills:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    asset_ids = sorted({fill.asset_id for fill in fills})
+    assets = {asset_id: index for index, asset_id in enumerate(asset_ids)}
+    t = np.array([fill.t for fill in fills])
+    asset = np.array([assets[fill.asset_id] for fill in fills])
+    qty = np.array([fill.qty for fill in fills])
+    price = np.array([fill.price for fill in fills])
+
+    first_day = int(t[0] // SECONDS_PER_DAY * SECONDS_PER_DAY)
+    bars = list(
+        Bar.objects.filter(
+            asset_id__in=asset_ids, timeframe=Bar.DAY_1, t__gte=first_day
+        ).values_list("t", "asset_id", "c")
+    )
+    if bars:
+        days = np.unique([bar_t for bar_t, _, _ in bars])
+    else:
+        days = np.unique(t // SECONDS_PER_DAY * SECONDS_PER_DAY).astype(np.int64)
+
+    # Each fill is on the last day starting before it
+    day = np.clip(np.searchsorted(days, t, side="right") - 1, 0, None)
+
+    closes = np.full((len(days), len(asset_ids)), np.nan)
+    closes[day, asset] = price
+    if bars:
+        bar_t, bar_asset, bar_close = zip(*bars)
+        closes[
+            np.searchsorted(days, bar_t), [assets[str(pk)] for pk in bar_asset]
+        ] = np.array(bar_close, dtype=np.float64)
+    closes = np.nan_to_num(forward_fill(closes))
+
+    positions = np.zeros_like(closes)
+    np.add.at(positions, (day, asset), qty)
+    positions = np.cumsum(positions, axis=0)
+    cash = np.cumsum(np.bincount(day, weights=-qty * price, minlength=len(days)))
+    values = positions * closes
+
+    capital = max(-cash.min(), np.abs(values).sum(axis=1).max(), 0)
+    return days, capital + cash + values.sum(axis=1)
+
+
+def trade_profits(fills):
+    """
+    Return the profit of each fill which closed a position, by average cost.
+    """
+    held = defaultdict(float)
+    cost = defaultdict(float)
+    profits = []
+    for fill in fills:
+        position = held[fill.asset_id]
+        if position and (position > 0) != (fill.qty > 0):
+            entry = cost[fill.asset_id] / position
+            closed = min(abs(fill.qty), abs(position))
+            profits.append(float((fill.price - entry) * closed * np.sign(position)))
+            if abs(fill.qty) > abs(position):
+                cost[fill.asset_id] = (position + fill.qty) * fill.price
+            else:
+                cost[fill.asset_id] = (position + fill.qty) * entry
+        else:
+            cost[fill.asset_id] += fill.qty * fill.price
+        held[fill.asset_id] = position + fill.qty
+    return profits
+
+
+def performance(user=None, strategy=None):
+    """
+    Return the performance of a user's or a strategy's stored fills.
+
+    :param user(User): user whose orders are analysed
+    :param strategy(Strategy): strategy whose orders are analysed, instead
+    :return(Performance): equity curve and metrics
+    """
+    fills = load_fills(user, strategy)
+    days, equity = equity_curve(fills)
+    returns = simple_returns(equity)
+    profits = trade_profits(fills)
+    return Performance(
+        t=days.tolist(),
+        equity=equity.tolist(),
+        total_return=total_return(equity),
+        max_drawdown=max_drawdown(equity),
+        sharpe_ratio=sharpe_ratio(returns, TRADING_DAYS_PER_YEAR),
+        sortino_ratio=sortino_ratio(returns, TRADING_DAYS_PER_YEAR),
+        win_rate=win_rate(profits),
+        trades=len(profits),
+    )
@@ -0,0 +1,302 @@
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+from assets.cache import BarCache
+from orders.models import Order
+
+from .indicators import Indicators
+from .metrics import (
+    TRADING_DAYS_PER_YEAR,
+    max_drawdown,
+    sharpe_ratio,
+    simple_returns,
+    sortino_ratio,
+    total_return,
+    win_rate,
+)
+from .models import Strategy
+from .strategies import get_strategy
+
+DEFAULT_INITIAL_CASH = 100000.0
+# Fraction of the fill price paid on each order
+DEFAULT_SLIPPAGE = 0.0005
+# Fraction of the order notional paid as fees on each order
+DEFAULT_FEE = 0.0
+
+SIGNAL = "signal"
+STOP_LOSS = "stop_loss"
+TAKE_PROFIT = "take_profit"
+
+BacktestResult = namedtuple("BacktestResult", ["t", "equity", "trades", "stats"])
+
+
+def exit_prices(
+    entry_price,
+    qty,
+    stop_loss_amount=None,
+    stop_loss_percentage=None,
+    take_profit_amount=None,
+    take_profit_percentage=None,
+):
+    """
+    Return the (stop loss, take profit) prices of a long position.
+
+    Amounts are the profit or loss of the whole position, percentages are
+    relative to the average entry price. Prices are None when not set.
+    """
+    stop_loss = take_profit = None
+    if stop_loss_percentage:
+        stop_loss = entry_price * (1 - float(stop_loss_percentage) / 100)
+    elif stop_loss_amount:
+        stop_loss = entry_price - float(stop_loss_amount) / qty
+    if take_profit_percentage:
+        take_profit = entry_price * (1 + float(take_profit_percentage) / 100)
+    elif take_profit_amount:
+        take_profit = entry_price + float(take_profit_amount) / qty
+    return stop_loss, take_profit
+
+
+def first_exit(bars, start, until, stop_loss, take_profit):
+    """
+    Return the first bar in a range reaching a stop loss or take profit price.
+
+    :return(tuple): index, price and reason of the exit, or None
+    """
+    hits = np.zeros(until - start, dtype=bool)
+    if stop_loss is not None:
+        hits |= bars.l[start:until] <= stop_loss
+    if take_profit is not None:
+        hits |= bars.h[start:until] >= take_profit
+    indices = np.flatnonzero(hits)
+    if not len(indices):
+        return None
+
+    index = start + indices[0]
+    # A bar reaching both prices is assumed to reach the stop loss first
+    if stop_loss is not None and bars.l[index] <= stop_loss:
+        return index, min(bars.o[index], stop_loss), STOP_LOSS
+    return index, max(bars.o[index], take_profit), TAKE_PROFIT
+
+
+class SimulatedPosition:
+    """The cash, long position and trades of a simulation, bar by bar."""
+
+    def __init__(self, bars, initial_cash, fee):
+        self.bars = bars
+        self.fee = fee
+        self.cash = float(initial_cash)
+        self.qty = 0.0
+        self.entry_price = 0.0
+        self.qty_deltas = np.zeros(len(bars.t))
+        self.cash_deltas = np.zeros(len(bars.t))
+        self.trades = []
+
+    def buy(self, index, qty, price, reason):
+        """Buy a quantity at a price on a bar."""
+        notional = qty * price
+        cost = notional * self.fee
+        self.entry_price = (self.entry_price * self.qty + notional) / (self.qty + qty)
+        self.qty += qty
+        self.cash -= notional + cost
+        self.qty_deltas[index] += qty
+        self.cash_deltas[index] -= notional + cost
+        self.record(index, Order.BUY, qty, price, cost, None, reason)
+
+    def sell(self, index, qty, price, reason):
+        """Sell a quantity at a price on a bar."""
+        notional = qty * price
+        cost = notional * self.fee
+        profit = (price - self.entry_price) * qty - cost
+        self.qty -= qty
+        self.cash += notional - cost
+        self.qty_deltas[index] -= qty
+        self.cash_deltas[index] += notional - cost
+        if self.qty <= 1e-9:
+            self.qty = self.entry_price = 0.0
+        self.record(index, Order.SELL, qty, price, cost, profit, reason)
+
+    def record(self, index, side, qty, price, cost, profit, reason):
+        """Record a trade."""
+        self.trades.append(
+            {
+                "t": int(self.bars.t[index]),
+                "side": side,
+                "qty": qty,
+                "price": price,
+                "fee": cost,
+                "profit": profit,
+                "reason": reason,
+            }
+        )
+
+    def exit(self, start, until, exits, slippage):
+        """
+        Exit the position at the first stop loss/take profit in a range of
+        bars.
+
+        :param exits(list): stop loss and take profit amounts and percentages
+        """
+        if not self.qty or start >= until:
+            return
+        stop_loss, take_profit = exit_prices(self.entry_price, self.qty, *exits)
+        hit = first_exit(self.bars, start, until, stop_loss, take_profit)
+        if hit is not None:
+            index, price, reason = hit
+            self.sell(index, self.qty, price * (1 - slippage), reason)
+
+    def equity(self, initial_cash):
+        """Return the equity curve, valued at bar closes."""
+        positions = np.cumsum(self.qty_deltas)
+        balances = float(initial_cash) + np.cumsum(self.cash_deltas)
+        return balances + positions * self.bars.c
+
+
+def simulate(
+    bars,
+    signals,
+    trade_value,
+    initial_cash=DEFAULT_INITIAL_CASH,
+    slippage=DEFAULT_SLIPPAGE,
+    fee=DEFAULT_FEE,
+    stop_loss_amount=None,
+    stop_loss_percentage=None,
+    take_profit_amount=None,
+    take_profit_percentage=None,
+):
+    """
+    Simulate long only trading of signals over bars.
+
+    Signals are filled at the open of the next bar. Buys spend the lesser of
+    ``trade_value`` and available cash, and sells the lesser of ``trade_value``
+    and the position value, as in the live strategy. Open positions are exited
+    in full when a stop loss or take profit price is reached.
+
+    :param bars(BarArrays): bar columns
+    :param signals(ndarray): buy (1) and sell (-1) signals for every bar
+    :return(tuple): equity curve and list of trades
+    """
+    trade_value = float(trade_value)
+    exits = [
+        stop_loss_amount,
+        stop_loss_percentage,
+        take_profit_amount,
+        take_profit_percentage,
+    ]
+    has_exits = any(exits)
+    position = SimulatedPosition(bars, initial_cash, fee)
+    check_from = 0
+
+    # Signals on the last bar can't be filled
+    signal_indices = np.flatnonzero(signals[:-1])
+    for index, signal in zip(signal_indices + 1, signals[signal_indices]):
+        if has_exits:
+            position.exit(check_from, index, exits, slippage)
+        if signal > 0:
+            price = bars.o[index] * (1 + slippage)
+            notional = min(trade_value, position.cash / (1 + fee))
+            if notional > 0:
+                position.buy(index, notional / price, price, SIGNAL)
+        elif position.qty:
+            price = bars.o[index] * (1 - slippage)
+            notional = min(trade_value, position.qty * price)
+            position.sell(index, min(position.qty, notional / price), price, SIGNAL)
+        check_from = index
+    if has_exits:
+        position.exit(check_from, len(bars.t), exits, slippage)
+
+    return position.equity(initial_cash), position.trades
+
+
+def slice_bars(bars, lower=None, upper=None):
+    """Return a slice of each bar column, without copying."""
+    return type(bars)(*(column[lower:upper] for column in bars))
+
+
+def backtest_stats(equity, trades, periods_per_year):
+    """Return summary statistics of an equity curve and its trades."""
+    returns = simple_returns(equity)
+    profits = [trade["profit"] for trade in trades if trade["profit"] is not None]
+    return {
+        "bars": len(equity),
+        "final_equity": float(equity[-1]) if len(equity) else None,
+        "total_return": total_return(equity),
+        "max_drawdown": max_drawdown(equity),
+        "sharpe_ratio": sharpe_ratio(returns, periods_per_year),
+        "sortino_ratio": sortino_ratio(returns, periods_per_year),
+        "trades": len(trades),
+        "win_rate": win_rate(profits),
+    }
+
+
+def run_backtest(
+    bars,
+    signals,
+    trade_value,
+    start=None,
+    periods_per_year=TRADING_DAYS_PER_YEAR * Strategy.BARS_PER_DAY[Strategy.MIN_15],
+    **kwargs,
+):
+    """
+    Backtest signals over bar columns.
+
+    Bars before ``start`` are only used to warm up indicators.
+
+    :param bars(BarArrays): bar columns ordered by time
+    :param signals(ndarray): buy (1) and sell (-1) signals for every bar
+    :param trade_value(float): maximum notional value of each order
+    :param start(int): Unix epoch to start trading from
+    :param periods_per_year(int): number of bars in a year, used to annualise
+    statistics
+    :param kwargs: initial cash, slippage, fee and stop loss/take profit
+    settings passed to ``simulate``
+    :return(BacktestResult): bar times, equity curve, trades and statistics
+    """
+    first = 0 if start is None else int(np.searchsorted(bars.t, start, "left"))
+    if first:
+        bars = slice_bars(bars, first)
+        signals = signals[first:]
+
+    equity, trades = simulate(bars, signals, trade_value, **kwargs)
+    stats = backtest_stats(equity, trades, periods_per_year)
+    return BacktestResult(bars.t, equity, trades, stats)
+
+
+def to_epoch(value):
+    """Return a datetime as a Unix epoch, leaving epochs and None unchanged."""
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return value
+
+
+def backtest_strategy(strategy, start=None, end=None, cache=None, **kwargs):
+    """
+    Backtest a strategy definition over stored bars.
+
+    Bars are read from the local bar cache, which is synced from the database
+    first. The strategy does not need to be saved.
+
+    :param strategy(Strategy): strategy to backtest
+    :param start(datetime): start of the backtest, defaults to all history
+    :param end(datetime): end of the backtest, defaults to the latest bar
+    :param cache(BarCache): bar cache to read from
+    :param kwargs: initial cash, slippage and fee settings
+    :return(BacktestResult): bar times, equity curve, trades and statistics
+    """
+    cache = cache or BarCache()
+    cache.sync(strategy.asset, strategy.timeframe)
+    bars = cache.load(strategy.asset.symbol, strategy.timeframe, end=to_epoch(end))
+    signals = get_strategy(strategy.type).signals(Indicators(bars), strategy.timeframe)
+    return run_backtest(
+        bars,
+        signals,
+        strategy.trade_value,
+        start=to_epoch(start),
+        periods_per_year=TRADING_DAYS_PER_YEAR
+        * Strategy.BARS_PER_DAY[strategy.timeframe],
+        stop_loss_amount=strategy.stop_loss_amount,
+        stop_loss_percentage=strategy.stop_loss_percentage,
+        take_profit_amount=strategy.take_profit_amount,
+        take_profit_percentage=strategy.take_profit_percentage,
+        **kwargs,
+    )
@@ -0,0 +1,101 @@
+import logging
+from datetime import timedelta
+
+from assets.models import Bar, TradingSession
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .alpaca import TradeApiRest
+
+logger = logging.getLogger(__name__)
+
+CLOCK_CACHE_KEY = "core.clock"
+
+
+def calendar_loaded(now=None):
+    """Return true if the trading calendar covers the current date."""
+    now = now or timezone.now()
+    return TradingSession.objects.filter(date__gte=now.date()).exists()
+
+
+def cached_clock(now=None):
+    """
+    Return Alpaca's market clock, cached until the market next opens or closes.
+
+    :return(dict): whether the market is open, and the next open and close
+    """
+    now = now or timezone.now()
+    clock = cache.get(CLOCK_CACHE_KEY)
+    if clock is None or now >= clock["expires"]:
+        api = TradeApiRest()
+        raw_clock = api.get_clock().__dict__["_raw"]
+        next_open = parse_datetime(raw_clock["next_open"])
+        next_close = parse_datetime(raw_clock["next_close"])
+        clock = {
+            "is_open": raw_clock["is_open"],
+            "next_open": next_open,
+            "next_close": next_close,
+            "expires": min(next_open, next_close),
+        }
+        timeout = max((clock["expires"] - now).total_seconds(), 1)
+        cache.set(CLOCK_CACHE_KEY, clock, timeout=timeout)
+    return clock
+
+
+def session_at(when):
+    """
+    Return the trading session which a bar closing at a time belongs to.
+
+    :param when(datetime): bar close
+    :return(TradingSession): session, or None outside sessions
+    """
+    return TradingSession.objects.filter(open__lt=when, close__gte=when).first()
+
+
+def is_market_open(now=None):
+    """
+    Return true if the market is open.
+
+    The trading calendar is used if it has been loaded, otherwise Alpaca's
+    clock, which is cached until the market next opens or closes.
+    """
+    now = now or timezone.now()
+    if calendar_loaded(now):
+        return TradingSession.objects.filter(open__lte=now, close__gt=now).exists()
+    return cached_clock(now)["is_open"]
+
+
+def closed_timeframes(when, timeframes=None):
+    """
+    Return the timeframes with a bar closing at a time during a session.
+
+    Intraday bars close on multiples of their length, and at the session
+    close. Daily bars close at the session close. Without a trading calendar,
+    only intraday bars closing while Alpaca's clock reports the market open
+    are found.
+
+    :param when(datetime): time, truncated to the minute
+    :param timeframes(list): timeframes to check, defaults to every timeframe
+    :return(list): timeframes
+    """
+    when = when.replace(second=0, microsecond=0)
+    timeframes = timeframes or [timeframe for timeframe, _ in Bar.TIMEFRAME_CHOICES]
+    epoch = int(when.timestamp())
+
+    if calendar_loaded(when):
+        session = session_at(when)
+        if session is None:
+            return []
+        at_close = when == session.close
+    elif cached_clock(when - timedelta(seconds=1))["is_open"]:
+        at_close = False
+    else:
+        return []
+
+    return [
+        timeframe
+        for timeframe in timeframes
+        if at_close
+        or (timeframe != Bar.DAY_1 and epoch % Bar.TIMEFRAME_SECONDS[timeframe] == 0)
+    ]
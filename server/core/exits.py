@@ -0,0 +1,218 @@
+import logging
+from collections import Counter
+
+import numpy as np
+from accounts.models import Position
+from alpaca_trade_api.rest import APIError
+from assets.models import Bar
+from django.db.models import Q
+from orders.models import Order
+from orders.risk import UNFILLED_STATUSES
+from orders.submission import order_intent
+from requests.exceptions import RequestException
+
+from .models import Strategy
+from .ratelimit import alpaca_bucket
+
+logger = logging.getLogger(__name__)
+
+# Strategy fields which set exit thresholds
+EXIT_FIELDS = [
+    "stop_loss_amount",
+    "stop_loss_percentage",
+    "take_profit_amount",
+    "take_profit_percentage",
+]
+
+
+def latest_prices(api, assets):
+    """
+    Return the latest price of assets.
+
+    The latest trade of each symbol is requested within the Alpaca rate
+    limit. Assets without a trade, or whose request failed, are priced from
+    the close of their latest stored bar instead.
+
+    :param api(TradeApiRest): Alpaca api
+    :param assets(iterable): assets
+    :return(dict): prices by asset id
+    """
+    assets = {asset.symbol: asset for asset in assets}
+    bucket = alpaca_bucket()
+    prices = {}
+    for symbol in sorted(assets):
+        bucket.acquire()
+        try:
+            trade = api.get_latest_trade(symbol)
+        except (APIError, RequestException) as e:
+            logger.warning(f"Unable to fetch the latest trade of {symbol}: {e}")
+            continue
+        prices[assets[symbol].pk] = float(trade.price)
+
+    missing = [asset.pk for asset in assets.values() if asset.pk not in prices]
+    if missing:
+        bars = (
+            Bar.objects.filter(asset_id__in=missing)
+            .order_by("asset_id", "-t")
+            .distinct("asset_id")
+            .values_list("asset_id", "c")
+        )
+        prices.update((asset_id, float(close)) for asset_id, close in bars)
+    return prices
+
+
+def exit_candidates():
+    """
+    Return the open positions which have an active strategy with exit
+    thresholds, paired with the strategy.
+
+    Positions with an order still open are left out, so an exit isn't placed
+    while an earlier order may change the position.
+
+    :return(list): (position, strategy) tuples
+    """
+    strategies = list(
+        Strategy.objects.active()
+        .filter(
+            Q(stop_loss_amount__isnull=False)
+            | Q(stop_loss_percentage__isnull=False)
+            | Q(take_profit_amount__isnull=False)
+            | Q(take_profit_percentage__isnull=False)
+        )
+        .select_related("asset")
+        .order_by("pk")
+    )
+    if not strategies:
+        return []
+
+    user_ids = {strategy.user_id for strategy in strategies}
+    asset_ids = {strategy.asset_id for strategy in strategies}
+    positions = {
+        (position.user_id, position.asset_id): position
+        for position in Position.objects.open().filter(
+            user_id__in=user_ids, asset_id__in=asset_ids
+        )
+    }
+    pending = set(
+        Order.objects.filter(user_id__in=user_ids, asset_id__in=asset_ids)
+        .exclude(status__in=Order.CLOSED_STATUSES)
+        .values_list("user_id", "asset_id")
+    )
+
+    candidates = []
+    for strategy in strategies:
+        key = (strategy.user_id, strategy.asset_id)
+        if key in positions and key not in pending:
+            candidates.append((positions[key], strategy))
+    return candidates
+
+
+def exit_triggers(qty, entry, price, thresholds):
+    """
+    Return which positions have hit a stop loss or take profit threshold.
+
+    Amounts are of unrealised profit or loss in dollars, and percentages of
+    the price move from the average entry price, in the direction of the
+    position. Thresholds which aren't set are NaN, and never trigger.
+
+    :param qty(ndarray): signed position quantities
+    :param entry(ndarray): average entry prices
+    :param price(ndarray): latest prices
+    :param thresholds(ndarray): `EXIT_FIELDS` columns of each position
+    :return(tuple): stop loss and take profit boolean arrays
+    """
+    stop_amount, stop_percentage, take_amount, take_percentage = thresholds.T
+    pl = qty * (price - entry)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.sign(qty) * (price - entry) / entry * 100
+    with np.errstate(invalid="ignore"):
+        stop = (pl <= -stop_amount) | (change <= -stop_percentage)
+        take = (pl >= take_amount) | (change >= take_percentage)
+    return stop, take & ~stop
+
+
+def exit_attempts(positions):
+    """
+    Return the number of orders of each position which closed unfilled since
+    the position last changed.
+
+    :param positions(list): positions
+    :return(Counter): numbers of orders by position id
+    """
+    attempts = Counter()
+    if not positions:
+        return attempts
+    by_key = {(position.user_id, position.asset_id): position for position in positions}
+    orders = Order.objects.filter(
+        user_id__in={position.user_id for position in positions},
+        asset_id__in={position.asset_id for position in positions},
+        status__in=UNFILLED_STATUSES,
+        filled_qty=0,
+        created_at__gte=min(position.updated_at for position in positions),
+    ).values_list("user_id", "asset_id", "created_at")
+    for user_id, asset_id, created_at in orders:
+        position = by_key.get((user_id, asset_id))
+        if position is not None and created_at >= position.updated_at:
+            attempts[position.pk] += 1
+    return attempts
+
+
+def exit_intents(candidates, prices):
+    """
+    Return intents to close the positions which have hit an exit threshold.
+
+    Every candidate is evaluated in one pass. A position with several
+    strategies is closed once, by the first strategy which triggers. The
+    client order id is derived from when the position last changed, so an
+    exit is only placed once for each state of a position. Exits which were
+    rejected, canceled or expired unfilled are placed again with a new id.
+
+    :param candidates(list): (position, strategy) tuples
+    :param prices(dict): latest prices by asset id
+    :return(list): order intents
+    """
+    candidates = [
+        (position, strategy)
+        for position, strategy in candidates
+        if position.asset_id in prices
+    ]
+    if not candidates:
+        return []
+
+    qty = np.array([float(position.qty) for position, _ in candidates])
+    entry = np.array([float(position.avg_entry_price) for position, _ in candidates])
+    price = np.array([prices[position.asset_id] for position, _ in candidates])
+    thresholds = np.array(
+        [
+            [
+                np.nan if getattr(strategy, name) is None else getattr(strategy, name)
+                for name in EXIT_FIELDS
+            ]
+            for _, strategy in candidates
+        ],
+        dtype=np.float64,
+    )
+    stop, take = exit_triggers(qty, entry, price, thresholds)
+    triggered = np.flatnonzero(stop | take)
+    attempts = exit_attempts([candidates[index][0] for index in triggered])
+
+    intents = []
+    closed = set()
+    for index in triggered:
+        position, strategy = candidates[index]
+        if position.pk in closed:
+            continue
+        closed.add(position.pk)
+        side = Order.SELL if position.qty > 0 else Order.BUY
+        reason = "Stop loss" if stop[index] else "Take profit"
+        logger.info(f"{reason} hit: position {position.pk} at {price[index]}")
+        intents.append(
+            order_intent(
+                strategy,
+                position.updated_at.timestamp(),
+                side,
+                qty=float(abs(position.qty)),
+                attempt=attempts[position.pk],
+            )
+        )
+    return intents
@@ -0,0 +1,34 @@
+from cryptography.fernet import Fernet, MultiFernet
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+
+
+def credentials_fernet():
+    """
+    Return the Fernet cipher of stored credentials.
+
+    Values are encrypted with the first of the `CREDENTIALS_ENCRYPTION_KEYS`,
+    and decrypted with any of them, so keys can be rotated.
+    """
+    keys = settings.CREDENTIALS_ENCRYPTION_KEYS
+    if not keys:
+        raise ImproperlyConfigured(
+            "`CREDENTIALS_ENCRYPTION_KEYS` must be set to store credentials"
+        )
+    return MultiFernet([Fernet(key) for key in keys])
+
+
+class EncryptedTextField(models.TextField):
+    """Text which is stored encrypted, and decrypted when loaded."""
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return credentials_fernet().decrypt(value.encode()).decode()
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return value
+        return credentials_fernet().encrypt(value.encode()).decode()
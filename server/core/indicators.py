@@ -0,0 +1,186 @@
+import numpy as np
+from assets.arrays import latest_bar_arrays
+
+
+def sma(values, window, min_periods=None):
+    """
+    Return the simple moving average of values.
+
+    Until there are ``window`` values, the average is of all values so far if
+    there are at least ``min_periods`` of them (defaults to the window), and
+    NaN otherwise.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    average = np.full(len(values), np.nan)
+    min_periods = max(min_periods or window, 1)
+    if window < 1 or len(values) < min(min_periods, window):
+        return average
+    cumulative = np.cumsum(np.insert(values, 0, 0.0))
+    if len(values) >= window:
+        average[window - 1 :] = (cumulative[window:] - cumulative[:-window]) / window
+    # Averages of the values so far, until there is a full window
+    count = np.arange(min_periods, min(window, len(values) + 1))
+    average[count - 1] = cumulative[count] / count
+    return average
+
+
+def _smooth(values, alpha, window):
+    """
+    Return the recursive (exponential) average of values, seeded with the
+    simple average of the first ``window`` values which aren't NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    average = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) < window:
+        return average
+    first = valid[0] + window - 1
+    previous = average[first] = values[valid[0] : first + 1].mean()
+    # Each value depends on the previous one, so this can't be vectorised
+    for index in range(first + 1, len(values)):
+        previous = average[index] = previous + alpha * (values[index] - previous)
+    return average
+
+
+def ema(values, span):
+    """Return the exponential moving average of values over a span."""
+    return _smooth(values, 2 / (span + 1), span)
+
+
+def rsi(close, period=14):
+    """Return the relative strength index (0-100) of closing prices."""
+    close = np.asarray(close, dtype=np.float64)
+    if len(close) <= period:
+        return np.full(len(close), np.nan)
+    change = np.diff(close)
+    gains = np.insert(np.where(change > 0, change, 0.0), 0, np.nan)
+    losses = np.insert(np.where(change < 0, -change, 0.0), 0, np.nan)
+    gain = _smooth(gains, 1 / period, period)
+    loss = _smooth(losses, 1 / period, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strength = 100 - 100 / (1 + gain / loss)
+    # No losses over the period
+    return np.where((loss == 0) & ~np.isnan(gain), 100.0, strength)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """
+    Return the moving average convergence divergence of closing prices.
+
+    :return(tuple): MACD line, signal line and histogram
+    """
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = _smooth(line, 2 / (signal + 1), signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger_bands(close, window=20, deviations=2):
+    """
+    Return Bollinger bands of closing prices.
+
+    :return(tuple): middle (simple moving average), upper and lower bands
+    """
+    close = np.asarray(close, dtype=np.float64)
+    middle = sma(close, window)
+    deviation = np.sqrt(np.maximum(sma(close**2, window) - middle**2, 0))
+    return middle, middle + deviations * deviation, middle - deviations * deviation
+
+
+def atr(high, low, close, period=14):
+    """Return the average true range of bars."""
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    previous = np.insert(close[:-1], 0, np.nan)
+    true_range = np.fmax(
+        high - low, np.fmax(np.abs(high - previous), np.abs(low - previous))
+    )
+    return _smooth(true_range, 1 / period, period)
+
+
+def vwap(high, low, close, volume):
+    """Return the cumulative volume weighted average price of bars."""
+    typical = (np.asarray(high) + np.asarray(low) + np.asarray(close)) / 3
+    volume = np.asarray(volume, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.cumsum(typical * volume) / np.cumsum(volume)
+
+
+def crossover(values, reference):
+    """
+    Return an array of crossing signals for every bar.
+
+    A buy signal (1) is raised when values cross above the reference, and a
+    sell signal (-1) when they cross below it. Comparisons with NaN (ie. with
+    insufficient history) never raise a signal.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    reference = np.broadcast_to(np.asarray(reference, dtype=np.float64), values.shape)
+    signals = np.zeros(len(values), dtype=np.int8)
+    if len(values) < 2:
+        return signals
+    buy = (values[1:] >= reference[1:]) & (values[:-1] < reference[:-1])
+    sell = (values[1:] <= reference[1:]) & (values[:-1] > reference[:-1])
+    signals[1:][buy] = 1
+    signals[1:][sell] = -1
+    return signals
+
+
+# Indicators by name, computed from bar columns
+INDICATORS = {
+    "sma": lambda bars, window, min_periods=None: sma(bars.c, window, min_periods),
+    "ema": lambda bars, span: ema(bars.c, span),
+    "rsi": lambda bars, period: rsi(bars.c, period),
+    "macd": lambda bars, fast, slow, signal: macd(bars.c, fast, slow, signal),
+    "bollinger_bands": lambda bars, window, deviations: bollinger_bands(
+        bars.c, window, deviations
+    ),
+    "atr": lambda bars, period: atr(bars.h, bars.l, bars.c, period),
+    "vwap": lambda bars: vwap(bars.h, bars.l, bars.c, bars.v),
+}
+
+
+class Indicators:
+    """Indicators of one series of bars, each computed at most once."""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self._values = {}
+
+    def __call__(self, name, *params):
+        """
+        Return an indicator of the bars.
+
+        :param name(str): indicator name eg. sma
+        :param params: indicator parameters eg. the window
+        """
+        key = (name, params)
+        if key not in self._values:
+            self._values[key] = INDICATORS[name](self.bars, *params)
+        return self._values[key]
+
+
+class IndicatorCache:
+    """
+    Bars and indicators of each asset and timeframe for one strategy cycle.
+
+    Bars are loaded once per asset and timeframe, and each indicator is
+    computed once per set of parameters, however many strategies use them.
+    """
+
+    def __init__(self):
+        self._series = {}
+
+    def series(self, asset_id, timeframe, count):
+        """
+        Return the indicators of the latest bars of an asset.
+
+        :param asset_id(uuid): asset id
+        :param timeframe(str): bar timeframe eg. 15Min
+        :param count(int): minimum number of bars required
+        :return(Indicators): indicators of the bars
+        """
+        key = (str(asset_id), timeframe)
+        loaded, series = self._series.get(key, (0, None))
+        if loaded < count:
+            series = Indicators(latest_bar_arrays(asset_id, timeframe, count))
+            self._series[key] = (count, series)
+        return series
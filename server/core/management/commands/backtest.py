@@ -0,0 +1,82 @@
+from assets.models import Asset
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backtest import (
+    DEFAULT_FEE,
+    DEFAULT_INITIAL_CASH,
+    DEFAULT_SLIPPAGE,
+    backtest_strategy,
+)
+from core.models import Strategy
+from core.utils import parse_date
+
+
+class Command(BaseCommand):
+    help = "Backtest a strategy definition over stored bars."
+
+    def add_arguments(self, parser):
+        parser.add_argument("symbol", help="Symbol of the asset to trade.")
+        parser.add_argument(
+            "--type",
+            choices=[choice for choice, _ in Strategy.TYPE_CHOICES],
+            default=Strategy.MOVING_AVERAGE_7D,
+            help="Strategy type.",
+        )
+        parser.add_argument(
+            "--timeframe",
+            choices=[choice for choice, _ in Strategy.TYPE_TIMEFRAME],
+            default=Strategy.MIN_15,
+            help="Bar timeframe.",
+        )
+        parser.add_argument(
+            "--trade-value",
+            type=float,
+            default=1000,
+            help="Maximum notional value of each order.",
+        )
+        parser.add_argument("--stop-loss-amount", type=float)
+        parser.add_argument("--stop-loss-percentage", type=float)
+        parser.add_argument("--take-profit-amount", type=float)
+        parser.add_argument("--take-profit-percentage", type=float)
+        parser.add_argument("--start", type=parse_date, help="Start date (YYYY-MM-DD).")
+        parser.add_argument("--end", type=parse_date, help="End date (YYYY-MM-DD).")
+        parser.add_argument("--initial-cash", type=float, default=DEFAULT_INITIAL_CASH)
+        parser.add_argument(
+            "--slippage",
+            type=float,
+            default=DEFAULT_SLIPPAGE,
+            help="Fraction of the fill price paid on each order.",
+        )
+        parser.add_argument(
+            "--fee",
+            type=float,
+            default=DEFAULT_FEE,
+            help="Fraction of the order notional paid as fees.",
+        )
+
+    def handle(self, *args, **kwargs):
+        try:
+            asset = Asset.objects.get(symbol=kwargs["symbol"])
+        except Asset.DoesNotExist:
+            raise CommandError(f"Asset {kwargs['symbol']} does not exist")
+
+        strategy = Strategy(
+            type=kwargs["type"],
+            asset=asset,
+            timeframe=kwargs["timeframe"],
+            trade_value=kwargs["trade_value"],
+            stop_loss_amount=kwargs["stop_loss_amount"],
+            stop_loss_percentage=kwargs["stop_loss_percentage"],
+            take_profit_amount=kwargs["take_profit_amount"],
+            take_profit_percentage=kwargs["take_profit_percentage"],
+        )
+        result = backtest_strategy(
+            strategy,
+            kwargs["start"],
+            kwargs["end"],
+            initial_cash=kwargs["initial_cash"],
+            slippage=kwargs["slippage"],
+            fee=kwargs["fee"],
+        )
+        for name, value in result.stats.items():
+            self.stdout.write(f"{name}: {value}")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from users.models import User
+
+from core.backtest import DEFAULT_INITIAL_CASH
+from core.replay import replay
+from core.utils import parse_date
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay stored bars through the live strategy runner with a simulated "
+        "clock and broker, and report throughput and latency. All changes are "
+        "rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("start", type=parse_date, help="Start date (YYYY-MM-DD).")
+        parser.add_argument("end", type=parse_date, help="End date (YYYY-MM-DD).")
+        parser.add_argument(
+            "--user", metavar="EMAIL", help="Only run the strategies of this user."
+        )
+        parser.add_argument("--cash", type=float, default=DEFAULT_INITIAL_CASH)
+
+    def handle(self, *args, **kwargs):
+        user = User.objects.get(email=kwargs["user"]) if kwargs["user"] else None
+        report = replay(kwargs["start"], kwargs["end"], user, cash=kwargs["cash"])
+        for name, value in report.items():
+            self.stdout.write(f"{name}: {value}")
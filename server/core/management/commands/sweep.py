@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Strategy, Sweep
+from core.sweep import run_sweep
+from core.tasks import start_sweep
+from core.utils import parse_date
+
+
+class Command(BaseCommand):
+    help = "Backtest a grid, or random search, of strategy parameters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("symbols", nargs="+", help="Symbols to backtest.")
+        parser.add_argument(
+            "--windows",
+            nargs="+",
+            type=int,
+            default=[5, 10],
+            help="Moving average windows in business days.",
+        )
+        parser.add_argument(
+            "--timeframes",
+            nargs="+",
+            choices=[choice for choice, _ in Strategy.TYPE_TIMEFRAME],
+            default=[Strategy.MIN_15],
+        )
+        parser.add_argument("--stop-loss-percentages", nargs="+", type=float)
+        parser.add_argument("--take-profit-percentages", nargs="+", type=float)
+        parser.add_argument(
+            "--samples",
+            type=int,
+            help="Randomly sample this many combinations instead of a grid.",
+        )
+        parser.add_argument("--seed", type=int)
+        parser.add_argument("--start", type=parse_date, help="Start date (YYYY-MM-DD).")
+        parser.add_argument("--end", type=parse_date, help="End date (YYYY-MM-DD).")
+        parser.add_argument("--trade-value", type=float, default=1000)
+        parser.add_argument(
+            "--metric",
+            choices=[choice for choice, _ in Sweep.METRIC_CHOICES],
+            default="sharpe_ratio",
+            help="Statistic to rank results by.",
+        )
+        parser.add_argument("--workers", type=int, help="Number of processes.")
+        parser.add_argument(
+            "--celery",
+            action="store_true",
+            help="Run backtests on Celery workers instead of local processes.",
+        )
+
+    def handle(self, *args, **kwargs):
+        sweep = Sweep.objects.create(
+            symbols=kwargs["symbols"],
+            parameters={
+                "windows": kwargs["windows"],
+                "timeframes": kwargs["timeframes"],
+                "stop_loss_percentages": kwargs["stop_loss_percentages"],
+                "take_profit_percentages": kwargs["take_profit_percentages"],
+            },
+            search=Sweep.RANDOM if kwargs["samples"] else Sweep.GRID,
+            samples=kwargs["samples"],
+            seed=kwargs["seed"],
+            start_date=kwargs["start"],
+            end_date=kwargs["end"],
+            trade_value=kwargs["trade_value"],
+            metric=kwargs["metric"],
+        )
+
+        if kwargs["celery"]:
+            start_sweep.delay(sweep.id)
+            self.stdout.write(f"Started sweep {sweep.id}")
+            return
+
+        self.stdout.write(f"Running sweep {sweep.id}...")
+        run_sweep(sweep, kwargs["workers"])
+        for result in sweep.results.all()[:10]:
+            self.stdout.write(
+                f"{result.rank}. {result.symbol} {result.timeframe} "
+                f"window={result.window} "
+                f"stop_loss={result.stop_loss_percentage} "
+                f"take_profit={result.take_profit_percentage} "
+                f"{sweep.metric}={result.stats[sweep.metric]}"
+            )
@@ -0,0 +1,102 @@
+from assets.models import Asset
+from django.core.management.base import BaseCommand, CommandError
+from users.models import User
+
+from core.models import Strategy
+from core.utils import parse_date
+from core.walkforward import candidate_parameters, promote_strategy, walk_forward
+
+
+class Command(BaseCommand):
+    help = "Validate strategy parameters by walk-forward optimisation."
+
+    def add_arguments(self, parser):
+        parser.add_argument("symbol", help="Symbol of the asset to trade.")
+        parser.add_argument(
+            "--timeframe",
+            choices=[choice for choice, _ in Strategy.TYPE_TIMEFRAME],
+            default=Strategy.MIN_15,
+        )
+        parser.add_argument(
+            "--types",
+            nargs="+",
+            choices=[choice for choice, _ in Strategy.TYPE_CHOICES],
+            help="Strategy types to optimise over. Defaults to all types.",
+        )
+        parser.add_argument("--stop-loss-percentages", nargs="+", type=float)
+        parser.add_argument("--take-profit-percentages", nargs="+", type=float)
+        parser.add_argument(
+            "--train-days",
+            type=int,
+            default=60,
+            help="Business days in each training window.",
+        )
+        parser.add_argument(
+            "--test-days",
+            type=int,
+            default=20,
+            help="Business days in each test window.",
+        )
+        parser.add_argument("--trade-value", type=float, default=1000)
+        parser.add_argument(
+            "--metric", default="sharpe_ratio", help="Statistic to optimise."
+        )
+        parser.add_argument("--workers", type=int, help="Number of processes.")
+        parser.add_argument(
+            "--promote",
+            metavar="EMAIL",
+            help="Create a strategy for this user with the latest parameters.",
+        )
+        parser.add_argument(
+            "--start", type=parse_date, help="Start date of the promoted strategy."
+        )
+        parser.add_argument(
+            "--end", type=parse_date, help="End date of the promoted strategy."
+        )
+
+    def handle(self, *args, **kwargs):
+        try:
+            asset = Asset.objects.get(symbol=kwargs["symbol"])
+        except Asset.DoesNotExist:
+            raise CommandError(f"Asset {kwargs['symbol']} does not exist")
+
+        candidates = candidate_parameters(
+            kwargs["types"],
+            kwargs["stop_loss_percentages"],
+            kwargs["take_profit_percentages"],
+        )
+        result = walk_forward(
+            asset,
+            kwargs["timeframe"],
+            kwargs["train_days"],
+            kwargs["test_days"],
+            kwargs["trade_value"],
+            candidates=candidates,
+            metric=kwargs["metric"],
+            workers=kwargs["workers"],
+        )
+        if not result.windows:
+            raise CommandError("Not enough bars for a walk-forward window")
+
+        for window in result.windows:
+            self.stdout.write(
+                f"{window['test_start']}-{window['test_end']}: "
+                f"{window['parameters']} "
+                f"{kwargs['metric']}={window['test_stats'][kwargs['metric']]}"
+            )
+        for name, value in result.stats.items():
+            self.stdout.write(f"{name}: {value}")
+
+        if kwargs["promote"]:
+            if not (kwargs["start"] and kwargs["end"]):
+                raise CommandError("--start and --end are required to promote")
+            strategy = promote_strategy(
+                User.objects.get(email=kwargs["promote"]),
+                asset,
+                kwargs["timeframe"],
+                result.parameters,
+                kwargs["trade_value"],
+                start_date=kwargs["start"],
+                end_date=kwargs["end"],
+            )
+            self.stdout.write(f"Created strategy {strategy.id}")
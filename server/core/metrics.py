@@ -0,0 +1,61 @@
+import numpy as np
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def simple_returns(equity):
+    """Return the simple period returns of an equity curve."""
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) < 2:
+        return np.empty(0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(equity) / equity[:-1]
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def total_return(equity):
+    """Return the total return of an equity curve as a fraction."""
+    if len(equity) < 2 or not equity[0]:
+        return 0.0
+    return float(equity[-1] / equity[0] - 1)
+
+
+def max_drawdown(equity):
+    """Return the maximum peak to trough decline of an equity curve as a fraction."""
+    equity = np.asarray(equity, dtype=np.float64)
+    if not len(equity):
+        return 0.0
+    peaks = np.maximum.accumulate(equity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdowns = np.where(peaks > 0, 1 - equity / peaks, 0.0)
+    return float(drawdowns.max())
+
+
+def sharpe_ratio(returns, periods_per_year):
+    """Return the annualised Sharpe ratio of period returns (zero risk free rate)."""
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < 2:
+        return 0.0
+    deviation = returns.std(ddof=1)
+    if not deviation:
+        return 0.0
+    return float(returns.mean() / deviation * np.sqrt(periods_per_year))
+
+
+def sortino_ratio(returns, periods_per_year):
+    """Return the annualised Sortino ratio of period returns (zero target)."""
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < 2:
+        return 0.0
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+    if not downside:
+        return 0.0
+    return float(returns.mean() / downside * np.sqrt(periods_per_year))
+
+
+def win_rate(profits):
+    """Return the fraction of closed trades with a positive profit."""
+    profits = np.asarray(profits, dtype=np.float64)
+    if not len(profits):
+        return 0.0
+    return float(np.count_nonzero(profits > 0) / len(profits))
@@ -0,0 +1,188 @@
+# Generated by Django 3.1.2 on 2026-10-19 11:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_add_strategies"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Sweep",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("symbols", models.JSONField(verbose_name="symbols")),
+                ("parameters", models.JSONField(verbose_name="parameters")),
+                (
+                    "search",
+                    models.CharField(
+                        choices=[("grid", "grid"), ("random", "random")],
+                        default="grid",
+                        max_length=32,
+                        verbose_name="search",
+                    ),
+                ),
+                (
+                    "samples",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="samples"
+                    ),
+                ),
+                (
+                    "seed",
+                    models.IntegerField(blank=True, null=True, verbose_name="seed"),
+                ),
+                (
+                    "start_date",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="start date"
+                    ),
+                ),
+                (
+                    "end_date",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="end date"
+                    ),
+                ),
+                (
+                    "trade_value",
+                    models.DecimalField(
+                        decimal_places=5, max_digits=12, verbose_name="trade value"
+                    ),
+                ),
+                (
+                    "metric",
+                    models.CharField(
+                        default="sharpe_ratio", max_length=64, verbose_name="metric"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "pending"),
+                            ("running", "running"),
+                            ("completed", "completed"),
+                        ],
+                        default="pending",
+                        max_length=32,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "chunks",
+                    models.PositiveIntegerField(default=0, verbose_name="chunks"),
+                ),
+                (
+                    "completed_chunks",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="completed chunks"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "completed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="completed at"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "sweep",
+                "verbose_name_plural": "sweeps",
+            },
+        ),
+        migrations.CreateModel(
+            name="SweepResult",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("symbol", models.CharField(max_length=32, verbose_name="symbol")),
+                (
+                    "timeframe",
+                    models.CharField(
+                        choices=[
+                            ("1Min", "1 minute"),
+                            ("5Min", "5 minute"),
+                            ("15Min", "15 minute"),
+                            ("1H", "1 hour"),
+                            ("1D", "1 day"),
+                        ],
+                        max_length=128,
+                        verbose_name="timeframe",
+                    ),
+                ),
+                ("window", models.PositiveIntegerField(verbose_name="window")),
+                (
+                    "stop_loss_percentage",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=5,
+                        null=True,
+                        verbose_name="stop loss percentage",
+                    ),
+                ),
+                (
+                    "take_profit_percentage",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=5,
+                        null=True,
+                        verbose_name="take profit percentage",
+                    ),
+                ),
+                ("stats", models.JSONField(verbose_name="stats")),
+                ("score", models.FloatField(verbose_name="score")),
+                (
+                    "rank",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="rank"
+                    ),
+                ),
+                (
+                    "sweep",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="results",
+                        to="core.sweep",
+                        verbose_name="sweep",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "sweep result",
+                "verbose_name_plural": "sweep results",
+                "ordering": ("rank",),
+            },
+        ),
+        migrations.AddIndex(
+            model_name="sweepresult",
+            index=models.Index(
+                fields=["sweep", "rank"], name="core_sweepr_sweep_i_c2b938_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.1.2 on 2026-10-19 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_sweep"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="strategy",
+            name="type",
+            field=models.CharField(
+                choices=[
+                    ("moving_average_14d", "14 day moving average"),
+                    ("moving_average_7d", "7 day moving average"),
+                    ("rsi", "relative strength index"),
+                    ("macd", "moving average convergence divergence"),
+                    ("bollinger_bands", "bollinger bands"),
+                ],
+                max_length=128,
+                verbose_name="type",
+            ),
+        ),
+    ]
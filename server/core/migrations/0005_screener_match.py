@@ -0,0 +1,86 @@
+# Generated by Django 3.1.2 on 2026-10-19 11:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0006_partition_bar"),
+        ("core", "0004_strategy_types"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScreenerMatch",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "condition",
+                    models.CharField(max_length=64, verbose_name="condition"),
+                ),
+                (
+                    "timeframe",
+                    models.CharField(
+                        choices=[
+                            ("1Min", "1 minute"),
+                            ("5Min", "5 minute"),
+                            ("15Min", "15 minute"),
+                            ("1H", "1 hour"),
+                            ("1D", "1 day"),
+                        ],
+                        max_length=128,
+                        verbose_name="timeframe",
+                    ),
+                ),
+                (
+                    "signal",
+                    models.SmallIntegerField(
+                        choices=[(1, "buy"), (-1, "sell")], verbose_name="signal"
+                    ),
+                ),
+                (
+                    "t",
+                    models.PositiveIntegerField(
+                        help_text="the beginning time of the latest bar as a Unix epoch in seconds",
+                        verbose_name="time",
+                    ),
+                ),
+                ("close", models.FloatField(verbose_name="close")),
+                (
+                    "value",
+                    models.FloatField(
+                        help_text="indicator value", verbose_name="value"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="screener_matches",
+                        to="assets.asset",
+                        verbose_name="asset",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "screener match",
+                "verbose_name_plural": "screener matches",
+                "ordering": ("condition", "asset__symbol"),
+                "unique_together": {("condition", "asset")},
+            },
+        ),
+    ]
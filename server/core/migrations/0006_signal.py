@@ -0,0 +1,83 @@
+# Generated by Django 3.1.2 on 2026-10-19 12:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0007_trading_session"),
+        ("core", "0005_screener_match"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Signal",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "t",
+                    models.PositiveIntegerField(
+                        help_text="the beginning time of the bar as a Unix epoch in seconds",
+                        verbose_name="time",
+                    ),
+                ),
+                (
+                    "signal",
+                    models.SmallIntegerField(
+                        choices=[(1, "buy"), (-1, "sell"), (0, "none")],
+                        verbose_name="signal",
+                    ),
+                ),
+                (
+                    "decision",
+                    models.CharField(
+                        choices=[
+                            ("order", "order"),
+                            ("hold", "hold"),
+                            ("skip", "skip"),
+                        ],
+                        max_length=8,
+                        verbose_name="decision",
+                    ),
+                ),
+                ("values", models.JSONField(default=dict, verbose_name="values")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="assets.asset",
+                        verbose_name="asset",
+                    ),
+                ),
+                (
+                    "strategy",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="signals",
+                        to="core.strategy",
+                        verbose_name="strategy",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "signal",
+                "verbose_name_plural": "signals",
+                "unique_together": {("strategy", "t")},
+            },
+        ),
+    ]
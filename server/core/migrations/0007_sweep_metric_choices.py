@@ -0,0 +1,31 @@
+# Generated by Django 3.1.2 on 2026-10-19 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_signal"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="sweep",
+            name="metric",
+            field=models.CharField(
+                choices=[
+                    ("sharpe_ratio", "sharpe ratio"),
+                    ("sortino_ratio", "sortino ratio"),
+                    ("total_return", "total return"),
+                    ("max_drawdown", "max drawdown"),
+                    ("win_rate", "win rate"),
+                    ("final_equity", "final equity"),
+                    ("trades", "trades"),
+                ],
+                default="sharpe_ratio",
+                max_length=64,
+                verbose_name="metric",
+            ),
+        ),
+    ]
@@ -11,11 +11,15 @@ class Strategy(models.Model):
 
     MOVING_AVERAGE_14D = "moving_average_14d"
     MOVING_AVERAGE_7D = "moving_average_7d"
-    # TO DO
-    # TO DO
+    RSI = "rsi"
+    MACD = "macd"
+    BOLLINGER_BANDS = "bollinger_bands"
     TYPE_CHOICES = [
         (MOVING_AVERAGE_14D, _("14 day moving average")),
         (MOVING_AVERAGE_7D, _("7 day moving average")),
+        (RSI, _("relative strength index")),
+        (MACD, _("moving average convergence divergence")),
+        (BOLLINGER_BANDS, _("bollinger bands")),
     ]
 
     MIN_1 = "1Min"
@@ -31,6 +35,15 @@ class Strategy(models.Model):
         (DAY_1, _("1 day")),
     ]
 
+    # Number of bars in a regular trading session for each timeframe
+    BARS_PER_DAY = {
+        MIN_1: 390,
+        MIN_5: 78,
+        MIN_15: 26,
+        HOUR_1: 7,
+        DAY_1: 1,
+    }
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         verbose_name=_("user"),
@@ -109,3 +122,227 @@ class Strategy(models.Model):
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
+
+
+class Sweep(models.Model):
+    """A search over strategy parameters, backtested across a set of symbols."""
+
+    GRID = "grid"
+    RANDOM = "random"
+    SEARCH_CHOICES = [
+        (GRID, _("grid")),
+        (RANDOM, _("random")),
+    ]
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    STATUS_CHOICES = [
+        (PENDING, _("pending")),
+        (RUNNING, _("running")),
+        (COMPLETED, _("completed")),
+    ]
+
+    # Backtest statistics results can be ranked by
+    METRIC_CHOICES = [
+        ("sharpe_ratio", _("sharpe ratio")),
+        ("sortino_ratio", _("sortino ratio")),
+        ("total_return", _("total return")),
+        ("max_drawdown", _("max drawdown")),
+        ("win_rate", _("win rate")),
+        ("final_equity", _("final equity")),
+        ("trades", _("trades")),
+    ]
+
+    symbols = models.JSONField(verbose_name=_("symbols"))
+    # Lists of values to search for each parameter, keyed by `windows`,
+    # `timeframes`, `stop_loss_percentages` and `take_profit_percentages`
+    parameters = models.JSONField(verbose_name=_("parameters"))
+    search = models.CharField(
+        verbose_name=_("search"),
+        choices=SEARCH_CHOICES,
+        max_length=32,
+        default=GRID,
+    )
+    samples = models.PositiveIntegerField(_("samples"), blank=True, null=True)
+    seed = models.IntegerField(_("seed"), blank=True, null=True)
+    start_date = models.DateTimeField(_("start date"), blank=True, null=True)
+    end_date = models.DateTimeField(_("end date"), blank=True, null=True)
+    trade_value = models.DecimalField(
+        verbose_name=_("trade value"),
+        max_digits=12,
+        decimal_places=5,
+    )
+    metric = models.CharField(
+        verbose_name=_("metric"),
+        choices=METRIC_CHOICES,
+        max_length=64,
+        default="sharpe_ratio",
+    )
+    status = models.CharField(
+        verbose_name=_("status"),
+        choices=STATUS_CHOICES,
+        max_length=32,
+        default=PENDING,
+    )
+    chunks = models.PositiveIntegerField(_("chunks"), default=0)
+    completed_chunks = models.PositiveIntegerField(_("completed chunks"), default=0)
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+    completed_at = models.DateTimeField(_("completed at"), blank=True, null=True)
+
+    class Meta:
+        verbose_name = "sweep"
+        verbose_name_plural = "sweeps"
+
+    def __str__(self):
+        return f"Sweep {self.id}: {self.status}"
+
+    def save(self, *args, **kwargs):
+        self.full_clean()
+        super().save(*args, **kwargs)
+
+
+class SweepResult(models.Model):
+    """The backtest statistics of one parameter combination in a sweep."""
+
+    sweep = models.ForeignKey(
+        Sweep,
+        verbose_name=_("sweep"),
+        related_name="results",
+        on_delete=models.CASCADE,
+    )
+    symbol = models.CharField(_("symbol"), max_length=32)
+    timeframe = models.CharField(
+        verbose_name=_("timeframe"),
+        choices=Strategy.TYPE_TIMEFRAME,
+        max_length=128,
+    )
+    # Moving average window in business days
+    window = models.PositiveIntegerField(_("window"))
+    stop_loss_percentage = models.DecimalField(
+        verbose_name=_("stop loss percentage"),
+        max_digits=5,
+        decimal_places=2,
+        blank=True,
+        null=True,
+    )
+    take_profit_percentage = models.DecimalField(
+        verbose_name=_("take profit percentage"),
+        max_digits=5,
+        decimal_places=2,
+        blank=True,
+        null=True,
+    )
+    stats = models.JSONField(verbose_name=_("stats"))
+    score = models.FloatField(_("score"))
+    rank = models.PositiveIntegerField(_("rank"), blank=True, null=True)
+
+    class Meta:
+        verbose_name = "sweep result"
+        verbose_name_plural = "sweep results"
+        ordering = ("rank",)
+        indexes = [models.Index(fields=["sweep", "rank"])]
+
+    def __str__(self):
+        return f"Sweep {self.sweep_id}: {self.symbol} #{self.rank}"
+
+
+class ScreenerMatch(models.Model):
+    """An asset crossing an indicator of a screener condition at its latest bar."""
+
+    BUY = 1
+    SELL = -1
+    SIGNAL_CHOICES = [
+        (BUY, _("buy")),
+        (SELL, _("sell")),
+    ]
+
+    # Name of the condition in `SCREENER_CONDITIONS`
+    condition = models.CharField(_("condition"), max_length=64)
+    asset = models.ForeignKey(
+        Asset,
+        verbose_name=_("asset"),
+        related_name="screener_matches",
+        on_delete=models.CASCADE,
+    )
+    timeframe = models.CharField(
+        verbose_name=_("timeframe"),
+        choices=Strategy.TYPE_TIMEFRAME,
+        max_length=128,
+    )
+    signal = models.SmallIntegerField(_("signal"), choices=SIGNAL_CHOICES)
+    t = models.PositiveIntegerField(
+        verbose_name=_("time"),
+        help_text=_("the beginning time of the latest bar as a Unix epoch in seconds"),
+    )
+    close = models.FloatField(_("close"))
+    value = models.FloatField(_("value"), help_text=_("indicator value"))
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = "screener match"
+        verbose_name_plural = "screener matches"
+        ordering = ("condition", "asset__symbol")
+        unique_together = ("condition", "asset")
+
+    def __str__(self):
+        return f"{self.condition}: {self.asset.symbol} {self.get_signal_display()}"
+
+
+class Signal(models.Model):
+    """The decision of a strategy at the close of a bar."""
+
+    BUY = 1
+    SELL = -1
+    NONE = 0
+    SIGNAL_CHOICES = [
+        (BUY, _("buy")),
+        (SELL, _("sell")),
+        (NONE, _("none")),
+    ]
+
+    ORDER = "order"
+    HOLD = "hold"
+    SKIP = "skip"
+    DECISION_CHOICES = [
+        (ORDER, _("order")),
+        (HOLD, _("hold")),
+        (SKIP, _("skip")),
+    ]
+
+    strategy = models.ForeignKey(
+        Strategy,
+        verbose_name=_("strategy"),
+        related_name="signals",
+        on_delete=models.CASCADE,
+    )
+    asset = models.ForeignKey(
+        Asset,
+        verbose_name=_("asset"),
+        related_name="+",
+        on_delete=models.CASCADE,
+    )
+    t = models.PositiveIntegerField(
+        verbose_name=_("time"),
+        help_text=_("the beginning time of the bar as a Unix epoch in seconds"),
+    )
+    signal = models.SmallIntegerField(_("signal"), choices=SIGNAL_CHOICES)
+    decision = models.CharField(
+        verbose_name=_("decision"),
+        choices=DECISION_CHOICES,
+        max_length=8,
+    )
+    # Close and indicator values of the bar, keyed by name
+    values = models.JSONField(verbose_name=_("values"), default=dict)
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = "signal"
+        verbose_name_plural = "signals"
+        # The (strategy ASC, t ASC) index of the constraint also serves the
+        # latest signal of each strategy, scanned backwards when ordered by
+        # (-strategy, -t)
+        unique_together = ("strategy", "t")
+
+    def __str__(self):
+        return f"Strategy {self.strategy_id} at {self.t}: {self.decision}"
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from django.conf import settings
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket rate limiter.
+
+    Tokens are added continuously at `rate` per second, up to `capacity`, and
+    each request takes one, waiting until one is available.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout=None):
+        """
+        Take a token, waiting until one is available.
+
+        :param timeout(float): maximum seconds to wait, waits indefinitely if
+        not given
+        :return(bool): true if a token was taken
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+_alpaca_bucket = None
+_alpaca_bucket_lock = threading.Lock()
+
+
+def alpaca_bucket():
+    """
+    Return the token bucket shared by requests to the Alpaca api from this
+    process, allowing `ALPACA_RATE_LIMIT` requests per minute.
+    """
+    global _alpaca_bucket
+    with _alpaca_bucket_lock:
+        if _alpaca_bucket is None:
+            limit = settings.ALPACA_RATE_LIMIT
+            _alpaca_bucket = TokenBucket(rate=limit / 60, capacity=limit)
+        return _alpaca_bucket
@@ -0,0 +1,376 @@
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pytz
+from accounts.clients import Client
+from accounts.ledger import Ledger
+from alpaca_trade_api import entity
+from alpaca_trade_api.rest import APIError
+from assets.arrays import bar_arrays
+from assets.models import Bar, BarCoverage
+from django.core.cache import cache
+from django.db import transaction
+from freezegun import freeze_time
+from orders.models import Order
+
+from .backtest import DEFAULT_INITIAL_CASH, to_epoch
+from .clock import CLOCK_CACHE_KEY
+from .models import Strategy
+from .ratelimit import TokenBucket
+from .tasks import run_strategies_for_users
+
+logger = logging.getLogger(__name__)
+
+# Modules whose `TradeApiRest` is replaced by the replay broker
+BROKER_TARGETS = [
+    "core.tasks.TradeApiRest",
+    "core.clock.TradeApiRest",
+    "assets.tasks.TradeApiRest",
+]
+
+
+def isoformat(epoch):
+    """Return a Unix epoch as an ISO 8601 UTC timestamp."""
+    return datetime.fromtimestamp(epoch, pytz.utc).isoformat()
+
+
+class ReplayBroker:
+    """
+    Local stand-in for `TradeApiRest` which serves replayed bars and fills
+    orders at the latest closed bar's price.
+
+    Responses are Alpaca entities, so the live code path handles them exactly
+    as it would responses from the Alpaca api.
+    """
+
+    def __init__(self, bars, timeframe, cash=DEFAULT_INITIAL_CASH):
+        """
+        :param bars(dict): bar columns of each symbol
+        :param timeframe(str): bar timeframe eg. 15Min
+        :param cash(float): initial cash balance
+        """
+        self.bars = bars
+        self.timeframe = timeframe
+        self.duration = Bar.TIMEFRAME_SECONDS[timeframe]
+        self.cash = float(cash)
+        self.positions = {}
+        self.orders = []
+        self.now = 0
+        # Orders are submitted from a pool of threads
+        self._lock = threading.Lock()
+
+    def _closed_count(self, symbol):
+        """Return the number of bars of a symbol closed by the current time."""
+        return int(
+            np.searchsorted(self.bars[symbol].t, self.now - self.duration, "right")
+        )
+
+    def _price(self, symbol):
+        """Return the close of the latest closed bar of a symbol."""
+        count = self._closed_count(symbol)
+        if not count:
+            raise APIError({"code": 40410000, "message": f"no bars for {symbol}"})
+        return float(self.bars[symbol].c[count - 1])
+
+    def is_market_open(self):
+        return True
+
+    def get_clock(self):
+        return entity.Clock(
+            {
+                "timestamp": isoformat(self.now),
+                "is_open": True,
+                "next_open": isoformat(self.now),
+                "next_close": isoformat(self.now + self.duration),
+            }
+        )
+
+    def get_bars(
+        self,
+        symbols,
+        timeframe,
+        limit=None,
+        start=None,
+        end=None,
+        after=None,
+        until=None,
+    ):
+        """Return up to `limit` of the latest closed bars of each symbol."""
+        limit = limit or 100
+        barset = {}
+        for symbol in symbols.split(","):
+            if symbol not in self.bars:
+                continue
+            bars = self.bars[symbol]
+            upper = self._closed_count(symbol)
+            lower = max(upper - int(limit), 0)
+            barset[symbol] = [
+                entity.Bar(
+                    {
+                        "t": int(bars.t[index]),
+                        "o": float(bars.o[index]),
+                        "h": float(bars.h[index]),
+                        "l": float(bars.l[index]),
+                        "c": float(bars.c[index]),
+                        "v": int(bars.v[index]),
+                    }
+                )
+                for index in range(lower, upper)
+            ]
+        return barset
+
+    def _market_value(self):
+        return sum(qty * self._price(symbol) for symbol, qty in self.positions.items())
+
+    def account_info(self):
+        equity = self.cash + self._market_value()
+        return entity.Account(
+            {
+                "status": "ACTIVE",
+                "currency": "USD",
+                "cash": str(self.cash),
+                "equity": str(equity),
+                "last_equity": str(equity),
+                "buying_power": str(self.cash),
+                "trading_blocked": False,
+            }
+        )
+
+    def list_position_by_symbol(self, symbol):
+        qty = self.positions.get(symbol)
+        if not qty:
+            raise APIError({"code": 40410000, "message": "position does not exist"})
+        return entity.Position(
+            {
+                "symbol": symbol,
+                "qty": str(qty),
+                "side": "long",
+                "market_value": str(qty * self._price(symbol)),
+            }
+        )
+
+    def list_positions(self):
+        return [self.list_position_by_symbol(symbol) for symbol in self.positions]
+
+    def submit_order(
+        self,
+        symbol,
+        qty=None,
+        side=Order.BUY,
+        type=Order.MARKET,
+        time_in_force=Order.DAY,
+        limit_price=None,
+        stop_price=None,
+        client_order_id=None,
+        order_class=None,
+        take_profit=None,
+        stop_loss=None,
+        trail_price=None,
+        trail_percent=None,
+        notional=None,
+    ):
+        """Fill an order immediately at the latest closed bar's price."""
+        with self._lock:
+            return self._fill(
+                symbol,
+                qty,
+                side,
+                type,
+                time_in_force,
+                limit_price,
+                stop_price,
+                client_order_id,
+                order_class,
+                notional,
+            )
+
+    def _fill(
+        self,
+        symbol,
+        qty,
+        side,
+        type,
+        time_in_force,
+        limit_price,
+        stop_price,
+        client_order_id,
+        order_class,
+        notional,
+    ):
+        price = self._price(symbol)
+        qty = round(float(qty) if qty is not None else float(notional) / price, 5)
+        held = self.positions.get(symbol, 0)
+        if side == Order.SELL:
+            # Allow for notional orders rounding up past the position
+            if qty > held + 1e-5:
+                raise APIError({"code": 40310000, "message": "insufficient qty"})
+            qty = min(qty, held)
+
+        if side == Order.BUY:
+            self.cash -= qty * price
+            self.positions[symbol] = held + qty
+        else:
+            self.cash += qty * price
+            self.positions[symbol] = held - qty
+            if not self.positions[symbol]:
+                del self.positions[symbol]
+
+        now = isoformat(self.now)
+        order = {
+            "id": str(uuid.uuid4()),
+            "client_order_id": client_order_id or str(uuid.uuid4()),
+            "created_at": now,
+            "updated_at": now,
+            "submitted_at": now,
+            "filled_at": now,
+            "symbol": symbol,
+            "notional": str(notional) if notional is not None else None,
+            # Alpaca only returns the quantity of notional orders once filled
+            "qty": str(qty) if notional is None else None,
+            "filled_qty": str(qty),
+            "filled_avg_price": str(price),
+            "order_class": order_class or Order.SIMPLE,
+            "type": type,
+            "side": side,
+            "time_in_force": time_in_force,
+            "limit_price": limit_price,
+            "stop_price": stop_price,
+            "status": Order.FILLED,
+            "extended_hours": False,
+            "legs": None,
+        }
+        self.orders.append(order)
+        return entity.Order(order)
+
+
+class ReplayClients:
+    """
+    Stand-in for the pool of Alpaca clients, which places the orders of every
+    account with the replay broker.
+    """
+
+    def __init__(self, broker):
+        self._client = Client(None, broker, TokenBucket(rate=1e9, capacity=1e9), None)
+
+    def client(self, user):
+        return self._client
+
+    def get(self, credentials):
+        return self._client
+
+
+def percentile(values, q):
+    """Return a percentile of values, or None if there are none."""
+    if not values:
+        return None
+    return float(np.percentile(values, q))
+
+
+def replay(start, end, user=None, timeframe=Bar.MIN_15, cash=DEFAULT_INITIAL_CASH):
+    """
+    Replay stored bars through the live strategy runner.
+
+    Stored bars from `start` are removed, then fed back one bar close at a
+    time by a local broker while the clock is frozen at each close, so
+    `run_strategies_for_users` fetches bars, computes signals and saves orders
+    exactly as it does live, at many times real speed. All changes are rolled
+    back afterwards.
+
+    :param start(datetime): start of the replay
+    :param end(datetime): end of the replay
+    :param user(User): only run the strategies of this user
+    :param timeframe(str): bar timeframe of the strategies replayed eg. 15Min
+    :param cash(float): initial cash balance of the broker
+    :return(dict): number of cycles, bars and orders, throughput and cycle
+    latency percentiles
+    """
+    strategies = Strategy.objects.filter(
+        start_date__lt=end, end_date__gt=start, timeframe=timeframe
+    )
+    if user is not None:
+        strategies = strategies.filter(user=user)
+    symbols = list(
+        strategies.order_by().values_list("asset__symbol", flat=True).distinct()
+    )
+
+    start, end = to_epoch(start), to_epoch(end)
+    latencies = []
+    with transaction.atomic():
+        bars = {
+            symbol: bar_arrays(
+                Bar.objects.filter(asset__symbol=symbol, timeframe=timeframe, t__lt=end)
+            )
+            for symbol in symbols
+        }
+        Bar.objects.filter(
+            asset__symbol__in=symbols, timeframe=timeframe, t__gte=start
+        ).delete()
+        BarCoverage.objects.filter(
+            asset__symbol__in=symbols,
+            timeframe=timeframe,
+            session__close__gt=isoformat(start),
+        ).delete()
+
+        # Run a cycle as each bar closes
+        times = [bars[symbol].t for symbol in symbols]
+        times = np.unique(np.concatenate(times)) if times else np.empty(0)
+        closes = times[times >= start] + Bar.TIMEFRAME_SECONDS[timeframe]
+
+        broker = ReplayBroker(bars, timeframe, cash)
+        patches = [patch(target, lambda: broker) for target in BROKER_TARGETS]
+        # Size orders from the broker's cash and positions, which the ledger
+        # doesn't follow
+        patches.append(
+            patch("core.tasks.Ledger", lambda user, api: Ledger(user, api, local=False))
+        )
+        # Accounts with credentials trade with the broker, rather than their
+        # own Alpaca client
+        clients = ReplayClients(broker)
+        patches.append(patch("core.tasks.client_manager", lambda: clients))
+        # The replay broker isn't rate limited
+        patches.append(
+            patch(
+                "orders.submission.alpaca_bucket",
+                lambda: TokenBucket(rate=1e9, capacity=1e9),
+            )
+        )
+        for broker_patch in patches:
+            broker_patch.start()
+        # Use the broker's clock, rather than one cached from the Alpaca api
+        cache.delete(CLOCK_CACHE_KEY)
+        try:
+            with freeze_time(isoformat(start)) as clock:
+                replay_start = time.perf_counter()
+                for close in closes:
+                    broker.now = int(close)
+                    clock.move_to(isoformat(close))
+                    cycle_start = time.perf_counter()
+                    run_strategies_for_users(user.id if user else None, timeframe)
+                    latencies.append(time.perf_counter() - cycle_start)
+                elapsed = time.perf_counter() - replay_start
+        finally:
+            for broker_patch in patches:
+                broker_patch.stop()
+            cache.delete(CLOCK_CACHE_KEY)
+            transaction.set_rollback(True)
+
+    replayed_bars = int(sum(np.count_nonzero(bars[s].t >= start) for s in symbols))
+    simulated = float(closes[-1] - closes[0]) if len(closes) else 0.0
+    return {
+        "symbols": len(symbols),
+        "cycles": len(closes),
+        "bars": replayed_bars,
+        "orders": len(broker.orders),
+        "elapsed_seconds": elapsed,
+        "bars_per_second": replayed_bars / elapsed if elapsed else None,
+        "speedup": simulated / elapsed if elapsed else None,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "latency_max": max(latencies) if latencies else None,
+    }
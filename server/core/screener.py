@@ -0,0 +1,165 @@
+import logging
+from collections import defaultdict
+
+import numpy as np
+from assets.models import Asset, Bar
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import ScreenerMatch
+from .strategies import WARM_UP_PERIODS
+
+logger = logging.getLogger(__name__)
+
+# Latest closes of every active asset, with one row per asset. The lateral
+# subquery reads the latest bars of each asset from the (asset, timeframe, t)
+# unique index, rather than ranking every bar in the table.
+LATEST_CLOSES_SQL = f"""
+    SELECT asset.id, latest.t, latest.closes
+    FROM {Asset._meta.db_table} asset
+    CROSS JOIN LATERAL (
+        SELECT max(bar.t) AS t, array_agg(bar.c::float8 ORDER BY bar.t) AS closes
+        FROM (
+            SELECT t, c
+            FROM {Bar._meta.db_table}
+            WHERE asset_id = asset.id AND timeframe = %s
+            ORDER BY t DESC
+            LIMIT %s
+        ) bar
+    ) latest
+    WHERE asset.status = %s AND latest.t IS NOT NULL
+"""
+
+
+def latest_closes(timeframe, count):
+    """
+    Return the latest closes of every active asset as a matrix.
+
+    :param timeframe(str): bar timeframe eg. 15Min
+    :param count(int): number of bars per asset
+    :return(tuple): asset ids, the time of each asset's latest bar, and closes
+    with a row per asset ordered by time, padded with leading NaNs where an
+    asset has fewer than `count` bars
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(LATEST_CLOSES_SQL, [timeframe, count, Asset.ACTIVE])
+        rows = cursor.fetchall()
+
+    asset_ids = [row[0] for row in rows]
+    t = np.array([row[1] for row in rows], dtype=np.int64)
+    close = np.full((len(rows), count), np.nan)
+    for index, (_, _, closes) in enumerate(rows):
+        close[index, count - len(closes) :] = closes
+    return asset_ids, t, close
+
+
+def latest_sma(close, window):
+    """
+    Return the simple moving average at the last two bars of each row of
+    closes, or NaN where there is insufficient history.
+    """
+    return np.stack(
+        [close[:, -window - 1 : -1].mean(axis=1), close[:, -window:].mean(axis=1)],
+        axis=1,
+    )
+
+
+def latest_ema(close, window):
+    """
+    Return the exponential moving average at the last two bars of each row of
+    closes, or NaN where there is insufficient history.
+    """
+    alpha = 2 / (window + 1)
+    previous = average = close[:, :window].mean(axis=1)
+    # Each value depends on the previous one, so step through bars while
+    # computing every asset at once
+    for column in close.T[window:]:
+        previous, average = average, average + alpha * (column - average)
+    return np.stack([previous, average], axis=1)
+
+
+# Moving averages by name, with the number of bars each requires
+MOVING_AVERAGES = {
+    "sma": (latest_sma, lambda window: window + 1),
+    "ema": (latest_ema, lambda window: window * WARM_UP_PERIODS + 1),
+}
+
+
+def lookback(condition):
+    """Return the number of bars a screener condition requires."""
+    return MOVING_AVERAGES[condition["indicator"]][1](condition["window"])
+
+
+def screen(condition, asset_ids, t, close):
+    """
+    Return the assets crossing the moving average of a screener condition.
+
+    Assets cross when their close moves from one side of the average at the
+    previous bar, to the other side at the latest bar. Only assets with a bar
+    in the latest period are matched, so stale bars are never reported.
+
+    :param condition(dict): screener condition
+    :param asset_ids(list): asset ids
+    :param t(ndarray): time of each asset's latest bar
+    :param close(ndarray): closes with a row per asset, ordered by time
+    :return(list): unsaved screener matches
+    """
+    if not asset_ids:
+        return []
+
+    average, _ = MOVING_AVERAGES[condition["indicator"]]
+    close = close[:, -lookback(condition) :]
+    values = average(close, condition["window"])
+    latest = close[:, -2:]
+
+    # Comparisons with NaN are false, so assets without enough bars never match
+    buy = (latest[:, 1] >= values[:, 1]) & (latest[:, 0] < values[:, 0])
+    sell = (latest[:, 1] <= values[:, 1]) & (latest[:, 0] > values[:, 0])
+    signals = np.where(buy, ScreenerMatch.BUY, np.where(sell, ScreenerMatch.SELL, 0))
+    signals[t < t.max()] = 0
+
+    return [
+        ScreenerMatch(
+            condition=condition["name"],
+            asset_id=asset_ids[index],
+            timeframe=condition["timeframe"],
+            signal=int(signals[index]),
+            t=int(t[index]),
+            close=float(latest[index, 1]),
+            value=float(values[index, 1]),
+        )
+        for index in np.flatnonzero(signals)
+    ]
+
+
+def run_screener(conditions=None):
+    """
+    Screen every active asset, and replace the stored matches of each
+    condition.
+
+    The latest bars of every asset are loaded in one query per timeframe, and
+    each condition is evaluated across all assets at once.
+
+    :param conditions(list): screener conditions, defaults to
+    `SCREENER_CONDITIONS`
+    :return(list): screener matches
+    """
+    conditions = conditions or settings.SCREENER_CONDITIONS
+    timeframes = defaultdict(list)
+    for condition in conditions:
+        timeframes[condition["timeframe"]].append(condition)
+
+    matches = []
+    for timeframe, timeframe_conditions in timeframes.items():
+        count = max(lookback(condition) for condition in timeframe_conditions)
+        asset_ids, t, close = latest_closes(timeframe, count)
+        for condition in timeframe_conditions:
+            matches += screen(condition, asset_ids, t, close)
+
+    with transaction.atomic():
+        ScreenerMatch.objects.filter(
+            condition__in=[condition["name"] for condition in conditions]
+        ).delete()
+        ScreenerMatch.objects.bulk_create(matches)
+
+    return matches
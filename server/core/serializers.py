@@ -3,7 +3,7 @@ from rest_framework import serializers
 from users.models import User
 from users.serializers import UserSerializer
 
-from .models import Strategy
+from .models import ScreenerMatch, Signal, Strategy
 
 
 class StrategySerializer(serializers.ModelSerializer):
@@ -92,3 +92,57 @@ class StrategyCreateSerializer(serializers.ModelSerializer):
             )
 
         return data
+
+
+class ScreenerMatchSerializer(serializers.ModelSerializer):
+    """Serializer for listing/retrieving a screener match."""
+
+    asset = serializers.SlugRelatedField(read_only=True, slug_field="symbol")
+
+    class Meta:
+        model = ScreenerMatch
+        fields = (
+            "id",
+            "condition",
+            "asset",
+            "timeframe",
+            "signal",
+            "t",
+            "close",
+            "value",
+            "created_at",
+        )
+        read_only_fields = fields
+
+
+class SignalSerializer(serializers.ModelSerializer):
+    """Serializer for listing/retrieving the decisions of strategies."""
+
+    asset = serializers.SlugRelatedField(read_only=True, slug_field="symbol")
+
+    class Meta:
+        model = Signal
+        fields = (
+            "id",
+            "strategy",
+            "asset",
+            "t",
+            "signal",
+            "decision",
+            "values",
+            "created_at",
+        )
+        read_only_fields = fields
+
+
+class PerformanceSerializer(serializers.Serializer):
+    """Serializer for the performance of a user's or a strategy's fills."""
+
+    t = serializers.ListField(child=serializers.IntegerField())
+    equity = serializers.ListField(child=serializers.FloatField())
+    total_return = serializers.FloatField()
+    max_drawdown = serializers.FloatField()
+    sharpe_ratio = serializers.FloatField()
+    sortino_ratio = serializers.FloatField()
+    win_rate = serializers.FloatField()
+    trades = serializers.IntegerField()
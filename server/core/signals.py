@@ -16,18 +16,82 @@ def create_periodic_tasks(
     CrontabSchedule = apps.get_model("django_celery_beat.CrontabSchedule")
     PeriodicTask = apps.get_model("django_celery_beat.PeriodicTask")
 
-    every_15_minutes, _ = CrontabSchedule.objects.get_or_create(
-        minute="15", hour="*", day_of_week="*", day_of_month="*", month_of_year="*"
+    every_minute, _ = CrontabSchedule.objects.get_or_create(
+        minute="*", hour="*", day_of_week="*", day_of_month="*", month_of_year="*"
+    )
+
+    every_quarter_hour, _ = CrontabSchedule.objects.get_or_create(
+        minute="*/15", hour="*", day_of_week="*", day_of_month="*", month_of_year="*"
+    )
+
+    daily, _ = CrontabSchedule.objects.get_or_create(
+        minute="0", hour="0", day_of_week="*", day_of_month="*", month_of_year="*"
     )
 
     tasks = [
         {
-            "name": "Moving average strategy",
-            "task": "core.tasks.run_strategies_for_users",
-            "crontab": every_15_minutes,
+            "name": "Schedule strategy cycles",
+            "task": "core.tasks.schedule_strategy_cycles",
+            "crontab": every_minute,
+        },
+        {
+            "name": "Monitor exits",
+            "task": "core.tasks.monitor_exits",
+            "crontab": every_minute,
+        },
+        {
+            "name": "Screen universe",
+            "task": "core.tasks.screen_universe",
+            "crontab": every_quarter_hour,
+        },
+        {
+            "name": "Sync accounts",
+            "task": "accounts.tasks.sync_accounts",
+            "crontab": every_minute,
+        },
+        {
+            "name": "Reconcile positions",
+            "task": "accounts.tasks.reconcile_positions",
+            "crontab": every_quarter_hour,
+        },
+        {
+            "name": "Sync portfolio history",
+            "task": "accounts.tasks.sync_portfolio_history",
+            "crontab": every_quarter_hour,
+        },
+        {
+            "name": "Sync orders",
+            "task": "orders.tasks.sync_orders",
+            "crontab": every_quarter_hour,
+        },
+        {
+            "name": "Sync bar cache",
+            "task": "assets.tasks.sync_bar_cache",
+            "crontab": every_quarter_hour,
+        },
+        {
+            "name": "Update trading calendar",
+            "task": "assets.tasks.update_trading_calendar",
+            "crontab": daily,
+        },
+        {
+            "name": "Maintain bar partitions",
+            "task": "assets.tasks.maintain_bar_partitions",
+            "crontab": daily,
+        },
+        {
+            "name": "Compact intraday bars",
+            "task": "assets.tasks.compact_intraday_bars",
+            "crontab": daily,
         },
     ]
 
+    # Strategy cycles are dispatched by the scheduler, aligned to bar closes,
+    # replacing the hourly strategy task
+    PeriodicTask.objects.filter(
+        name="Moving average strategy", task="core.tasks.run_strategies_for_users"
+    ).delete()
+
     for task in tasks:
         periodic_task = PeriodicTask.objects.filter(name=task["name"])
         if not periodic_task.exists():
@@ -0,0 +1,224 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from .indicators import crossover
+from .models import Strategy
+
+# Strategy types by `Strategy.type`
+STRATEGIES = {}
+
+# Latest bar time and close, signal and indicator values of a strategy
+Evaluation = namedtuple("Evaluation", ["t", "close", "signal", "values"])
+
+# Multiple of the period of recursive indicators (eg. EMA, RSI) loaded as
+# history, so their values have converged from the initial seed
+WARM_UP_PERIODS = 4
+
+
+def register(cls):
+    """Register a strategy type."""
+    STRATEGIES[cls.type] = cls()
+    return cls
+
+
+def get_strategy(strategy_type):
+    """Return the registered strategy type for a `Strategy.type`."""
+    return STRATEGIES[strategy_type]
+
+
+class StrategyType:
+    """
+    Base class of strategy types.
+
+    Strategy types compute buy (1) and sell (-1) signals for every bar from
+    NumPy arrays, so the same code is used to backtest a whole history and to
+    find the signal of the latest bar live.
+    """
+
+    type = None
+
+    def lookback(self, timeframe):
+        """Return the number of bars required to compute the latest signal."""
+        raise NotImplementedError
+
+    def signals(self, indicators, timeframe):
+        """
+        Return buy (1) and sell (-1) signals for every bar.
+
+        :param indicators(Indicators): indicators of the bars
+        :param timeframe(str): bar timeframe eg. 15Min
+        :return(ndarray): signals
+        """
+        raise NotImplementedError
+
+    def values(self, indicators, timeframe):
+        """
+        Return the indicator values of the latest bar, which are recorded with
+        its signal.
+
+        :return(dict): values keyed by name
+        """
+        return {}
+
+
+class MovingAverageCrossover(StrategyType):
+    """
+    Buy when the close crosses above its moving average, sell when below.
+
+    Until there is a full window of bars, the average is of the bars so far.
+    """
+
+    business_days = None
+    min_periods = 1
+
+    def window(self, timeframe):
+        return self.business_days * Strategy.BARS_PER_DAY[timeframe]
+
+    def lookback(self, timeframe):
+        return self.window(timeframe)
+
+    def signals(self, indicators, timeframe):
+        average = indicators("sma", self.window(timeframe), self.min_periods)
+        return crossover(indicators.bars.c, average)
+
+    def values(self, indicators, timeframe):
+        average = indicators("sma", self.window(timeframe), self.min_periods)
+        return {"sma": average[-1]}
+
+
+@register
+class SevenDayMovingAverage(MovingAverageCrossover):
+    type = Strategy.MOVING_AVERAGE_7D
+    business_days = 5
+
+
+@register
+class FourteenDayMovingAverage(MovingAverageCrossover):
+    type = Strategy.MOVING_AVERAGE_14D
+    business_days = 10
+
+
+@register
+class RelativeStrength(StrategyType):
+    """Buy when RSI crosses above the oversold level, sell when below overbought."""
+
+    type = Strategy.RSI
+    period = 14
+    oversold = 30
+    overbought = 70
+
+    def lookback(self, timeframe):
+        return self.period * WARM_UP_PERIODS + 1
+
+    def signals(self, indicators, timeframe):
+        strength = indicators("rsi", self.period)
+        buy = crossover(strength, self.oversold) > 0
+        sell = crossover(strength, self.overbought) < 0
+        return np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+
+    def values(self, indicators, timeframe):
+        return {"rsi": indicators("rsi", self.period)[-1]}
+
+
+@register
+class MovingAverageConvergenceDivergence(StrategyType):
+    """Buy when the MACD line crosses above its signal line, sell when below."""
+
+    type = Strategy.MACD
+    fast = 12
+    slow = 26
+    signal = 9
+
+    def lookback(self, timeframe):
+        return (self.slow + self.signal) * WARM_UP_PERIODS
+
+    def signals(self, indicators, timeframe):
+        line, signal_line, _ = indicators("macd", self.fast, self.slow, self.signal)
+        return crossover(line, signal_line)
+
+    def values(self, indicators, timeframe):
+        line, signal_line, _ = indicators("macd", self.fast, self.slow, self.signal)
+        return {"macd": line[-1], "signal": signal_line[-1]}
+
+
+@register
+class BollingerBands(StrategyType):
+    """
+    Buy when the close crosses back above the lower band, and sell when it
+    crosses back below the upper band.
+    """
+
+    type = Strategy.BOLLINGER_BANDS
+    window = 20
+    deviations = 2
+
+    def lookback(self, timeframe):
+        return self.window
+
+    def signals(self, indicators, timeframe):
+        _, upper, lower = indicators("bollinger_bands", self.window, self.deviations)
+        close = indicators.bars.c
+        buy = crossover(close, lower) > 0
+        sell = crossover(close, upper) < 0
+        return np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+
+    def values(self, indicators, timeframe):
+        _, upper, lower = indicators("bollinger_bands", self.window, self.deviations)
+        return {"upper": upper[-1], "lower": lower[-1]}
+
+
+def lookback_days(strategy_type, timeframe):
+    """
+    Return the number of calendar days of bars required by a strategy type,
+    allowing for weekends.
+    """
+    business_days = math.ceil(
+        get_strategy(strategy_type).lookback(timeframe)
+        / Strategy.BARS_PER_DAY[timeframe]
+    )
+    return business_days + 2 * math.ceil(business_days / 5)
+
+
+def evaluate(strategy, cache, timeframe=None):
+    """
+    Evaluate a strategy at its latest bar.
+
+    :param strategy(Strategy): strategy to run
+    :param cache(IndicatorCache): bars and indicators of the current cycle
+    :param timeframe(str): bar timeframe, defaults to the strategy's timeframe
+    :return(Evaluation): latest bar time and close, signal and indicator
+    values, or None without bars
+    """
+    timeframe = timeframe or strategy.timeframe
+    strategy_type = get_strategy(strategy.type)
+    # One more bar than required, to compare with the previous bar
+    count = strategy_type.lookback(timeframe) + 1
+    indicators = cache.series(strategy.asset_id, timeframe, count)
+    if not len(indicators.bars.t):
+        return None
+    signals = strategy_type.signals(indicators, timeframe)
+    values = {
+        name: None if np.isnan(value) else float(value)
+        for name, value in strategy_type.values(indicators, timeframe).items()
+    }
+    return Evaluation(
+        t=int(indicators.bars.t[-1]),
+        close=float(indicators.bars.c[-1]),
+        signal=int(signals[-1]),
+        values=values,
+    )
+
+
+def latest_signal(strategy, cache, timeframe=None):
+    """
+    Return the signal of the latest bar for a strategy.
+
+    :param strategy(Strategy): strategy to run
+    :param cache(IndicatorCache): bars and indicators of the current cycle
+    :param timeframe(str): bar timeframe, defaults to the strategy's timeframe
+    :return(int): buy (1), sell (-1) or no signal (0)
+    """
+    evaluation = evaluate(strategy, cache, timeframe)
+    return evaluation.signal if evaluation else 0
@@ -0,0 +1,263 @@
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from assets.cache import BarCache
+from assets.models import Asset
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .backtest import run_backtest, to_epoch
+from .indicators import crossover, sma
+from .metrics import TRADING_DAYS_PER_YEAR
+from .models import Strategy, Sweep, SweepResult
+
+logger = logging.getLogger(__name__)
+
+# Metrics where a lower value ranks higher
+ASCENDING_METRICS = {"max_drawdown"}
+
+
+def parameter_grid(
+    windows, timeframes, stop_loss_percentages=None, take_profit_percentages=None
+):
+    """
+    Return every combination of strategy parameters.
+
+    :param windows(list): moving average windows in business days
+    :param timeframes(list): bar timeframes eg. 15Min
+    :param stop_loss_percentages(list): stop loss percentages, None for no stop
+    :param take_profit_percentages(list): take profit percentages, None for none
+    :return(list): parameter dicts
+    """
+    return [
+        {
+            "timeframe": timeframe,
+            "window": window,
+            "stop_loss_percentage": stop_loss,
+            "take_profit_percentage": take_profit,
+        }
+        for timeframe, window, stop_loss, take_profit in itertools.product(
+            timeframes,
+            windows,
+            stop_loss_percentages or [None],
+            take_profit_percentages or [None],
+        )
+    ]
+
+
+def sweep_parameters(sweep):
+    """
+    Return the parameter combinations searched by a sweep.
+
+    Random searches sample (without replacement) from the grid, so repeated
+    runs with the same seed search the same combinations.
+    """
+    grid = parameter_grid(
+        sweep.parameters["windows"],
+        sweep.parameters["timeframes"],
+        sweep.parameters.get("stop_loss_percentages"),
+        sweep.parameters.get("take_profit_percentages"),
+    )
+    if sweep.search == Sweep.RANDOM and sweep.samples and sweep.samples < len(grid):
+        grid = random.Random(sweep.seed).sample(grid, sweep.samples)
+    return grid
+
+
+def sweep_chunks(sweep, chunk_size=None):
+    """
+    Split a sweep into chunks of parameters for one symbol and timeframe.
+
+    Each chunk loads the bars of its symbol and timeframe once, and shares the
+    signals of its windows between backtests.
+
+    :return(list): (symbol, timeframe, parameters) tuples
+    """
+    if chunk_size is None:
+        chunk_size = settings.SWEEP_CHUNK_SIZE
+    parameters = sorted(
+        sweep_parameters(sweep),
+        key=lambda params: (params["timeframe"], params["window"]),
+    )
+    chunks = []
+    for symbol in sweep.symbols:
+        for timeframe, group in itertools.groupby(
+            parameters, key=lambda params: params["timeframe"]
+        ):
+            group = list(group)
+            for index in range(0, len(group), chunk_size):
+                chunks.append((symbol, timeframe, group[index : index + chunk_size]))
+    return chunks
+
+
+def backtest_chunk(
+    symbol, timeframe, parameters, trade_value, start=None, end=None, root=None
+):
+    """
+    Backtest parameter combinations for a symbol and timeframe.
+
+    Bars are read from the memory mapped bar cache, so workers on the same host
+    share a single read-only copy of the data through the page cache. This
+    doesn't access the database, so can run in a process pool.
+
+    :param symbol(str): asset symbol
+    :param timeframe(str): bar timeframe eg. 15Min
+    :param parameters(list): parameter dicts with the same timeframe
+    :param trade_value(float): maximum notional value of each order
+    :param start(int): Unix epoch to start trading from
+    :param end(int): Unix epoch to end the backtest before
+    :param root(str): bar cache directory
+    :return(list): (parameters, stats) tuples
+    """
+    bars = BarCache(root).load(symbol, timeframe, end=end)
+    bars_per_day = Strategy.BARS_PER_DAY[timeframe]
+    signals = {}
+    results = []
+    for params in parameters:
+        window = params["window"] * bars_per_day
+        if window not in signals:
+            signals[window] = crossover(bars.c, sma(bars.c, window, 1))
+        result = run_backtest(
+            bars,
+            signals[window],
+            trade_value,
+            start=start,
+            periods_per_year=TRADING_DAYS_PER_YEAR * bars_per_day,
+            stop_loss_percentage=params["stop_loss_percentage"],
+            take_profit_percentage=params["take_profit_percentage"],
+        )
+        results.append((params, result.stats))
+    return results
+
+
+def sync_sweep_bars(sweep, cache=None):
+    """
+    Sync the bar cache for the symbols and timeframes of a sweep.
+
+    :return(list): symbols with no asset, which are skipped
+    """
+    cache = cache or BarCache()
+    assets = Asset.objects.in_bulk(sweep.symbols, field_name="symbol")
+    missing = [symbol for symbol in sweep.symbols if symbol not in assets]
+    for symbol in missing:
+        logger.warning(f"Sweep {sweep.id}: asset does not exist: {symbol}")
+    for asset in assets.values():
+        for timeframe in sweep.parameters["timeframes"]:
+            cache.sync(asset, timeframe)
+    return missing
+
+
+def score(stats, metric):
+    """
+    Return the score of backtest statistics, where higher ranks higher.
+
+    Statistics which can't be computed, eg. of an empty window, rank lowest.
+    """
+    value = stats[metric]
+    if value is None or math.isnan(value):
+        return -math.inf
+    if metric in ASCENDING_METRICS:
+        return -value
+    return value
+
+
+def save_results(sweep, symbol, results):
+    """Bulk create the results of a chunk."""
+    SweepResult.objects.bulk_create(
+        [
+            SweepResult(
+                sweep=sweep,
+                symbol=symbol,
+                timeframe=params["timeframe"],
+                window=params["window"],
+                stop_loss_percentage=params["stop_loss_percentage"],
+                take_profit_percentage=params["take_profit_percentage"],
+                stats=stats,
+                score=score(stats, sweep.metric),
+            )
+            for params, stats in results
+        ]
+    )
+
+
+def rank_results(sweep):
+    """Rank the results of a sweep by score, and mark it as completed."""
+    results = list(sweep.results.order_by("-score", "id").only("id"))
+    for rank, result in enumerate(results, start=1):
+        result.rank = rank
+    SweepResult.objects.bulk_update(results, ["rank"], batch_size=1000)
+    sweep.status = Sweep.COMPLETED
+    sweep.completed_at = timezone.now()
+    sweep.save(update_fields=["status", "completed_at"])
+
+
+def chunk_kwargs(sweep):
+    """Return the keyword arguments shared by every chunk of a sweep."""
+    return {
+        "trade_value": float(sweep.trade_value),
+        "start": to_epoch(sweep.start_date),
+        "end": to_epoch(sweep.end_date),
+        "root": settings.BAR_CACHE_DIR,
+    }
+
+
+def run_sweep(sweep, workers=None):
+    """
+    Run a sweep in a pool of worker processes.
+
+    :param sweep(Sweep): sweep to run
+    :param workers(int): number of worker processes, defaults to
+    `SWEEP_WORKERS` or the number of CPUs
+    :return(Sweep): the completed sweep
+    """
+    workers = workers or settings.SWEEP_WORKERS or os.cpu_count()
+    missing = sync_sweep_bars(sweep)
+    chunks = [chunk for chunk in sweep_chunks(sweep) if chunk[0] not in missing]
+    kwargs = chunk_kwargs(sweep)
+
+    sweep.status = Sweep.RUNNING
+    sweep.chunks = len(chunks)
+    sweep.save(update_fields=["status", "chunks"])
+
+    if workers == 1:
+        results = (backtest_chunk(*chunk, **kwargs) for chunk in chunks)
+        for chunk, chunk_results in zip(chunks, results):
+            save_results(sweep, chunk[0], chunk_results)
+    else:
+        # Workers are forked so they inherit the configured Django setup, and
+        # don't use the database connections they inherit
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(backtest_chunk, *chunk, **kwargs) for chunk in chunks
+            ]
+            for chunk, future in zip(chunks, futures):
+                save_results(sweep, chunk[0], future.result())
+
+    sweep.completed_chunks = len(chunks)
+    sweep.save(update_fields=["completed_chunks"])
+    rank_results(sweep)
+    return sweep
+
+
+def complete_chunk(sweep_id, symbol, results):
+    """
+    Save the results of a chunk run by a Celery worker.
+
+    The results are ranked once the last chunk of the sweep completes.
+    """
+    with transaction.atomic():
+        sweep = Sweep.objects.select_for_update().get(pk=sweep_id)
+        save_results(sweep, symbol, results)
+        Sweep.objects.filter(pk=sweep_id).update(
+            completed_chunks=F("completed_chunks") + 1
+        )
+        sweep.refresh_from_db(fields=["completed_chunks"])
+        if sweep.completed_chunks >= sweep.chunks:
+            rank_results(sweep)
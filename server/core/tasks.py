@@ -1,195 +1,367 @@
 import logging
 import time
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 import pytz
-from alpaca_trade_api.rest import APIError
+from accounts.clients import client_manager
+from accounts.ledger import Ledger
+from assets.calendar import latest_sessions
 from assets.models import Bar
-from assets.tasks import update_bars
+from assets.tasks import load_sessions, update_bars
+from celery import group
 from config import celery_app
-from django.db.models import Avg, F, RowRange, Window
+from django.conf import settings
+from django.utils import timezone
 from orders.models import Order
+from orders.risk import RiskCheck
+from orders.submission import OrderSubmitter, order_intent
+from orders.writer import write_orders
 from users.models import User
 
 from core.alpaca import TradeApiRest
-from core.models import Strategy
+from core.clock import closed_timeframes, is_market_open
+from core.exits import exit_candidates, exit_intents, latest_prices
+from core.indicators import IndicatorCache
+from core.models import Signal, Strategy, Sweep
+from core.screener import run_screener
+from core.strategies import evaluate, get_strategy, lookback_days
+from core.sweep import (
+    backtest_chunk,
+    chunk_kwargs,
+    complete_chunk,
+    rank_results,
+    sweep_chunks,
+    sync_sweep_bars,
+)
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of symbols Alpaca returns bars for in one request
+MAX_SYMBOLS_PER_REQUEST = 200
+
+
+@celery_app.task(ignore_result=True)
+def schedule_strategy_cycles():
+    """
+    Dispatch a strategy cycle for each timeframe with a bar which has just
+    closed, `STRATEGY_CYCLE_OFFSET_SECONDS` after the close.
+
+    Runs every minute. Outside of sessions nothing is dispatched, and the
+    Alpaca api isn't called if the trading calendar has been loaded.
+    """
+    timeframes = list(
+        Strategy.objects.active()
+        .order_by()
+        .values_list("timeframe", flat=True)
+        .distinct()
+    )
+    if not timeframes:
+        return
+
+    for timeframe in closed_timeframes(timezone.now(), timeframes):
+        run_strategies_for_users.apply_async(
+            kwargs={"timeframe": timeframe},
+            countdown=settings.STRATEGY_CYCLE_OFFSET_SECONDS,
+        )
+
 
 @celery_app.task()
-def run_strategies_for_users(user_id=None):
-    """Run strategies for all users, unless a user is specified."""
+def run_strategies_for_users(user_id=None, timeframe=None):
+    """
+    Run strategies for all users, unless a user is specified.
+
+    Cycles dispatched by `schedule_strategy_cycles` for a timeframe only run
+    strategies with that timeframe, and have already been aligned to a session.
+    Otherwise strategies are only run while the market is open.
+
+    :param user_id(int): only run the strategies of this user
+    :param timeframe(str): only run strategies with this timeframe eg. 15Min
+    """
+    strategies = Strategy.objects.active()
+    if timeframe is not None:
+        strategies = strategies.filter(timeframe=timeframe)
+
     if user_id is None:
-        user_ids = Strategy.objects.active().values_list("user__id", flat=True)
+        user_ids = strategies.values_list("user__id", flat=True)
         users = User.objects.filter(id__in=user_ids)
     else:
+        strategies = strategies.filter(user_id=user_id)
         users = User.objects.filter(pk=user_id)
 
-    api = TradeApiRest()
-
-    if not api.is_market_open():
+    if timeframe is None and not is_market_open():
         return
 
+    # Fetch the latest bars of every user's strategies together, and share
+    # bars and indicators between them
+    update_latest_bars(strategies)
+    indicators = IndicatorCache()
     for user in users:
-        moving_average_strategy(user)
+        moving_average_strategy(user, indicators, timeframe, latest_bars=False)
 
 
-def moving_average_strategy(user):
-    """Initialise moving average strategy."""
+def update_latest_bars(strategies):
+    """
+    Fetch the latest bar of the assets of strategies, batched by timeframe.
+
+    :param strategies(QuerySet): strategies
+    """
+    timeframes = defaultdict(set)
+    for symbol, timeframe in strategies.values_list("asset__symbol", "timeframe"):
+        timeframes[timeframe].add(symbol)
+
+    for timeframe, symbols in timeframes.items():
+        symbols = sorted(symbols)
+        for index in range(0, len(symbols), MAX_SYMBOLS_PER_REQUEST):
+            update_bars(
+                symbols[index : index + MAX_SYMBOLS_PER_REQUEST], timeframe, limit=1
+            )
+
+
+def moving_average_strategy(user, indicators=None, timeframe=None, latest_bars=True):
+    """
+    Run the active strategies of a user, each with bars of its own timeframe.
+
+    Orders are sized from the user's position ledger, rather than requesting
+    their account and positions from Alpaca for each signal. Once every
+    strategy has run, the orders are checked together against the account's
+    buying power and risk limits, then submitted concurrently.
+
+    :param user(User): user whose strategies are run
+    :param indicators(IndicatorCache): bars and indicators of the current cycle
+    :param timeframe(str): only run strategies with this timeframe eg. 15Min
+    :param latest_bars(bool): fetch the latest bars of the strategies first
+    """
+    indicators = indicators or IndicatorCache()
     strategies = Strategy.objects.filter(user=user).active()
+    if timeframe is not None:
+        strategies = strategies.filter(timeframe=timeframe)
 
     if not strategies.exists():
         return
 
-    strategy_symbols = list(strategies.values_list("asset__symbol", flat=True))
-
-    # Update latest bars
-    update_bars(strategy_symbols, "15Min", limit=1)
+    if latest_bars:
+        update_latest_bars(strategies)
 
-    api = TradeApiRest()
+    evaluations = []
     for strategy in strategies:
         total_bars_count = fetch_bar_data_for_strategy(strategy)
         if not total_bars_count:
             logger.info(f"Insufficient bar data for asset: {strategy.asset.id}")
             continue
 
-        # Calculate moving average and conditionally place order
-        annotated_bars = Bar.objects.filter(asset_id=strategy.asset.id).annotate(
-            moving_average=Window(
-                expression=Avg("c"),
-                order_by=F("t").desc(),
-                frame=RowRange(start=0, end=int(total_bars_count - 1)),
-            ),
-        )
+        # Calculate the latest signal
+        evaluation = evaluate(strategy, indicators)
+        if evaluation is not None:
+            evaluations.append((strategy, evaluation))
 
-        latest_bar = annotated_bars.first()
-        previous_bar = annotated_bars[1]
-        symbol = strategy.asset.symbol
-        if (
-            latest_bar.c >= latest_bar.moving_average
-            and previous_bar.c < previous_bar.moving_average
-        ):
+    # Bars already decided by an earlier run of the same cycle are skipped
+    decided = set(
+        Signal.objects.filter(
+            strategy__in=[strategy for strategy, _ in evaluations],
+            t__in={evaluation.t for _, evaluation in evaluations},
+        ).values_list("strategy_id", "t")
+    )
+
+    # Users with credentials trade their own account, under its own rate limit
+    client = client_manager().client(user)
+    api = client.api if client is not None else TradeApiRest()
+    ledger = Ledger(user, api)
+    signals = []
+    intents = []
+    ordered = {}
+    prices = {
+        strategy.asset_id: evaluation.close for strategy, evaluation in evaluations
+    }
+    for strategy, evaluation in evaluations:
+        if (strategy.pk, evaluation.t) in decided:
+            logger.info(f"Signal already decided: {strategy.pk} at {evaluation.t}")
+            continue
+
+        signal = Signal(
+            strategy=strategy,
+            asset_id=strategy.asset_id,
+            t=evaluation.t,
+            signal=evaluation.signal,
+            decision=Signal.HOLD,
+            values={"close": evaluation.close, **evaluation.values},
+        )
+        signals.append(signal)
+        if evaluation.signal > 0:
             side = Order.BUY
-            account = api.account_info()
-            trade_value = min(
-                float(strategy.trade_value), float(account.__dict__["_raw"]["equity"])
-            )
-        elif (
-            latest_bar.c <= latest_bar.moving_average
-            and previous_bar.c > previous_bar.moving_average
-        ):
+            trade_value = float(strategy.trade_value)
+        elif evaluation.signal < 0:
             side = Order.SELL
-
-            try:
-                position = api.list_position_by_symbol(symbol)
-            except APIError:
-                logger.info(f"No position exists, unable to sell: {strategy.asset.id}")
+            market_value = ledger.long_value(strategy.asset, evaluation.close)
+            if market_value is None:
+                logger.info(f"No long position, unable to sell: {strategy.asset.id}")
+                signal.decision = Signal.SKIP
                 continue
-            else:
-                if position.__dict__["_raw"]["side"] == "short":
-                    logger.info(f"Asset is long, unable to sell: {strategy.asset.id}")
-                    continue
-
-            trade_value = min(
-                float(strategy.trade_value),
-                float(position.__dict__["_raw"]["market_value"]),
-            )
+
+            trade_value = min(float(strategy.trade_value), market_value)
         else:
             # No order required with current quote
             continue
 
-        try:
-            order = api.submit_order(
-                symbol=symbol,
-                notional=trade_value,
-                side=side,
-                type=Order.MARKET,
-                time_in_force=Order.GTC,
-            )
-        except Exception as e:
-            logger.warning(f"Tradeview order failed: {e}")
-            return
+        signal.decision = Signal.ORDER
+        intent = order_intent(strategy, evaluation.t, side, trade_value)
+        intents.append(intent)
+        ordered[intent.client_order_id] = signal
+
+    # Trim or reject orders the account can't place, before submitting any
+    intents, rejected = RiskCheck(ledger, prices).check(intents)
+    for client_order_id, reason in rejected.items():
+        signal = ordered[client_order_id]
+        signal.decision = Signal.SKIP
+        signal.values["rejected"] = reason
+
+    # Record the decisions of the cycle before placing its orders
+    Signal.objects.bulk_create(signals, ignore_conflicts=True)
+
+    # Submit the orders of every strategy together, and write them once placed
+    submitted = [
+        {**order, "asset_id": intent.strategy.asset.pk, "strategy": intent.strategy.pk}
+        for intent, order in OrderSubmitter(
+            api, bucket=client.bucket if client is not None else None
+        ).submit(intents)
+        if order is not None
+    ]
+    write_orders(submitted, user)
+
+
+@celery_app.task(ignore_result=True)
+def monitor_exits():
+    """
+    Close positions which have hit their strategy's stop loss or take profit.
+
+    Runs every minute while the market is open. Every open position with exit
+    thresholds is priced from the latest trades, fetched in batches, and the
+    exits of every user are submitted together.
+    """
+    if not is_market_open():
+        return
 
-        raw_order = order.__dict__["_raw"]
-        order = Order.objects.create(
-            user=user,
-            id=raw_order.get("id"),
-            client_order_id=raw_order.get("client_order_id"),
-            created_at=raw_order.get("created_at"),
-            updated_at=raw_order.get("updated_at"),
-            submitted_at=raw_order.get("submitted_at"),
-            filled_at=raw_order.get("filled_at"),
-            expired_at=raw_order.get("expired_at"),
-            canceled_at=raw_order.get("canceled_at"),
-            failed_at=raw_order.get("failed_at"),
-            replaced_at=raw_order.get("replaced_at"),
-            replaced_by=raw_order.get("replaced_by"),
-            replaces=raw_order.get("replaces"),
-            asset_id=strategy.asset,
-            notional=raw_order.get("notional"),
-            qty=raw_order.get("qty"),
-            filled_qty=raw_order.get("filled_qty"),
-            filled_avg_price=raw_order.get("filled_avg_price"),
-            order_class=raw_order.get("order_class"),
-            type=raw_order.get("type"),
-            side=raw_order.get("side"),
-            time_in_force=raw_order.get("time_in_force"),
-            limit_price=raw_order.get("limit_price"),
-            stop_price=raw_order.get("stop_price"),
-            status=raw_order.get("status"),
-            extended_hours=raw_order.get("extended_hours"),
-            trail_percent=raw_order.get("trail_percent"),
-            trail_price=raw_order.get("trail_price"),
-            hwm=raw_order.get("hwm"),
+    candidates = exit_candidates()
+    if not candidates:
+        return
+
+    api = TradeApiRest()
+    prices = latest_prices(api, {strategy.asset for _, strategy in candidates})
+    intents = defaultdict(list)
+    for intent in exit_intents(candidates, prices):
+        intents[intent.strategy.user_id].append(intent)
+
+    # Exits are placed on the account of each user
+    submitted = []
+    for user_id, user_intents in intents.items():
+        client = client_manager().client(user_id)
+        submitter = (
+            OrderSubmitter(client.api, bucket=client.bucket)
+            if client is not None
+            else OrderSubmitter(api)
         )
-        legs = raw_order.get("legs")
-        if legs:
-            order.legs.set(legs)
+        submitted.extend(
+            {
+                **order,
+                "asset_id": intent.strategy.asset.pk,
+                "strategy": intent.strategy.pk,
+                "user": user_id,
+            }
+            for intent, order in submitter.submit(user_intents)
+            if order is not None
+        )
+    write_orders(submitted)
+    logger.info(f"Exits placed: {len(submitted)}")
 
 
 def fetch_bar_data_for_strategy(strategy):
-    """Conditionally fetch bar data if there is not enough historical data."""
-    if strategy.type == Strategy.MOVING_AVERAGE_7D:
-        days = 7
-        business_days = 5
-    else:
-        days = 14
-        business_days = 10
+    """
+    Conditionally fetch bar data if there is not enough historical data.
 
+    The bar coverage index of the trading calendar is checked, and only the
+    missing sessions are fetched, along with the bars of the session in
+    progress. If the calendar hasn't been loaded, the
+    number of recent bars is compared to an estimate instead.
+    """
+    timeframe = strategy.timeframe
+    total_bars_count = get_strategy(strategy.type).lookback(timeframe)
+
+    # Include an additional bar (+ 1), to ensure there is enough historical
+    # data to compare the signal of this period, to the previous period.
+    now = timezone.now()
+    sessions = latest_sessions(total_bars_count + 1, timeframe, now=now)
+    if sessions is not None:
+        incomplete = load_sessions(strategy.asset, timeframe, sessions)
+        # The session in progress is incomplete until it closes, but its bars
+        # up to now have been fetched
+        if any(session.close <= now for session in incomplete):
+            return
+        return total_bars_count
+
+    days = lookback_days(strategy.type, timeframe)
     time_now_utc = datetime.utcnow().replace(tzinfo=pytz.utc)
     base_time_utc = time_now_utc - timedelta(days=days)
     base_time_epoch = int(time.mktime(base_time_utc.timetuple()))
-    bars = Bar.objects.filter(asset_id=strategy.asset.id, t__gte=base_time_epoch)
+    bars = Bar.objects.filter(
+        asset_id=strategy.asset.id, timeframe=timeframe, t__gte=base_time_epoch
+    )
 
     # Hacky adjustment for public holidays and crontab tasks not being
     # perfectly aligned with market open etc.
     adjusted = 0.8
-    seven_day_bars_to_update = []
-    fourteen_day_bars_to_update = []
-    fifteen_min_bars_per_day = 6.5 * 60 / 15
-    total_bars_count = business_days * fifteen_min_bars_per_day
     adjusted_count = adjusted * total_bars_count
-    symbol = strategy.asset.symbol
 
     if bars.count() < adjusted_count:
-        if strategy.type == Strategy.MOVING_AVERAGE_7D:
-            seven_day_bars_to_update.append(symbol)
-        else:
-            fourteen_day_bars_to_update.append(symbol)
-
-    # Update number of days in strategy with an additional record (+ 1), to
-    # ensure there is enough historical data to compare the moving average of
-    # this period, to the previous period.
-    if seven_day_bars_to_update:
-        update_bars(seven_day_bars_to_update, "15Min", 5 * fifteen_min_bars_per_day + 1)
-    if fourteen_day_bars_to_update:
-        update_bars(
-            fourteen_day_bars_to_update, "15Min", 10 * fifteen_min_bars_per_day + 1
+        # Fetch the bars required with an additional record (+ 1), to ensure
+        # there is enough historical data to compare the signal of this period,
+        # to the previous period.
+        update_bars([strategy.asset.symbol], timeframe, total_bars_count + 1)
+
+        bars = Bar.objects.filter(
+            asset_id=strategy.asset.id, timeframe=timeframe, t__gte=base_time_epoch
         )
+        if bars.count() < adjusted_count:
+            return
 
-    bars = Bar.objects.filter(asset_id=strategy.asset.id, t__gte=base_time_epoch)
-    if bars.count() < adjusted_count:
+    return total_bars_count
+
+
+@celery_app.task(ignore_result=True)
+def start_sweep(sweep_id):
+    """
+    Fan out the backtests of a parameter sweep to Celery workers.
+
+    Workers read bars from the bar cache, so must share `BAR_CACHE_DIR` with
+    this worker.
+    """
+    sweep = Sweep.objects.get(pk=sweep_id)
+    missing = sync_sweep_bars(sweep)
+    chunks = [chunk for chunk in sweep_chunks(sweep) if chunk[0] not in missing]
+
+    sweep.status = Sweep.RUNNING
+    sweep.chunks = len(chunks)
+    sweep.save(update_fields=["status", "chunks"])
+    if not chunks:
+        rank_results(sweep)
         return
 
-    return total_bars_count
+    kwargs = chunk_kwargs(sweep)
+    group(
+        run_sweep_chunk.s(sweep_id, symbol, timeframe, parameters, **kwargs)
+        for symbol, timeframe, parameters in chunks
+    ).apply_async()
+
+
+@celery_app.task(ignore_result=True)
+def run_sweep_chunk(sweep_id, symbol, timeframe, parameters, **kwargs):
+    """Backtest a chunk of a parameter sweep, and save the results."""
+    results = backtest_chunk(symbol, timeframe, parameters, **kwargs)
+    complete_chunk(sweep_id, symbol, results)
+
+
+@celery_app.task(ignore_result=True)
+def screen_universe():
+    """Screen every active asset against the `SCREENER_CONDITIONS`."""
+    matches = run_screener()
+    logger.info(f"Screener matches: {len(matches)}")
+    return len(matches)
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import pytz
+from assets.models import Bar
+from assets.tests.factories import AssetFactory, BarFactory
+from core.analytics import Fill, equity_curve, load_fills, performance, trade_profits
+from core.tests.factories import StrategyFactory
+from django.core.cache import cache
+from django.test import TestCase
+from orders.models import Order
+from orders.tests.factories import OrderFactory
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from users.tests.factories import UserFactory
+
+DAY = 24 * 60 * 60
+START = datetime(2021, 3, 15, 4, tzinfo=pytz.utc)
+
+
+def filled_order(user, asset, side, qty, price, day, **kwargs):
+    return OrderFactory(
+        user=user,
+        asset_id=asset,
+        side=side,
+        qty=qty,
+        filled_qty=qty,
+        filled_avg_price=price,
+        filled_at=START + timedelta(days=day, hours=12),
+        **kwargs,
+    )
+
+
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.tsla = AssetFactory(symbol="TSLA")
+        self.strategy = StrategyFactory(user=self.user, asset=self.tsla)
+        for day, close in enumerate([100, 110, 105]):
+            BarFactory(
+                asset=self.tsla,
+                timeframe=Bar.DAY_1,
+                t=int(START.timestamp()) + day * DAY,
+                c=close,
+            )
+        filled_order(self.user, self.tsla, Order.BUY, 10, 100, 0)
+        filled_order(
+            self.user, self.tsla, Order.SELL, 10, 105, 2, strategy=self.strategy
+        )
+
+    def test_equity_curve(self):
+        """Positions are valued at daily closes, from the capital committed."""
+        days, equity = equity_curve(load_fills(user=self.user))
+
+        self.assertEqual(
+            days.tolist(), [int(START.timestamp()) + day * DAY for day in range(3)]
+        )
+        self.assertEqual(equity.tolist(), [1100, 1200, 1150])
+
+    def test_trade_profits(self):
+        """Closing fills realise profit against the average entry price."""
+        fills = [
+            Fill(0, "TSLA", 10, 100),
+            Fill(1, "TSLA", 10, 110),
+            Fill(2, "TSLA", -25, 100),
+            Fill(3, "TSLA", 10, 90),
+        ]
+
+        self.assertEqual(trade_profits(fills), [-100, 50])
+
+    def test_performance(self):
+        """Metrics are computed from the equity curve and closed trades."""
+        result = performance(user=self.user)
+
+        self.assertAlmostEqual(result.total_return, 1150 / 1100 - 1)
+        self.assertAlmostEqual(result.max_drawdown, 1 - 1150 / 1200)
+        self.assertEqual(result.win_rate, 1)
+        self.assertEqual(result.trades, 1)
+        self.assertEqual(performance(strategy=self.strategy).trades, 0)
+
+    def test_load_fills_incrementally(self):
+        """Only new fills are read, unless earlier fills have been stored."""
+        load_fills(user=self.user)
+        filled_order(self.user, self.tsla, Order.BUY, 1, 106, 3)
+
+        with self.assertNumQueries(3):
+            fills = load_fills(user=self.user)
+        self.assertEqual([fill.qty for fill in fills], [10, -10, 1])
+
+        filled_order(self.user, self.tsla, Order.BUY, 2, 101, 1)
+        fills = load_fills(user=self.user)
+        self.assertEqual([fill.qty for fill in fills], [10, 2, -10, 1])
+
+
+class AnalyticsViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.user.auth_token.key)
+        tsla = AssetFactory(symbol="TSLA")
+        self.strategy = StrategyFactory(user=self.user, asset=tsla)
+        self.other = StrategyFactory(asset=tsla)
+        filled_order(self.user, tsla, Order.BUY, 10, 100, 0, strategy=self.strategy)
+        filled_order(self.user, tsla, Order.SELL, 10, 110, 1, strategy=self.strategy)
+
+    def test_user_analytics(self):
+        """Users can get the performance of their orders."""
+        response = self.client.get(reverse("v1:analytics-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["trades"], 1)
+        self.assertEqual(response.data["win_rate"], 1)
+        self.assertEqual(len(response.data["equity"]), 2)
+
+    def test_strategy_analytics(self):
+        """Users can only get the performance of their own strategies."""
+        response = self.client.get(
+            reverse("v1:analytics-detail", args=[self.strategy.pk])
+        )
+        other_response = self.client.get(
+            reverse("v1:analytics-detail", args=[self.other.pk])
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["trades"], 1)
+        self.assertEqual(other_response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_strategy_analytics_invalid_pk(self):
+        """Strategy primary keys which aren't integers aren't found."""
+        url = reverse("v1:analytics-detail", args=[self.strategy.pk])
+
+        response = self.client.get(url.replace(str(self.strategy.pk), "tsla"))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,190 @@
+import tempfile
+
+import numpy as np
+from assets.arrays import BarArrays
+from assets.cache import BarCache
+from assets.tests.factories import AssetFactory, BarFactory
+from core.backtest import (
+    STOP_LOSS,
+    TAKE_PROFIT,
+    backtest_strategy,
+    run_backtest,
+    simulate,
+)
+from core.indicators import crossover, sma
+from core.metrics import max_drawdown, total_return
+from core.models import Strategy
+from core.strategies import get_strategy
+from core.tests.factories import StrategyFactory
+from django.test import TestCase
+from orders.models import Order
+
+
+def make_bars(close, spread=0.0):
+    """Return bar columns with opens at the previous close."""
+    close = np.asarray(close, dtype=np.float64)
+    open_ = np.insert(close[:-1], 0, close[0])
+    return BarArrays(
+        t=np.arange(len(close), dtype=np.int64) * 900,
+        o=open_,
+        h=np.maximum(open_, close) + spread,
+        l=np.minimum(open_, close) - spread,
+        c=close,
+        v=np.ones(len(close), dtype=np.int64),
+    )
+
+
+class MetricsTests(TestCase):
+    def test_total_return(self):
+        self.assertAlmostEqual(total_return(np.array([100.0, 110.0])), 0.1)
+
+    def test_max_drawdown(self):
+        equity = np.array([100.0, 120.0, 90.0, 130.0])
+        self.assertAlmostEqual(max_drawdown(equity), 0.25)
+
+
+class SimulateTests(TestCase):
+    def test_fills_at_next_open(self):
+        """Signals are filled at the next bar's open with slippage."""
+        bars = make_bars([10, 10, 12, 12, 11])
+        signals = np.array([1, 0, -1, 0, 0], dtype=np.int8)
+
+        equity, trades = simulate(
+            bars, signals, trade_value=100, initial_cash=1000, slippage=0.01
+        )
+
+        buy, sell = trades
+        self.assertEqual(buy["side"], Order.BUY)
+        self.assertAlmostEqual(buy["price"], 10 * 1.01)
+        self.assertAlmostEqual(buy["qty"], 100 / 10.1)
+        self.assertEqual(sell["side"], Order.SELL)
+        self.assertAlmostEqual(sell["price"], 12 * 0.99)
+        # Sells are limited to the trade value, as in the live strategy
+        self.assertAlmostEqual(sell["qty"], 100 / 11.88)
+        self.assertAlmostEqual(sell["profit"], (11.88 - 10.1) * 100 / 11.88)
+        self.assertAlmostEqual(equity[-1], 1000 + (buy["qty"] - sell["qty"]) * 11)
+
+    def test_fees(self):
+        """Fees are deducted from cash on each order."""
+        bars = make_bars([10, 10, 10])
+        signals = np.array([1, -1, 0], dtype=np.int8)
+
+        equity, trades = simulate(
+            bars, signals, trade_value=100, initial_cash=1000, slippage=0, fee=0.01
+        )
+
+        self.assertAlmostEqual(trades[0]["fee"], 1)
+        self.assertAlmostEqual(equity[-1], 998)
+
+    def test_trade_value_limited_by_cash(self):
+        """Buys can't spend more than the available cash."""
+        bars = make_bars([10, 10, 10])
+        signals = np.array([1, 1, 0], dtype=np.int8)
+
+        _, trades = simulate(
+            bars, signals, trade_value=80, initial_cash=100, slippage=0
+        )
+
+        self.assertAlmostEqual(trades[0]["qty"], 8)
+        self.assertAlmostEqual(trades[1]["qty"], 2)
+
+    def test_sell_without_position(self):
+        """Sell signals are ignored without a position."""
+        bars = make_bars([10, 10, 10])
+        signals = np.array([-1, 0, 0], dtype=np.int8)
+
+        equity, trades = simulate(bars, signals, trade_value=100, initial_cash=1000)
+
+        self.assertEqual(trades, [])
+        np.testing.assert_allclose(equity, 1000)
+
+    def test_stop_loss_percentage(self):
+        """Positions are exited when the stop loss price is reached."""
+        bars = make_bars([10, 10, 9.5, 8, 12])
+        signals = np.array([1, 0, 0, 0, 0], dtype=np.int8)
+
+        _, trades = simulate(
+            bars,
+            signals,
+            trade_value=100,
+            initial_cash=1000,
+            slippage=0,
+            stop_loss_percentage=10,
+        )
+
+        self.assertEqual(len(trades), 2)
+        self.assertEqual(trades[1]["reason"], STOP_LOSS)
+        self.assertEqual(trades[1]["t"], 3 * 900)
+        self.assertAlmostEqual(trades[1]["price"], 9)
+
+    def test_take_profit_amount(self):
+        """Positions are exited when the take profit amount is reached."""
+        bars = make_bars([10, 10, 10.5, 11, 12])
+        signals = np.array([1, 0, 0, 0, 0], dtype=np.int8)
+
+        _, trades = simulate(
+            bars,
+            signals,
+            trade_value=100,
+            initial_cash=1000,
+            slippage=0,
+            take_profit_amount=10,
+        )
+
+        self.assertEqual(trades[1]["reason"], TAKE_PROFIT)
+        self.assertAlmostEqual(trades[1]["price"], 11)
+        self.assertAlmostEqual(trades[1]["profit"], 10)
+
+
+class RunBacktestTests(TestCase):
+    def test_run_backtest(self):
+        """Statistics are reported for the equity curve and trades."""
+        close = 100 + 10 * np.sin(np.linspace(0, 20, 2000))
+        signals = crossover(close, sma(close, 50))
+        result = run_backtest(make_bars(close), signals, 1000, start=100 * 900)
+
+        self.assertEqual(result.stats["bars"], 1900)
+        self.assertEqual(len(result.equity), 1900)
+        self.assertEqual(result.t[0], 100 * 900)
+        self.assertEqual(result.stats["trades"], len(result.trades))
+        self.assertGreater(result.stats["trades"], 0)
+        for key in ("total_return", "max_drawdown", "sharpe_ratio", "win_rate"):
+            self.assertIn(key, result.stats)
+
+
+class BacktestStrategyTests(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.cache = BarCache(self.tempdir.name)
+        self.tsla = AssetFactory(symbol="TSLA")
+        for index, close in enumerate([10, 10, 10, 10, 8, 12, 12, 8, 8, 8]):
+            BarFactory(
+                asset=self.tsla,
+                timeframe=Strategy.DAY_1,
+                t=index * 86400,
+                o=close,
+                h=close,
+                l=close,
+                c=close,
+            )
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_backtest_strategy(self):
+        """Strategies are backtested over bars in the cache."""
+        strategy = StrategyFactory.build(
+            asset=self.tsla,
+            type=Strategy.MOVING_AVERAGE_7D,
+            timeframe=Strategy.DAY_1,
+            trade_value=100,
+        )
+
+        result = backtest_strategy(strategy, cache=self.cache, slippage=0)
+
+        self.assertEqual(get_strategy(strategy.type).lookback(strategy.timeframe), 5)
+        self.assertEqual(len(result.equity), 10)
+        self.assertEqual(
+            [(trade["side"], trade["price"]) for trade in result.trades],
+            [(Order.BUY, 12), (Order.SELL, 8)],
+        )
@@ -0,0 +1,86 @@
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytz
+from alpaca_trade_api.entity import Clock as AlpacaClock
+from assets.calendar import update_calendar
+from assets.models import Bar
+from core.clock import CLOCK_CACHE_KEY, cached_clock, closed_timeframes, is_market_open
+from django.core.cache import cache
+from django.test import TestCase
+
+CALENDAR = [
+    {"date": "2021-03-01", "open": "09:30", "close": "16:00"},
+    {"date": "2021-03-02", "open": "09:30", "close": "13:00"},
+]
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=pytz.utc)
+
+
+class ClockTests(TestCase):
+    def setUp(self):
+        cache.delete(CLOCK_CACHE_KEY)
+        self.clock = AlpacaClock(
+            {
+                "timestamp": "2021-03-01T10:00:00-05:00",
+                "is_open": True,
+                "next_open": "2021-03-02T09:30:00-05:00",
+                "next_close": "2021-03-01T16:00:00-05:00",
+            }
+        )
+
+    def tearDown(self):
+        cache.delete(CLOCK_CACHE_KEY)
+
+    @patch("core.clock.TradeApiRest")
+    def test_cached_clock(self, mock_trade_api):
+        """The clock is cached until the market next opens or closes."""
+        mock_trade_api.return_value.get_clock.return_value = self.clock
+
+        self.assertTrue(cached_clock(utc(2021, 3, 1, 15))["is_open"])
+        self.assertTrue(cached_clock(utc(2021, 3, 1, 20, 59))["is_open"])
+        self.assertEqual(mock_trade_api.return_value.get_clock.call_count, 1)
+
+        cached_clock(utc(2021, 3, 1, 21))
+
+        self.assertEqual(mock_trade_api.return_value.get_clock.call_count, 2)
+
+    @patch("core.clock.TradeApiRest")
+    def test_is_market_open_calendar(self, mock_trade_api):
+        """The trading calendar is used without calling the api."""
+        update_calendar(date(2021, 3, 1), date(2021, 3, 2), CALENDAR)
+
+        self.assertTrue(is_market_open(utc(2021, 3, 1, 15)))
+        self.assertFalse(is_market_open(utc(2021, 3, 1, 21)))
+        self.assertFalse(is_market_open(utc(2021, 3, 2, 18, 30)))
+        mock_trade_api.assert_not_called()
+
+    @patch("core.clock.TradeApiRest")
+    def test_closed_timeframes(self, mock_trade_api):
+        """Bars close on multiples of their length, and at the session close."""
+        update_calendar(date(2021, 3, 1), date(2021, 3, 2), CALENDAR)
+
+        self.assertEqual(closed_timeframes(utc(2021, 3, 1, 14, 31)), [Bar.MIN_1])
+        self.assertEqual(
+            closed_timeframes(utc(2021, 3, 1, 15, 0, 20)),
+            [Bar.MIN_1, Bar.MIN_5, Bar.MIN_15, Bar.HOUR_1],
+        )
+        self.assertEqual(
+            closed_timeframes(utc(2021, 3, 2, 18), [Bar.MIN_15, Bar.DAY_1]),
+            [Bar.MIN_15, Bar.DAY_1],
+        )
+        self.assertEqual(closed_timeframes(utc(2021, 3, 1, 14, 30)), [])
+        self.assertEqual(closed_timeframes(utc(2021, 3, 2, 18, 15)), [])
+        mock_trade_api.assert_not_called()
+
+    @patch("core.clock.TradeApiRest")
+    def test_closed_timeframes_clock(self, mock_trade_api):
+        """Without a calendar, intraday bars close while the market is open."""
+        mock_trade_api.return_value.get_clock.return_value = self.clock
+
+        self.assertEqual(
+            closed_timeframes(utc(2021, 3, 1, 21), [Bar.MIN_15, Bar.DAY_1]),
+            [Bar.MIN_15],
+        )
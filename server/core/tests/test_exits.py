@@ -0,0 +1,127 @@
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from accounts.models import Position
+from alpaca_trade_api.entity import Order as AlpacaOrder
+from alpaca_trade_api.rest import APIError
+from assets.tests.factories import AssetFactory, BarFactory
+from core.exits import exit_candidates, exit_intents, exit_triggers, latest_prices
+from core.tasks import monitor_exits
+from core.tests.factories import StrategyFactory
+from django.test import TestCase
+from orders.models import Order
+from orders.tests.factories import OrderFactory
+from users.tests.factories import UserFactory
+
+
+class ExitTests(TestCase):
+    def test_exit_triggers(self):
+        """Thresholds trigger in the direction of each position."""
+        nan = np.nan
+        stop, take = exit_triggers(
+            qty=np.array([10.0, 10.0, -10.0, -10.0, 10.0]),
+            entry=np.array([100.0, 100.0, 100.0, 100.0, 100.0]),
+            price=np.array([94.0, 104.0, 104.0, 80.0, 150.0]),
+            thresholds=np.array(
+                [
+                    [nan, 5, nan, nan],
+                    [nan, 5, 50, nan],
+                    [30, nan, nan, nan],
+                    [nan, nan, nan, 20],
+                    [nan, nan, nan, nan],
+                ]
+            ),
+        )
+
+        self.assertEqual(stop.tolist(), [True, False, True, False, False])
+        self.assertEqual(take.tolist(), [False, False, False, True, False])
+
+    @patch("core.tasks.is_market_open", lambda: True)
+    @patch("core.tasks.TradeApiRest")
+    def test_monitor_exits(self, mock_trade_api):
+        """Positions past a threshold are closed, once, with their strategy."""
+        user = UserFactory()
+        tsla = AssetFactory(symbol="TSLA")
+        aapl = AssetFactory(symbol="AAPL")
+        msft = AssetFactory(symbol="MSFT")
+        stop_loss = StrategyFactory(user=user, asset=tsla, stop_loss_percentage=5)
+        StrategyFactory(user=user, asset=aapl, take_profit_amount=50)
+        StrategyFactory(user=user, asset=msft, stop_loss_amount=1)
+        for asset in (tsla, aapl, msft):
+            Position.objects.create(user=user, asset=asset, qty=10, avg_entry_price=100)
+        # Priced from its latest bar, without a trade
+        BarFactory(asset=aapl, t=900, c=103)
+        BarFactory(asset=aapl, t=0, c=200)
+        # An order is still open
+        OrderFactory(user=user, asset_id=msft, status=Order.NEW)
+
+        trades = {"TSLA": 90.0, "MSFT": 50.0}
+
+        def get_latest_trade(symbol):
+            if symbol not in trades:
+                raise APIError({"code": 40410000, "message": "no trade"})
+            return SimpleNamespace(price=trades[symbol])
+
+        mock_trade_api.return_value.get_latest_trade.side_effect = get_latest_trade
+        mock_trade_api.return_value.submit_order.side_effect = (
+            lambda **kwargs: AlpacaOrder(
+                {
+                    "id": str(uuid.uuid4()),
+                    "asset_id": str(tsla.pk),
+                    "created_at": "2021-03-16T18:38:01.942282Z",
+                    "filled_qty": "0",
+                    "status": "accepted",
+                    **kwargs,
+                }
+            )
+        )
+
+        monitor_exits()
+
+        mock_trade_api.return_value.submit_order.assert_called_once()
+        kwargs = mock_trade_api.return_value.submit_order.call_args.kwargs
+        self.assertEqual(kwargs["symbol"], "TSLA")
+        self.assertEqual(kwargs["side"], Order.SELL)
+        self.assertEqual(kwargs["qty"], 10)
+        order = Order.objects.get(client_order_id=kwargs["client_order_id"])
+        self.assertEqual(order.strategy, stop_loss)
+        self.assertEqual(order.user, user)
+
+    def test_exit_intents_unfilled(self):
+        """Exits which closed unfilled are placed again with a new id."""
+        user = UserFactory()
+        tsla = AssetFactory(symbol="TSLA")
+        StrategyFactory(user=user, asset=tsla, stop_loss_percentage=5)
+        position = Position.objects.create(
+            user=user, asset=tsla, qty=10, avg_entry_price=100
+        )
+        position.refresh_from_db()
+        prices = {position.asset_id: 90.0}
+
+        [intent] = exit_intents(exit_candidates(), prices)
+        self.assertEqual(exit_intents(exit_candidates(), prices), [intent])
+
+        OrderFactory(
+            user=user,
+            asset_id=tsla,
+            client_order_id=intent.client_order_id,
+            side=Order.SELL,
+            filled_qty=0,
+            status=Order.REJECTED,
+        )
+        [retry] = exit_intents(exit_candidates(), prices)
+
+        self.assertNotEqual(retry.client_order_id, intent.client_order_id)
+        self.assertEqual(retry.qty, intent.qty)
+        self.assertEqual(exit_intents(exit_candidates(), prices), [retry])
+
+    def test_latest_prices_errors(self):
+        """Only Alpaca errors fall back to stored bars."""
+        tsla = AssetFactory(symbol="TSLA")
+        api = MagicMock()
+        api.get_latest_trade.side_effect = AttributeError("get_latest_trade")
+
+        with self.assertRaises(AttributeError):
+            latest_prices(api, [tsla])
@@ -0,0 +1,183 @@
+from unittest.mock import patch
+
+import numpy as np
+from assets.arrays import BarArrays, latest_bar_arrays
+from assets.models import Bar
+from assets.tests.factories import AssetFactory, BarFactory
+from core.indicators import (
+    IndicatorCache,
+    Indicators,
+    atr,
+    bollinger_bands,
+    crossover,
+    ema,
+    macd,
+    rsi,
+    sma,
+    vwap,
+)
+from core.models import Strategy
+from core.strategies import get_strategy, latest_signal, lookback_days
+from core.tests.factories import StrategyFactory
+from django.test import TestCase
+
+
+def make_bars(close):
+    close = np.asarray(close, dtype=np.float64)
+    return BarArrays(
+        t=np.arange(len(close), dtype=np.int64) * 900,
+        o=close,
+        h=close + 1,
+        l=close - 1,
+        c=close,
+        v=np.full(len(close), 10, dtype=np.int64),
+    )
+
+
+class IndicatorTests(TestCase):
+    def test_sma(self):
+        """Averages are NaN until there is enough history."""
+        average = sma([1, 2, 3, 4, 5], 3)
+
+        self.assertTrue(np.isnan(average[:2]).all())
+        np.testing.assert_allclose(average[2:], [2, 3, 4])
+
+    def test_sma_min_periods(self):
+        """Averages are of the values so far until there is a full window."""
+        average = sma([1, 2, 3, 4, 5], 3, min_periods=2)
+
+        self.assertTrue(np.isnan(average[0]))
+        np.testing.assert_allclose(average[1:], [1.5, 2, 3, 4])
+        np.testing.assert_allclose(sma([1, 2], 3, min_periods=1), [1, 1.5])
+
+    def test_ema(self):
+        """Exponential averages are seeded with the simple average."""
+        average = ema([1, 2, 3, 4], 3)
+
+        self.assertTrue(np.isnan(average[:2]).all())
+        np.testing.assert_allclose(average[2:], [2, 3])
+
+    def test_rsi(self):
+        """RSI is 100 without losses, and 50 with equal gains and losses."""
+        rising = rsi(np.arange(20, dtype=np.float64), 14)
+        alternating = rsi(np.tile([1.0, 2.0], 20), 14)
+
+        self.assertTrue(np.isnan(rising[:14]).all())
+        self.assertEqual(rising[-1], 100)
+        self.assertAlmostEqual(alternating[-1], 50, delta=5)
+
+    def test_macd(self):
+        """The histogram is the MACD line less its signal line."""
+        close = 100 + np.sin(np.linspace(0, 10, 100))
+
+        line, signal_line, hist = macd(close, 12, 26, 9)
+
+        np.testing.assert_allclose(line, ema(close, 12) - ema(close, 26))
+        self.assertTrue(np.isnan(signal_line[: 25 + 8]).all())
+        np.testing.assert_allclose(hist[33:], (line - signal_line)[33:])
+
+    def test_bollinger_bands(self):
+        """Bands are a number of standard deviations from the average."""
+        close = np.array([1, 3, 1, 3], dtype=np.float64)
+
+        middle, upper, lower = bollinger_bands(close, 2, 2)
+
+        np.testing.assert_allclose(middle[1:], [2, 2, 2])
+        np.testing.assert_allclose(upper[1:], [4, 4, 4])
+        np.testing.assert_allclose(lower[1:], [0, 0, 0])
+
+    def test_atr(self):
+        """The average true range includes gaps from the previous close."""
+        high = np.array([11, 11, 21, 21], dtype=np.float64)
+        low = high - 2
+
+        average = atr(high, low, high - 1, 2)
+
+        np.testing.assert_allclose(average[1:], [2, 6.5, 4.25])
+
+    def test_vwap(self):
+        """VWAP weights the typical price by volume."""
+        average = vwap([3, 6], [1, 2], [2, 4], [1, 3])
+
+        np.testing.assert_allclose(average, [2, 3.5])
+
+    def test_crossover(self):
+        """Signals are raised when values cross the reference."""
+        close = np.array([1, 1, 3, 3, 1, 1], dtype=np.float64)
+
+        np.testing.assert_array_equal(
+            crossover(close, np.full(6, 2.0)), [0, 0, 1, 0, -1, 0]
+        )
+        np.testing.assert_array_equal(crossover(close, 2), [0, 0, 1, 0, -1, 0])
+        np.testing.assert_array_equal(crossover(close, np.nan), [0] * 6)
+
+
+class IndicatorsTests(TestCase):
+    def test_indicators_are_memoized(self):
+        """Each indicator is computed once per set of parameters."""
+        indicators = Indicators(make_bars(np.arange(10)))
+
+        with patch("core.indicators.sma", wraps=sma) as mock_sma:
+            first = indicators("sma", 3)
+            second = indicators("sma", 3)
+            indicators("sma", 4)
+
+        self.assertIs(first, second)
+        self.assertEqual(mock_sma.call_count, 2)
+
+
+class IndicatorCacheTests(TestCase):
+    def setUp(self):
+        self.tsla = AssetFactory(symbol="TSLA")
+        for index in range(10):
+            BarFactory(asset=self.tsla, t=index * 900, c=index)
+
+    def test_series(self):
+        """The latest bars are loaded once, unless more are required."""
+        cache = IndicatorCache()
+
+        with patch(
+            "core.indicators.latest_bar_arrays", wraps=latest_bar_arrays
+        ) as mock_latest_bar_arrays:
+            first = cache.series(self.tsla.id, Bar.MIN_15, 5)
+            second = cache.series(self.tsla.id, Bar.MIN_15, 3)
+            third = cache.series(self.tsla.id, Bar.MIN_15, 8)
+
+        self.assertIs(first, second)
+        self.assertEqual(mock_latest_bar_arrays.call_count, 2)
+        np.testing.assert_array_equal(first.bars.c, [5, 6, 7, 8, 9])
+        np.testing.assert_array_equal(third.bars.t, np.arange(2, 10) * 900)
+
+
+class StrategyTypeTests(TestCase):
+    def test_lookback(self):
+        """Moving average windows are business days of bars."""
+        self.assertEqual(
+            get_strategy(Strategy.MOVING_AVERAGE_7D).lookback(Bar.MIN_15), 130
+        )
+        self.assertEqual(
+            get_strategy(Strategy.MOVING_AVERAGE_14D).lookback(Bar.DAY_1), 10
+        )
+        self.assertEqual(lookback_days(Strategy.MOVING_AVERAGE_7D, Bar.MIN_15), 7)
+        self.assertEqual(lookback_days(Strategy.MOVING_AVERAGE_14D, Bar.MIN_15), 14)
+
+    def test_every_type_is_registered(self):
+        """Every strategy type computes a signal for every bar."""
+        indicators = Indicators(make_bars(100 + np.sin(np.linspace(0, 20, 300))))
+
+        for strategy_type, _ in Strategy.TYPE_CHOICES:
+            signals = get_strategy(strategy_type).signals(indicators, Bar.MIN_15)
+            self.assertEqual(len(signals), 300)
+            self.assertTrue(set(np.unique(signals)) <= {-1, 0, 1})
+
+    def test_latest_signal(self):
+        """The signal of the latest bar is returned."""
+        tsla = AssetFactory(symbol="TSLA")
+        closes = [10, 10, 10, 10, 8, 12]
+        for index, close in enumerate(closes):
+            BarFactory(asset=tsla, timeframe=Bar.DAY_1, t=index * 86400, c=close)
+        strategy = StrategyFactory(
+            asset=tsla, type=Strategy.MOVING_AVERAGE_7D, timeframe=Bar.DAY_1
+        )
+
+        self.assertEqual(latest_signal(strategy, IndicatorCache()), 1)
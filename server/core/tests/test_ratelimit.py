@@ -0,0 +1,35 @@
+from unittest.mock import patch
+
+from core.ratelimit import TokenBucket
+from django.test import SimpleTestCase
+
+
+class TokenBucketTests(SimpleTestCase):
+    @patch("core.ratelimit.time")
+    def test_acquire(self, mock_time):
+        """Requests beyond the capacity wait for tokens to be added."""
+        mock_time.monotonic.return_value = 0
+        bucket = TokenBucket(rate=2, capacity=2)
+
+        self.assertTrue(bucket.acquire())
+        self.assertTrue(bucket.acquire())
+        self.assertFalse(bucket.acquire(timeout=0))
+
+        mock_time.monotonic.return_value = 0.5
+
+        self.assertTrue(bucket.acquire(timeout=0))
+        self.assertFalse(bucket.acquire(timeout=0))
+
+    @patch("core.ratelimit.time")
+    def test_acquire_waits(self, mock_time):
+        """Waiting requests sleep until the next token is added."""
+        now = [0]
+        mock_time.monotonic.side_effect = lambda: now[0]
+        mock_time.sleep.side_effect = lambda seconds: now.__setitem__(
+            0, now[0] + seconds
+        )
+        bucket = TokenBucket(rate=4, capacity=1)
+        bucket.acquire()
+
+        self.assertTrue(bucket.acquire())
+        mock_time.sleep.assert_called_once_with(0.25)
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+import pytz
+from accounts.models import Credentials
+from accounts.tests.factories import AccountFactory
+from assets.arrays import bar_arrays
+from assets.models import Bar
+from assets.tests.factories import AssetFactory
+from cryptography.fernet import Fernet
+from core.replay import ReplayBroker, replay
+from core.tests.factories import StrategyFactory
+from django.test import TestCase, override_settings
+from orders.models import Order
+from users.tests.factories import UserFactory
+
+START = datetime(2021, 3, 1, 14, 30, tzinfo=pytz.utc)
+
+
+class ReplayTests(TestCase):
+    def setUp(self):
+        self.tsla = AssetFactory(symbol="TSLA")
+        self.user = UserFactory()
+        self.strategy = StrategyFactory(
+            user=self.user,
+            asset=self.tsla,
+            trade_value=1000,
+            start_date=START - timedelta(days=30),
+            end_date=START + timedelta(days=30),
+        )
+        # Crosses above its moving average, then below it, during the replay
+        closes = 100 - 10 * np.sin(np.linspace(0, 20, 200))
+        self.start = int(START.timestamp())
+        Bar.objects.bulk_create(
+            [
+                Bar(
+                    asset=self.tsla,
+                    t=self.start + (index - 150) * 900,
+                    o=close,
+                    h=close,
+                    l=close,
+                    c=close,
+                    v=100,
+                )
+                for index, close in enumerate(closes)
+            ]
+        )
+
+    def test_replay(self):
+        """Bars are replayed through the live runner, and changes rolled back."""
+        report = replay(START, START + timedelta(days=1), self.user)
+
+        self.assertEqual(report["symbols"], 1)
+        self.assertEqual(report["bars"], 50)
+        self.assertEqual(report["cycles"], 50)
+        self.assertEqual(report["orders"], 2)
+        self.assertGreater(report["speedup"], 1)
+        self.assertLessEqual(report["latency_p50"], report["latency_max"])
+
+        self.assertEqual(Bar.objects.filter(asset=self.tsla).count(), 200)
+        self.assertFalse(Order.objects.exists())
+
+    @override_settings(CREDENTIALS_ENCRYPTION_KEYS=[Fernet.generate_key().decode()])
+    @patch("accounts.clients.TradeApiRest")
+    def test_replay_account_credentials(self, mock_trade_api):
+        """Accounts with credentials trade with the broker during a replay."""
+        Credentials.objects.create(
+            account=AccountFactory(user=self.user), key_id="KEY", secret_key="secret"
+        )
+
+        report = replay(START, START + timedelta(days=1), self.user)
+
+        self.assertEqual(report["orders"], 2)
+        mock_trade_api.assert_not_called()
+
+    def test_broker_serves_closed_bars(self):
+        """The broker only serves bars which have closed."""
+        bars = {"TSLA": bar_arrays(Bar.objects.filter(asset=self.tsla))}
+        broker = ReplayBroker(bars, Bar.MIN_15)
+        broker.now = self.start
+
+        barset = broker.get_bars("TSLA", Bar.MIN_15, limit=2)
+
+        self.assertEqual(
+            [bar.__dict__["_raw"]["t"] for bar in barset["TSLA"]],
+            [self.start - 1800, self.start - 900],
+        )
+
+    def test_broker_fills_orders(self):
+        """Orders are filled at the latest close, and update the position."""
+        bars = {"TSLA": bar_arrays(Bar.objects.filter(asset=self.tsla))}
+        broker = ReplayBroker(bars, Bar.MIN_15, cash=1000)
+        broker.now = self.start
+        price = float(bars["TSLA"].c[149])
+
+        broker.submit_order("TSLA", side=Order.BUY, notional=500)
+        position = broker.list_position_by_symbol("TSLA").__dict__["_raw"]
+        broker.submit_order("TSLA", side=Order.SELL, notional=500)
+
+        self.assertAlmostEqual(float(position["market_value"]), 500, places=2)
+        self.assertEqual(broker.positions, {})
+        self.assertAlmostEqual(broker.cash, 1000, places=2)
+        self.assertEqual(broker.orders[0]["filled_avg_price"], str(price))
@@ -0,0 +1,118 @@
+import numpy as np
+from assets.models import Asset, Bar
+from assets.tests.factories import AssetFactory, BarFactory
+from core.models import ScreenerMatch
+from core.screener import latest_closes, latest_ema, latest_sma, run_screener
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from users.tests.factories import UserFactory
+
+CONDITIONS = [
+    {"name": "sma_3", "indicator": "sma", "window": 3, "timeframe": Bar.MIN_15},
+    {"name": "ema_3", "indicator": "ema", "window": 3, "timeframe": Bar.MIN_15},
+]
+
+
+def create_bars(asset, closes, end=20 * 900):
+    for index, close in enumerate(closes):
+        BarFactory(asset=asset, t=end - (len(closes) - index) * 900, c=close)
+
+
+class ScreenerTests(TestCase):
+    def setUp(self):
+        self.rising = AssetFactory(symbol="TSLA")
+        self.falling = AssetFactory(symbol="AAPL")
+        self.flat = AssetFactory(symbol="MSFT")
+        self.inactive = AssetFactory(symbol="GME", status=Asset.INACTIVE)
+        self.stale = AssetFactory(symbol="AMC")
+        create_bars(self.rising, [10] * 14 + [9, 12])
+        create_bars(self.falling, [10] * 14 + [11, 8])
+        create_bars(self.flat, [10] * 16)
+        create_bars(self.inactive, [10] * 14 + [9, 12])
+        create_bars(self.stale, [10] * 14 + [9, 12], end=19 * 900)
+
+    def test_latest_closes(self):
+        """The latest closes of active assets are padded to the same length."""
+        short = AssetFactory(symbol="NIO")
+        create_bars(short, [5, 6])
+
+        asset_ids, t, close = latest_closes(Bar.MIN_15, 3)
+        closes = dict(zip(map(str, asset_ids), close.tolist()))
+
+        self.assertEqual(len(asset_ids), 5)
+        self.assertEqual(closes[str(self.rising.id)], [10, 9, 12])
+        self.assertTrue(np.isnan(closes[str(short.id)][0]))
+        self.assertEqual(closes[str(short.id)][1:], [5, 6])
+        self.assertEqual(t.max(), 19 * 900)
+
+    def test_moving_averages(self):
+        """Averages are computed at the last two bars of every asset."""
+        close = np.array([[1, 2, 3, 4], [np.nan, 2, 3, 4]], dtype=np.float64)
+
+        np.testing.assert_allclose(latest_sma(close, 3)[0], [2, 3])
+        self.assertTrue(np.isnan(latest_sma(close, 3)[1, 0]))
+        np.testing.assert_allclose(latest_ema(close, 2)[0], [2.5, 3.5])
+
+    def test_run_screener(self):
+        """Assets crossing their moving averages at the latest bar match."""
+        ScreenerMatch.objects.create(
+            condition="sma_3",
+            asset=self.flat,
+            timeframe=Bar.MIN_15,
+            signal=ScreenerMatch.BUY,
+            t=0,
+            close=10,
+            value=10,
+        )
+
+        run_screener(CONDITIONS)
+
+        matches = ScreenerMatch.objects.filter(condition="sma_3")
+        self.assertEqual(
+            {(match.asset.symbol, match.signal) for match in matches},
+            {("TSLA", ScreenerMatch.BUY), ("AAPL", ScreenerMatch.SELL)},
+        )
+        match = matches.get(asset=self.rising)
+        self.assertEqual(match.t, 19 * 900)
+        self.assertEqual(match.close, 12)
+        self.assertAlmostEqual(match.value, 31 / 3)
+        self.assertEqual(ScreenerMatch.objects.filter(condition="ema_3").count(), 2)
+
+
+class ScreenerMatchViewTests(APITestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.tsla = AssetFactory(symbol="TSLA")
+        self.aapl = AssetFactory(symbol="AAPL")
+        for asset, signal in [
+            (self.tsla, ScreenerMatch.BUY),
+            (self.aapl, ScreenerMatch.SELL),
+        ]:
+            ScreenerMatch.objects.create(
+                condition="sma_7d",
+                asset=asset,
+                timeframe=Bar.MIN_15,
+                signal=signal,
+                t=900,
+                close=10,
+                value=10,
+            )
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.user.auth_token.key)
+
+    def test_list_screener_matches(self):
+        """Users can list screener matches, filtered by signal."""
+        response = self.client.get(reverse("v1:screener-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+        response = self.client.get(reverse("v1:screener-list"), {"signal": 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([match["asset"] for match in response.data], ["TSLA"])
+
+        response = self.client.get(reverse("v1:screener-list"), {"signal": "buy"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,95 @@
+import uuid
+from unittest.mock import patch
+
+from alpaca_trade_api.entity import Order as AlpacaOrder
+from assets.tests.factories import AssetFactory
+from core.models import Signal
+from core.strategies import Evaluation
+from core.tasks import moving_average_strategy
+from core.tests.factories import StrategyFactory
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from users.tests.factories import UserFactory
+
+
+def submitted_order(**kwargs):
+    return AlpacaOrder(
+        {
+            "id": str(uuid.uuid4()),
+            "created_at": "2021-03-16T18:38:01.942282Z",
+            "filled_qty": "0",
+            "status": "accepted",
+            **kwargs,
+        }
+    )
+
+
+@patch("core.tasks.fetch_bar_data_for_strategy", lambda strategy: 130)
+class SignalTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.tsla = AssetFactory(symbol="TSLA")
+        self.aapl = AssetFactory(symbol="AAPL")
+        self.buy = StrategyFactory(user=self.user, asset=self.tsla, trade_value=100)
+        self.hold = StrategyFactory(user=self.user, asset=self.aapl, trade_value=100)
+
+    @patch("core.tasks.evaluate")
+    @patch("core.tasks.TradeApiRest")
+    def test_signals_recorded(self, mock_trade_api, mock_evaluate):
+        """Decisions are recorded once, and a bar is only ordered once."""
+        evaluations = {
+            self.buy.pk: Evaluation(t=900, close=10.0, signal=1, values={"sma": 9.0}),
+            self.hold.pk: Evaluation(t=900, close=5.0, signal=0, values={"sma": 5.0}),
+        }
+        mock_evaluate.side_effect = lambda strategy, cache: evaluations[strategy.pk]
+        mock_trade_api.return_value.account_info.return_value.__dict__["_raw"] = {
+            "equity": "1000"
+        }
+        mock_trade_api.return_value.submit_order.side_effect = (
+            lambda **kwargs: submitted_order(**kwargs)
+        )
+
+        moving_average_strategy(self.user, latest_bars=False)
+        moving_average_strategy(self.user, latest_bars=False)
+
+        signal = Signal.objects.get(strategy=self.buy)
+        self.assertEqual(signal.decision, Signal.ORDER)
+        self.assertEqual(signal.values, {"close": 10.0, "sma": 9.0})
+        self.assertEqual(Signal.objects.get(strategy=self.hold).decision, Signal.HOLD)
+        mock_trade_api.return_value.submit_order.assert_called_once()
+
+
+class SignalViewTests(APITestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.user.auth_token.key)
+        tsla = AssetFactory(symbol="TSLA")
+        self.strategy = StrategyFactory(user=self.user, asset=tsla)
+        other = StrategyFactory(asset=tsla)
+        for strategy in (self.strategy, other):
+            for t in (900, 1800):
+                Signal.objects.create(
+                    strategy=strategy,
+                    asset=tsla,
+                    t=t,
+                    signal=Signal.NONE,
+                    decision=Signal.HOLD,
+                )
+
+    def test_list_signals(self):
+        """Users can list the signals of their strategies, latest first."""
+        response = self.client.get(reverse("v1:signals-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([signal["t"] for signal in response.data], [1800, 900])
+
+    def test_latest_signals(self):
+        """The latest signal of each strategy is returned."""
+        response = self.client.get(reverse("v1:signals-latest"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["strategy"], self.strategy.pk)
+        self.assertEqual(response.data[0]["t"], 1800)
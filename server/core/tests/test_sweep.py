@@ -0,0 +1,176 @@
+import math
+import tempfile
+from datetime import datetime
+from unittest.mock import patch
+
+import pytz
+from assets.tests.factories import AssetFactory, BarFactory
+from core.models import Strategy, Sweep
+from core.sweep import parameter_grid, run_sweep, sweep_chunks, sweep_parameters
+from core.tasks import run_sweep_chunk, start_sweep
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+
+
+def create_sweep(**kwargs):
+    defaults = {
+        "symbols": ["TSLA"],
+        "parameters": {
+            "windows": [1, 2],
+            "timeframes": [Strategy.DAY_1],
+            "stop_loss_percentages": [None, 5],
+        },
+        "trade_value": 100,
+    }
+    defaults.update(kwargs)
+    return Sweep.objects.create(**defaults)
+
+
+class SweepParameterTests(TestCase):
+    def test_parameter_grid(self):
+        """Every combination of parameters is returned."""
+        grid = parameter_grid([5, 10], ["15Min", "1H"], [2], [None, 4])
+
+        self.assertEqual(len(grid), 8)
+        self.assertIn(
+            {
+                "timeframe": "1H",
+                "window": 10,
+                "stop_loss_percentage": 2,
+                "take_profit_percentage": 4,
+            },
+            grid,
+        )
+
+    def test_random_search(self):
+        """Random searches sample the grid reproducibly."""
+        sweep = create_sweep(
+            parameters={"windows": list(range(1, 21)), "timeframes": ["1D"]},
+            search=Sweep.RANDOM,
+            samples=5,
+            seed=1,
+        )
+
+        parameters = sweep_parameters(sweep)
+
+        self.assertEqual(len(parameters), 5)
+        self.assertEqual(parameters, sweep_parameters(sweep))
+
+    def test_metric_validation(self):
+        """Sweeps can only be ranked by a statistic backtests return."""
+        with self.assertRaises(ValidationError):
+            create_sweep(metric="sharpe")
+
+        self.assertFalse(Sweep.objects.exists())
+
+    def test_sweep_chunks(self):
+        """Chunks contain parameters for a single symbol and timeframe."""
+        sweep = create_sweep(
+            symbols=["TSLA", "AAPL"],
+            parameters={"windows": [1, 2, 3], "timeframes": ["1D", "1H"]},
+        )
+
+        chunks = sweep_chunks(sweep, chunk_size=2)
+
+        self.assertEqual(len(chunks), 8)
+        for symbol, timeframe, parameters in chunks:
+            self.assertLessEqual(len(parameters), 2)
+            for params in parameters:
+                self.assertEqual(params["timeframe"], timeframe)
+
+
+class RunSweepTests(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.settings = override_settings(BAR_CACHE_DIR=self.tempdir.name)
+        self.settings.enable()
+        self.tsla = AssetFactory(symbol="TSLA")
+        closes = [10, 10, 10, 8, 12, 12, 8, 8, 13, 13, 9, 9]
+        for index, close in enumerate(closes):
+            BarFactory(
+                asset=self.tsla,
+                timeframe=Strategy.DAY_1,
+                t=index * 86400,
+                o=close,
+                h=close,
+                l=close,
+                c=close,
+            )
+
+    def tearDown(self):
+        self.settings.disable()
+        self.tempdir.cleanup()
+
+    def assertRanked(self, sweep):
+        results = list(sweep.results.all())
+        self.assertEqual(len(results), 4)
+        self.assertEqual([result.rank for result in results], [1, 2, 3, 4])
+        scores = [result.score for result in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_run_sweep(self):
+        """Results are saved and ranked by the sweep metric."""
+        sweep = create_sweep(symbols=["TSLA", "MISSING"])
+
+        run_sweep(sweep, workers=1)
+
+        sweep.refresh_from_db()
+        self.assertEqual(sweep.status, Sweep.COMPLETED)
+        self.assertIsNotNone(sweep.completed_at)
+        self.assertRanked(sweep)
+        result = sweep.results.first()
+        self.assertEqual(result.score, result.stats["sharpe_ratio"])
+
+    def test_run_sweep_process_pool(self):
+        """Backtests can be distributed over a process pool."""
+        sweep = create_sweep()
+
+        run_sweep(sweep, workers=2)
+
+        self.assertRanked(sweep)
+
+    def test_empty_window(self):
+        """Results of a window without bars are saved, and rank last."""
+        sweep = create_sweep(
+            metric="final_equity",
+            start_date=datetime(2030, 1, 1, tzinfo=pytz.utc),
+            end_date=datetime(2030, 2, 1, tzinfo=pytz.utc),
+        )
+
+        run_sweep(sweep, workers=1)
+
+        self.assertRanked(sweep)
+        result = sweep.results.first()
+        self.assertIsNone(result.stats["final_equity"])
+        self.assertEqual(result.score, -math.inf)
+
+    def test_ascending_metric(self):
+        """Results are ranked by the lowest value of ascending metrics."""
+        sweep = create_sweep(metric="max_drawdown")
+
+        run_sweep(sweep, workers=1)
+
+        drawdowns = [result.stats["max_drawdown"] for result in sweep.results.all()]
+        self.assertEqual(drawdowns, sorted(drawdowns))
+
+    @override_settings(SWEEP_CHUNK_SIZE=1)
+    @patch("core.tasks.group")
+    def test_start_sweep(self, mock_group):
+        """Sweeps are fanned out to Celery workers, and ranked when complete."""
+        sweep = create_sweep()
+
+        start_sweep(sweep.id)
+
+        sweep.refresh_from_db()
+        self.assertEqual(sweep.status, Sweep.RUNNING)
+        self.assertEqual(sweep.chunks, 4)
+        signatures = list(mock_group.call_args[0][0])
+        self.assertEqual(len(signatures), 4)
+
+        for signature in signatures:
+            run_sweep_chunk(*signature.args, **signature.kwargs)
+
+        sweep.refresh_from_db()
+        self.assertEqual(sweep.status, Sweep.COMPLETED)
+        self.assertEqual(sweep.completed_chunks, 4)
+        self.assertRanked(sweep)
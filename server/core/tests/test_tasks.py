@@ -1,18 +1,21 @@
 import json
 import uuid
-from datetime import timedelta
-from unittest.mock import patch
+from datetime import date, timedelta
+from unittest.mock import ANY, patch
 
 from alpaca_trade_api.entity import Account as AlpacaAccount
 from alpaca_trade_api.entity import Order as AlpacaOrder
 from alpaca_trade_api.entity import Position as AlpacaPosition
-from assets.models import Asset, Bar
+from assets.calendar import update_calendar
+from assets.models import Asset, Bar, TradingSession
 from assets.tests.factories import AssetFactory
 from core.tasks import (
     fetch_bar_data_for_strategy,
     moving_average_strategy,
     run_strategies_for_users,
+    schedule_strategy_cycles,
 )
+from core.models import Strategy
 from core.tests.factories import StrategyFactory
 from django.core.exceptions import ValidationError
 from django.test import TestCase
@@ -59,19 +62,57 @@ class CoreTaskTests(TestCase):
             ]
             Bar.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=True)
 
-    @patch("core.tasks.TradeApiRest")
+    @patch("core.tasks.update_bars")
+    @patch("core.tasks.is_market_open")
     @patch("core.tasks.moving_average_strategy")
     def test_run_strategies_for_user(
-        self, mock_moving_average_strategy, mock_trade_api
+        self, mock_moving_average_strategy, mock_is_market_open, mock_update_bars
     ):
         """Moving average strategies that are active are run for users."""
-        mock_trade_api.return_value.is_market_open.return_value = True
+        mock_is_market_open.return_value = True
 
         run_strategies_for_users()
 
+        mock_update_bars.assert_called_once_with(["TSLA"], Strategy.MIN_15, limit=1)
         self.assertEqual(mock_moving_average_strategy.call_count, 2)
-        mock_moving_average_strategy.assert_any_call(self.user_1)
-        mock_moving_average_strategy.assert_any_call(self.user_2)
+        mock_moving_average_strategy.assert_any_call(
+            self.user_1, ANY, None, latest_bars=False
+        )
+        mock_moving_average_strategy.assert_any_call(
+            self.user_2, ANY, None, latest_bars=False
+        )
+
+    @patch("core.tasks.update_bars")
+    @patch("core.tasks.is_market_open")
+    @patch("core.tasks.moving_average_strategy")
+    def test_run_strategies_for_timeframe(
+        self, mock_moving_average_strategy, mock_is_market_open, mock_update_bars
+    ):
+        """Cycles for a timeframe only run users with strategies of it."""
+        self.strategy_2.timeframe = Strategy.DAY_1
+        self.strategy_2.save()
+
+        run_strategies_for_users(timeframe=Strategy.DAY_1)
+
+        mock_is_market_open.assert_not_called()
+        mock_update_bars.assert_called_once_with(["TSLA"], Strategy.DAY_1, limit=1)
+        mock_moving_average_strategy.assert_called_once_with(
+            self.user_2, ANY, Strategy.DAY_1, latest_bars=False
+        )
+
+    @patch("core.tasks.run_strategies_for_users.apply_async")
+    @patch("core.tasks.closed_timeframes")
+    def test_schedule_strategy_cycles(self, mock_closed_timeframes, mock_apply_async):
+        """Cycles are dispatched after bars close for active timeframes."""
+        mock_closed_timeframes.return_value = [Strategy.MIN_15]
+
+        with self.settings(STRATEGY_CYCLE_OFFSET_SECONDS=5):
+            schedule_strategy_cycles()
+
+        mock_closed_timeframes.assert_called_once_with(ANY, [Strategy.MIN_15])
+        mock_apply_async.assert_called_once_with(
+            kwargs={"timeframe": Strategy.MIN_15}, countdown=5
+        )
 
     @patch("core.tasks.logger")
     @patch("core.tasks.fetch_bar_data_for_strategy")
@@ -113,6 +154,56 @@ class CoreTaskTests(TestCase):
             fetch_bar_data_for_strategy(self.strategy_1)
             mock_update_bars.assert_called_once_with(["TSLA"], "15Min", 131)
 
+    @patch("core.tasks.load_sessions")
+    @patch("core.tasks.update_bars")
+    def test_fetch_bar_data_for_strategy_sessions(
+        self, mock_update_bars, mock_load_sessions
+    ):
+        """Bar data of missing sessions is fetched if the calendar is loaded."""
+        calendar = [
+            {"date": f"2021-03-{day:02}", "open": "09:30", "close": "16:00"}
+            for day in range(1, 9)
+        ]
+        update_calendar(date(2021, 3, 1), date(2021, 3, 8), calendar)
+        sessions = list(TradingSession.objects.all())
+
+        with self.subTest(msg="bar data is loaded."):
+            mock_load_sessions.return_value = []
+            self.assertEqual(fetch_bar_data_for_strategy(self.strategy_1), 130)
+            mock_load_sessions.assert_called_once_with(
+                Asset.objects.get(symbol="TSLA"), Bar.MIN_15, sessions[2:]
+            )
+
+        with self.subTest(msg="bar data is missing."):
+            mock_load_sessions.return_value = sessions[-1:]
+            self.assertIsNone(fetch_bar_data_for_strategy(self.strategy_1))
+
+        mock_update_bars.assert_not_called()
+
+    @patch("core.tasks.load_sessions")
+    @patch("core.tasks.update_bars")
+    def test_fetch_bar_data_for_strategy_session_in_progress(
+        self, mock_update_bars, mock_load_sessions
+    ):
+        """Bars of the session in progress are loaded up to now."""
+        calendar = [
+            {"date": f"2021-03-{day:02}", "open": "09:30", "close": "16:00"}
+            for day in range(1, 9)
+        ]
+        update_calendar(date(2021, 3, 1), date(2021, 3, 8), calendar)
+        sessions = list(TradingSession.objects.all())
+        # 2021-03-08 12:00 EST, when 10 bars of the session have begun
+        now = sessions[-1].open + timedelta(hours=2, minutes=30)
+        mock_load_sessions.return_value = sessions[-1:]
+
+        with patch("core.tasks.timezone.now", return_value=now):
+            self.assertEqual(fetch_bar_data_for_strategy(self.strategy_1), 130)
+
+        mock_load_sessions.assert_called_once_with(
+            Asset.objects.get(symbol="TSLA"), Bar.MIN_15, sessions[2:]
+        )
+        mock_update_bars.assert_not_called()
+
     @patch("core.tasks.TradeApiRest")
     @patch("core.tasks.time.mktime")
     @patch("core.tasks.update_bars")
@@ -231,7 +322,8 @@ class CoreTaskTests(TestCase):
                 notional=float(self.strategy_1.trade_value),
                 side=Order.BUY,
                 type=Order.MARKET,
-                time_in_force=Order.GTC,
+                time_in_force=Order.DAY,
+                client_order_id=ANY,
             )
 
         mock_mktime.reset_mock()
@@ -249,7 +341,8 @@ class CoreTaskTests(TestCase):
                 notional=float(self.strategy_1.trade_value),
                 side=Order.SELL,
                 type=Order.MARKET,
-                time_in_force=Order.GTC,
+                time_in_force=Order.DAY,
+                client_order_id=ANY,
             )
 
         mock_mktime.reset_mock()
@@ -264,7 +357,7 @@ class CoreTaskTests(TestCase):
             moving_average_strategy(self.user_1)
             mock_trade_api.return_value.submit_order.assert_not_called()
 
-    @patch("core.tasks.logger")
+    @patch("orders.submission.logger")
     @patch("core.tasks.TradeApiRest")
     @patch("core.tasks.time.mktime")
     @patch("core.tasks.update_bars")
@@ -0,0 +1,135 @@
+import tempfile
+
+import numpy as np
+from assets.cache import BarCache
+from assets.tests.factories import AssetFactory, BarFactory
+from core.models import Strategy
+from core.walkforward import (
+    cached_signals,
+    candidate_parameters,
+    promote_strategy,
+    stitch_equity,
+    walk_forward,
+    walk_forward_windows,
+)
+from django.test import TestCase
+from django.utils import timezone
+from users.tests.factories import UserFactory
+
+
+class WalkForwardWindowTests(TestCase):
+    def test_walk_forward_windows(self):
+        """Windows roll forward by the length of the test window."""
+        self.assertEqual(walk_forward_windows(10, 4, 3), [(0, 4, 7), (3, 7, 10)])
+        self.assertEqual(walk_forward_windows(11, 4, 3)[-1], (6, 10, 11))
+        self.assertEqual(walk_forward_windows(4, 4, 3), [])
+
+    def test_candidate_parameters(self):
+        """Candidates default to every strategy type."""
+        candidates = candidate_parameters(stop_loss_percentages=[1, 2])
+
+        self.assertEqual(len(candidates), 2 * len(Strategy.TYPE_CHOICES))
+
+    def test_stitch_equity(self):
+        """Test window equity curves are joined by compounding returns."""
+        windows = [
+            {"t": np.array([1, 2]), "equity": np.array([110.0, 121.0])},
+            {"t": np.array([3]), "equity": np.array([50.0])},
+        ]
+
+        t, equity = stitch_equity(windows, initial_cash=100)
+
+        np.testing.assert_array_equal(t, [1, 2, 3])
+        np.testing.assert_allclose(equity, [110, 121, 60.5])
+
+
+class WalkForwardTests(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.cache = BarCache(self.tempdir.name)
+        self.tsla = AssetFactory(symbol="TSLA")
+        closes = 100 + 10 * np.sin(np.linspace(0, 12, 80))
+        for index, close in enumerate(closes):
+            BarFactory(
+                asset=self.tsla,
+                timeframe=Strategy.DAY_1,
+                t=index * 86400,
+                o=close,
+                h=close,
+                l=close,
+                c=close,
+            )
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_walk_forward(self):
+        """Only out-of-sample results are stitched together."""
+        result = walk_forward(
+            self.tsla,
+            Strategy.DAY_1,
+            train_days=30,
+            test_days=10,
+            trade_value=1000,
+            workers=1,
+            cache=self.cache,
+        )
+
+        self.assertEqual(len(result.windows), 5)
+        self.assertEqual(len(result.equity), 50)
+        self.assertEqual(result.t[0], 30 * 86400)
+        self.assertEqual(result.stats["bars"], 50)
+        self.assertEqual(result.parameters, result.windows[-1]["parameters"])
+        for window in result.windows:
+            self.assertLess(window["train_start"], window["test_start"])
+
+    def test_walk_forward_process_pool(self):
+        """Windows can be optimised in parallel."""
+        kwargs = {
+            "train_days": 30,
+            "test_days": 10,
+            "trade_value": 1000,
+            "cache": self.cache,
+        }
+
+        serial = walk_forward(self.tsla, Strategy.DAY_1, workers=1, **kwargs)
+        parallel = walk_forward(self.tsla, Strategy.DAY_1, workers=2, **kwargs)
+
+        np.testing.assert_allclose(serial.equity, parallel.equity)
+
+    def test_cached_signals(self):
+        """Signals are computed once per strategy type and bar count."""
+        self.cache.sync(self.tsla, Strategy.DAY_1)
+        cached_signals.cache_clear()
+        root = self.cache.root
+
+        cached_signals(root, "TSLA", Strategy.DAY_1, Strategy.MOVING_AVERAGE_7D, 80)
+        cached_signals(root, "TSLA", Strategy.DAY_1, Strategy.MOVING_AVERAGE_7D, 80)
+        cached_signals(root, "TSLA", Strategy.DAY_1, Strategy.MOVING_AVERAGE_14D, 80)
+
+        info = cached_signals.cache_info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 2)
+
+    def test_promote_strategy(self):
+        """Validated parameters can be promoted to a live strategy."""
+        user = UserFactory()
+        strategy = promote_strategy(
+            user,
+            self.tsla,
+            Strategy.DAY_1,
+            {
+                "type": Strategy.MOVING_AVERAGE_14D,
+                "stop_loss_percentage": 2,
+                "take_profit_percentage": None,
+            },
+            500,
+            start_date=timezone.now(),
+            end_date=timezone.now() + timezone.timedelta(days=30),
+        )
+
+        self.assertEqual(strategy.user, user)
+        self.assertEqual(strategy.type, Strategy.MOVING_AVERAGE_14D)
+        self.assertEqual(strategy.timeframe, Strategy.DAY_1)
+        self.assertEqual(strategy.stop_loss_percentage, 2)
+        self.assertIn(strategy, Strategy.objects.active())
@@ -1,9 +1,12 @@
 from rest_framework.routers import DefaultRouter
 
-from .views import StrategyView
+from .views import AnalyticsView, ScreenerMatchView, SignalView, StrategyView
 
 router = DefaultRouter()
 
 router.register(r"strategies/", StrategyView, basename="strategies")
+router.register(r"screener", ScreenerMatchView, basename="screener")
+router.register(r"signals", SignalView, basename="signals")
+router.register(r"analytics", AnalyticsView, basename="analytics")
 
 urlpatterns = router.urls
@@ -1,5 +1,8 @@
+from datetime import datetime
 from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
+import pytz
+
 
 def add_query_params_to_url(url, params):
     """Add query params to a url."""
@@ -8,3 +11,8 @@ def add_query_params_to_url(url, params):
     query.update(params)
     redirect_parts[4] = urlencode(query)
     return urlunparse(redirect_parts)
+
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD date as midnight UTC."""
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=pytz.utc)
@@ -1,10 +1,21 @@
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
 
 from core.permissions import IsAdminOrOwner
 
-from .models import Strategy
-from .serializers import StrategyCreateSerializer, StrategySerializer
+from .analytics import performance
+from .models import ScreenerMatch, Signal, Strategy
+from .serializers import (
+    PerformanceSerializer,
+    ScreenerMatchSerializer,
+    SignalSerializer,
+    StrategyCreateSerializer,
+    StrategySerializer,
+)
 
 
 class StrategyView(viewsets.ModelViewSet):
@@ -32,3 +43,96 @@ class StrategyView(viewsets.ModelViewSet):
         else:
             permission_classes = [IsAdminOrOwner]
         return [permission() for permission in permission_classes]
+
+
+class ScreenerMatchView(viewsets.ReadOnlyModelViewSet):
+    def get_queryset(self, *args, **kwargs):
+        """Return the latest screener matches to requesting user."""
+        queryset = ScreenerMatch.objects.select_related("asset")
+        condition = self.request.query_params.get("condition")
+        signal = self.request.query_params.get("signal")
+
+        if condition:
+            queryset = queryset.filter(condition=condition)
+
+        if signal:
+            if signal not in [str(value) for value, _ in ScreenerMatch.SIGNAL_CHOICES]:
+                raise ValidationError("`signal` must be either 1 (buy) or -1 (sell)")
+            queryset = queryset.filter(signal=signal)
+
+        return queryset
+
+    def get_serializer_class(self):
+        """
+        Instantiates and returns the serializer that the screener view requires.
+        """
+        return ScreenerMatchSerializer
+
+    def get_permissions(self):
+        """
+        Instantiates and returns the list of permissions that the screener view
+        requires.
+        """
+        return [IsAuthenticated()]
+
+
+class SignalView(viewsets.ReadOnlyModelViewSet):
+    def get_queryset(self, *args, **kwargs):
+        """Return the signals of the requesting user's strategies, latest first."""
+        strategies = Strategy.objects.visible(self.request.user)
+        queryset = Signal.objects.filter(strategy__in=strategies).select_related(
+            "asset"
+        )
+        strategy = self.request.query_params.get("strategy")
+
+        if strategy:
+            if not strategy.isdigit():
+                raise ValidationError("`strategy` must be a strategy id")
+            queryset = queryset.filter(strategy=strategy)
+
+        return queryset.order_by("strategy", "-t")
+
+    def get_serializer_class(self):
+        """
+        Instantiates and returns the serializer that the signal view requires.
+        """
+        return SignalSerializer
+
+    def get_permissions(self):
+        """
+        Instantiates and returns the list of permissions that the signal view
+        requires.
+        """
+        return [IsAuthenticated()]
+
+    @action(detail=False)
+    def latest(self, request):
+        """Return the latest signal of each strategy."""
+        # Ordered in the reverse of the (strategy, t) index, so it is scanned
+        # backwards rather than the signals being sorted
+        queryset = self.get_queryset().order_by("-strategy", "-t").distinct("strategy")
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+
+class AnalyticsView(viewsets.ViewSet):
+    # Strategies are looked up by their integer primary key
+    lookup_value_regex = r"\d+"
+
+    def list(self, request):
+        """Return the performance of the requesting user's orders."""
+        serializer = PerformanceSerializer(performance(user=request.user))
+        return Response(serializer.data)
+
+    def retrieve(self, request, pk=None):
+        """Return the performance of the orders of a strategy."""
+        strategy = get_object_or_404(Strategy.objects.visible(request.user), pk=pk)
+        serializer = PerformanceSerializer(performance(strategy=strategy))
+        return Response(serializer.data)
+
+    def get_permissions(self):
+        """
+        Instantiates and returns the list of permissions that the analytics
+        view requires.
+        """
+        return [IsAuthenticated()]
@@ -0,0 +1,255 @@
+import itertools
+import logging
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+from assets.cache import BarCache
+from django.conf import settings
+
+from .backtest import DEFAULT_INITIAL_CASH, backtest_stats, run_backtest, slice_bars
+from .indicators import Indicators
+from .metrics import TRADING_DAYS_PER_YEAR, simple_returns
+from .models import Strategy
+from .strategies import get_strategy
+from .sweep import score
+
+logger = logging.getLogger(__name__)
+
+WalkForwardResult = namedtuple(
+    "WalkForwardResult", ["windows", "t", "equity", "stats", "parameters"]
+)
+
+
+def candidate_parameters(
+    types=None, stop_loss_percentages=None, take_profit_percentages=None
+):
+    """
+    Return every combination of strategy parameters to optimise over.
+
+    :param types(list): strategy types, defaults to all types
+    :param stop_loss_percentages(list): stop loss percentages, None for no stop
+    :param take_profit_percentages(list): take profit percentages, None for none
+    :return(list): parameter dicts
+    """
+    return [
+        {
+            "type": strategy_type,
+            "stop_loss_percentage": stop_loss,
+            "take_profit_percentage": take_profit,
+        }
+        for strategy_type, stop_loss, take_profit in itertools.product(
+            types or [choice for choice, _ in Strategy.TYPE_CHOICES],
+            stop_loss_percentages or [None],
+            take_profit_percentages or [None],
+        )
+    ]
+
+
+def walk_forward_windows(count, train_bars, test_bars):
+    """
+    Return rolling (train start, test start, test end) bar indexes.
+
+    Each test window follows its training window, and windows roll forward by
+    the length of the test window so test windows don't overlap.
+
+    :param count(int): number of bars
+    :param train_bars(int): number of bars in each training window
+    :param test_bars(int): number of bars in each test window
+    :return(list): index tuples
+    """
+    return [
+        (start, start + train_bars, min(start + train_bars + test_bars, count))
+        for start in range(0, count - train_bars, test_bars)
+    ]
+
+
+@lru_cache(maxsize=256)
+def cached_signals(root, symbol, timeframe, strategy_type, count):
+    """
+    Return the signals of a strategy type over all cached bars of a symbol.
+
+    Indicators at each bar only depend on earlier bars, so signals computed
+    once over the full history are sliced by every walk-forward window instead
+    of being recomputed for overlapping windows. The bar count is part of the
+    key, so signals are recomputed when the cache is synced.
+    """
+    bars = slice_bars(BarCache(root).load(symbol, timeframe), upper=count)
+    return get_strategy(strategy_type).signals(Indicators(bars), timeframe)
+
+
+def optimise_window(
+    symbol,
+    timeframe,
+    bounds,
+    candidates,
+    trade_value,
+    metric="sharpe_ratio",
+    root=None,
+):
+    """
+    Optimise parameters over a training window, and test them on the bars after.
+
+    This doesn't access the database, so can run in a process pool.
+
+    :param symbol(str): asset symbol
+    :param timeframe(str): bar timeframe eg. 15Min
+    :param bounds(tuple): (train start, test start, test end) bar indexes
+    :param candidates(list): parameter dicts to optimise over
+    :param trade_value(float): maximum notional value of each order
+    :param metric(str): statistic to optimise
+    :param root(str): bar cache directory
+    :return(dict): window times, best parameters, train and test statistics,
+    test equity curve and trades
+    """
+    root = root or settings.BAR_CACHE_DIR
+    bars = BarCache(root).load(symbol, timeframe)
+    count = len(bars.t)
+    train_start, test_start, test_end = bounds
+    bars_per_day = Strategy.BARS_PER_DAY[timeframe]
+
+    def backtest(params, lower, upper):
+        signals = cached_signals(root, symbol, timeframe, params["type"], count)
+        return run_backtest(
+            slice_bars(bars, lower, upper),
+            signals[lower:upper],
+            trade_value,
+            periods_per_year=TRADING_DAYS_PER_YEAR * bars_per_day,
+            stop_loss_percentage=params["stop_loss_percentage"],
+            take_profit_percentage=params["take_profit_percentage"],
+        )
+
+    trained = [
+        (params, backtest(params, train_start, test_start).stats)
+        for params in candidates
+    ]
+    params, train_stats = max(trained, key=lambda result: score(result[1], metric))
+    test = backtest(params, test_start, test_end)
+    return {
+        "train_start": int(bars.t[train_start]),
+        "test_start": int(bars.t[test_start]),
+        "test_end": int(bars.t[test_end - 1]),
+        "parameters": params,
+        "train_stats": train_stats,
+        "test_stats": test.stats,
+        "t": np.asarray(test.t),
+        "equity": test.equity,
+        "trades": test.trades,
+    }
+
+
+def stitch_equity(windows, initial_cash=DEFAULT_INITIAL_CASH):
+    """
+    Join the out-of-sample equity curves of consecutive test windows.
+
+    Each test window is simulated from the same initial cash, so the curves are
+    joined by compounding their returns.
+    """
+    if not windows:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    returns = [
+        simple_returns(np.insert(window["equity"], 0, initial_cash))
+        for window in windows
+    ]
+    t = np.concatenate([window["t"] for window in windows])
+    equity = initial_cash * np.cumprod(1 + np.concatenate(returns))
+    return t, equity
+
+
+def walk_forward(
+    asset,
+    timeframe,
+    train_days,
+    test_days,
+    trade_value,
+    candidates=None,
+    metric="sharpe_ratio",
+    workers=None,
+    cache=None,
+):
+    """
+    Validate strategy parameters by rolling walk-forward optimisation.
+
+    History is sliced into rolling training and test windows. Parameters are
+    re-optimised over each training window in parallel, and only their
+    (out-of-sample) test window results are stitched together and reported.
+
+    :param asset(Asset): asset to trade
+    :param timeframe(str): bar timeframe eg. 15Min
+    :param train_days(int): business days in each training window
+    :param test_days(int): business days in each test window
+    :param trade_value(float): maximum notional value of each order
+    :param candidates(list): parameter dicts, defaults to all strategy types
+    :param metric(str): statistic to optimise
+    :param workers(int): number of worker processes, defaults to
+    `SWEEP_WORKERS` or the number of CPUs
+    :param cache(BarCache): bar cache to read from
+    :return(WalkForwardResult): windows, stitched equity curve, statistics and
+    the parameters of the latest window
+    """
+    cache = cache or BarCache()
+    cache.sync(asset, timeframe)
+    symbol = asset.symbol
+    candidates = candidates or candidate_parameters()
+    workers = workers or settings.SWEEP_WORKERS or os.cpu_count()
+    bars_per_day = Strategy.BARS_PER_DAY[timeframe]
+    count = len(cache.load(symbol, timeframe).t)
+    bounds = walk_forward_windows(
+        count, train_days * bars_per_day, test_days * bars_per_day
+    )
+
+    # Compute signals once before forking, so workers inherit them
+    for strategy_type in {params["type"] for params in candidates}:
+        cached_signals(cache.root, symbol, timeframe, strategy_type, count)
+
+    args = (symbol, timeframe)
+    kwargs = {
+        "candidates": candidates,
+        "trade_value": float(trade_value),
+        "metric": metric,
+        "root": cache.root,
+    }
+    if workers == 1 or len(bounds) < 2:
+        windows = [optimise_window(*args, window, **kwargs) for window in bounds]
+    else:
+        # Workers don't use the database connections they inherit
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(optimise_window, *args, window, **kwargs)
+                for window in bounds
+            ]
+            windows = [future.result() for future in futures]
+
+    t, equity = stitch_equity(windows)
+    trades = [trade for window in windows for trade in window["trades"]]
+    stats = backtest_stats(equity, trades, TRADING_DAYS_PER_YEAR * bars_per_day)
+    parameters = windows[-1]["parameters"] if windows else None
+    return WalkForwardResult(windows, t, equity, stats, parameters)
+
+
+def promote_strategy(user, asset, timeframe, parameters, trade_value, **kwargs):
+    """
+    Create a live strategy from validated parameters.
+
+    :param user(User): owner of the strategy
+    :param asset(Asset): asset to trade
+    :param timeframe(str): bar timeframe eg. 15Min
+    :param parameters(dict): strategy type and stop loss/take profit parameters
+    :param trade_value(float): maximum notional value of each order
+    :param kwargs: other strategy fields eg. start and end dates
+    :return(Strategy): the created strategy
+    """
+    return Strategy.objects.create(
+        user=user,
+        asset=asset,
+        timeframe=timeframe,
+        type=parameters["type"],
+        trade_value=trade_value,
+        stop_loss_percentage=parameters["stop_loss_percentage"],
+        take_profit_percentage=parameters["take_profit_percentage"],
+        **kwargs,
+    )
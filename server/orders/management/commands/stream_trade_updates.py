@@ -0,0 +1,40 @@
+from accounts.models import Credentials
+from alpaca_trade_api.common import URL
+from alpaca_trade_api.stream import Stream
+from django.core.management.base import BaseCommand
+
+from orders.stream import TradeUpdateConsumer
+
+
+class Command(BaseCommand):
+    help = (
+        "Consume Alpaca's trade_updates streams of every account, applying order "
+        "status changes and fills to orders and the position ledger as they "
+        "happen."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, help="Maximum updates applied per transaction."
+        )
+        parser.add_argument(
+            "--interval-ms", type=int, help="Milliseconds updates wait to batch."
+        )
+
+    def handle(self, *args, **kwargs):
+        interval = kwargs["interval_ms"]
+        consumer = TradeUpdateConsumer(
+            batch_size=kwargs["batch_size"],
+            interval=None if interval is None else interval / 1000,
+        )
+        # Credentials of the Alpaca account are read from the APCA_API_KEY_ID,
+        # APCA_API_SECRET_KEY and APCA_API_BASE_URL env variables, and every
+        # account with credentials is streamed with its own
+        streams = [Stream()] + [
+            Stream(
+                credentials.key_id, credentials.secret_key, URL(credentials.base_url)
+            )
+            for credentials in Credentials.objects.all()
+        ]
+        applied = consumer.run(*streams)
+        self.stdout.write(f"Orders updated: {applied}")
@@ -45,6 +45,8 @@ class Order(models.Model):
         (SUSPENDED, _("suspended")),
         (CALCULATED, _("calculated")),
     ]
+    # Statuses after which an order no longer changes
+    CLOSED_STATUSES = [FILLED, CANCELED, EXPIRED, REPLACED, REJECTED]
 
     BUY = "buy"
     SELL = "sell"
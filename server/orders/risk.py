@@ -0,0 +1,289 @@
+import logging
+import math
+from datetime import datetime, time
+
+import pytz
+from assets.compaction import MARKET_TIMEZONE
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+# Equity below which pattern day traders are restricted from day trading
+PDT_MIN_EQUITY = 25000
+
+# Day trades in five business days before an account is flagged as a
+# pattern day trader
+PDT_MAX_DAY_TRADES = 3
+
+# Smallest notional order Alpaca accepts
+MIN_NOTIONAL = 1
+
+# Account flags which block every order
+BLOCKED_FLAGS = ["account_blocked", "trading_blocked", "trade_suspended_by_user"]
+
+# Orders which didn't trade, so can't make a day trade
+UNFILLED_STATUSES = [Order.CANCELED, Order.EXPIRED, Order.REJECTED]
+
+
+def account_state(ledger):
+    """
+    Return the account of a ledger as a dict, from the synced account if the
+    user has one, otherwise from Alpaca.
+    """
+    if ledger.account is None:
+        return ledger.api.account_info().__dict__["_raw"]
+    return {
+        field.name: getattr(ledger.account, field.name)
+        for field in ledger.account._meta.concrete_fields
+    }
+
+
+def to_float(value):
+    """Return an account value as a float, or None if it isn't reported."""
+    return None if value is None or value == "" else float(value)
+
+
+def floor_cents(value):
+    """Return a dollar amount rounded down to the cent."""
+    return math.floor(value * 100) / 100
+
+
+class RiskCheck:
+    """
+    Validate the order intents of a strategy cycle together, before they're
+    submitted.
+
+    Account state is read once, from the ledger, and each intent is checked
+    against what the intents before it have used. Intents which can't be
+    placed are rejected, and intents which are too large are trimmed, so
+    neither spends the Alpaca rate limit.
+
+    Buys are trimmed to the buying power and the exposure limits. Sells are
+    trimmed to the long position, unless the asset can be shorted. Positions
+    are only checked if the ledger is local.
+    """
+
+    def __init__(
+        self, ledger, prices=None, max_symbol_exposure=None, max_user_exposure=None
+    ):
+        """
+        :param ledger(Ledger): account and positions of the user
+        :param prices(dict): latest prices by asset id
+        :param max_symbol_exposure(float): maximum dollar exposure to a symbol,
+        defaults to `RISK_MAX_SYMBOL_EXPOSURE`
+        :param max_user_exposure(float): maximum dollar exposure to every
+        symbol together, defaults to `RISK_MAX_USER_EXPOSURE`
+        """
+        self.ledger = ledger
+        self.prices = {str(pk): price for pk, price in (prices or {}).items()}
+        self.max_symbol_exposure = (
+            settings.RISK_MAX_SYMBOL_EXPOSURE
+            if max_symbol_exposure is None
+            else max_symbol_exposure
+        )
+        self.max_user_exposure = (
+            settings.RISK_MAX_USER_EXPOSURE
+            if max_user_exposure is None
+            else max_user_exposure
+        )
+
+    def check(self, intents):
+        """
+        Check a cycle's order intents.
+
+        :param intents(list): order intents
+        :return(tuple): accepted intents, some trimmed, and the reasons intents
+        were rejected by client order id
+        """
+        accepted = []
+        rejected = {}
+        if not intents:
+            return accepted, rejected
+
+        state = account_state(self.ledger)
+        blocked = [flag for flag in BLOCKED_FLAGS if state.get(flag)]
+        if blocked:
+            logger.warning(f"Orders blocked for user {self.ledger.user.pk}: {blocked}")
+            return [], {intent.client_order_id: blocked[0] for intent in intents}
+
+        day_trades = self.day_trades(intents) if self.pdt_restricted(state) else set()
+        shorting = bool(state.get("shorting_enabled"))
+        exposure = self.exposure()
+        # What the accepted buys have left of the buying power and exposure
+        # limits
+        budget = {
+            "buying_power": to_float(state.get("buying_power")),
+            "exposure": exposure,
+            "user_exposure": sum(exposure.values()),
+        }
+
+        for intent in intents:
+            asset = intent.strategy.asset
+            asset_id = str(asset.pk)
+            price = self.prices.get(asset_id)
+            if not asset.tradable:
+                reason = "not tradable"
+            elif (asset_id, intent.side) in day_trades:
+                reason = "pattern day trader"
+            elif intent.side == Order.SELL:
+                checked, reason = self.check_sell(intent, price, shorting)
+            else:
+                checked, reason = self.check_buy(intent, price, budget)
+            if reason is None:
+                accepted.append(checked)
+            else:
+                rejected[intent.client_order_id] = reason
+
+        if rejected:
+            logger.info(f"Orders rejected for user {self.ledger.user.pk}: {rejected}")
+        return accepted, rejected
+
+    def check_sell(self, intent, price, shorting):
+        """
+        Check a sell intent, trimming it to the long position unless the asset
+        can be shorted.
+
+        :param intent(OrderIntent): sell intent
+        :param price(float): latest price of the asset, or None
+        :param shorting(bool): the account can short
+        :return(tuple): the accepted intent, or None and the reason it was
+        rejected
+        """
+        asset = intent.strategy.asset
+        if asset.shortable and shorting:
+            return intent, None
+        trimmed = self.trim_to_position(intent, price)
+        if trimmed is None:
+            return None, "not shortable"
+        return trimmed, None
+
+    def check_buy(self, intent, price, budget):
+        """
+        Check a buy intent, trimming it to the buying power and exposure limits
+        left by the buys before it.
+
+        :param intent(OrderIntent): buy intent
+        :param price(float): latest price of the asset, or None
+        :param budget(dict): remaining `buying_power`, and `exposure` by asset id
+        and `user_exposure`, which are reduced by the accepted value
+        :return(tuple): the accepted intent, or None and the reason it was
+        rejected
+        """
+        value = self.value(intent, price)
+        if value is None:
+            return intent, None
+
+        asset_id = str(intent.strategy.asset.pk)
+        exposure = budget["exposure"]
+        limits = [(value, None)]
+        if budget["buying_power"] is not None:
+            limits.append((budget["buying_power"], "buying power"))
+        if self.max_symbol_exposure is not None:
+            limits.append(
+                (
+                    self.max_symbol_exposure - exposure.get(asset_id, 0),
+                    "symbol exposure",
+                )
+            )
+        if self.max_user_exposure is not None:
+            limits.append(
+                (self.max_user_exposure - budget["user_exposure"], "user exposure")
+            )
+        limit, reason = min(limits, key=lambda limit: limit[0])
+        if limit < MIN_NOTIONAL:
+            return None, reason
+        if limit < value:
+            logger.info(f"Order trimmed to {reason}: {intent.client_order_id}")
+            intent = self.trim(intent, floor_cents(limit), price)
+            value = self.value(intent, price)
+
+        if budget["buying_power"] is not None:
+            budget["buying_power"] -= value
+        exposure[asset_id] = exposure.get(asset_id, 0) + value
+        budget["user_exposure"] += value
+        return intent, None
+
+    def pdt_restricted(self, state):
+        """Return true if another day trade would break the day trading rules."""
+        equity = to_float(state.get("equity"))
+        day_trade_count = int(state.get("daytrade_count") or 0)
+        return (
+            equity is not None
+            and equity < PDT_MIN_EQUITY
+            and (
+                bool(state.get("pattern_day_trader"))
+                or day_trade_count >= PDT_MAX_DAY_TRADES
+            )
+        )
+
+    def day_trades(self, intents):
+        """
+        Return the (asset id, side) pairs of intents which would close a trade
+        opened today, from the user's orders with one query.
+        """
+        today = timezone.now().astimezone(pytz.timezone(MARKET_TIMEZONE)).date()
+        start = pytz.timezone(MARKET_TIMEZONE).localize(datetime.combine(today, time()))
+        orders = (
+            Order.objects.filter(
+                user=self.ledger.user,
+                asset_id__in={intent.strategy.asset.pk for intent in intents},
+                submitted_at__gte=start,
+            )
+            .exclude(status__in=UNFILLED_STATUSES)
+            .values_list("asset_id", "side")
+        )
+        opposite = {Order.BUY: Order.SELL, Order.SELL: Order.BUY}
+        return {(str(asset_id), opposite[side]) for asset_id, side in orders}
+
+    def exposure(self):
+        """Return the dollar exposure of the user's positions by asset id."""
+        if self.ledger.account is None:
+            return {}
+        exposure = {}
+        for asset_id, position in self.ledger.positions.items():
+            price = self.prices.get(asset_id)
+            if price is not None:
+                value = abs(float(position.qty)) * price
+            elif position.market_value is not None:
+                value = abs(float(position.market_value))
+            else:
+                value = abs(float(position.cost_basis))
+            exposure[asset_id] = value
+        return exposure
+
+    def trim_to_position(self, intent, price):
+        """
+        Return a sell intent trimmed to the long position, or None if there's
+        no long position to sell.
+        """
+        if self.ledger.account is None:
+            return intent
+        position = self.ledger.positions.get(str(intent.strategy.asset.pk))
+        held = max(float(position.qty), 0) if position is not None else 0
+        if intent.qty is not None:
+            if not held:
+                return None
+            return intent._replace(qty=min(intent.qty, held))
+        if price is None:
+            return intent
+        held_value = floor_cents(held * price)
+        if held_value < MIN_NOTIONAL:
+            return None
+        return intent._replace(notional=min(intent.notional, held_value))
+
+    @staticmethod
+    def value(intent, price):
+        """Return the dollar value of an intent, or None if it isn't known."""
+        if intent.qty is None:
+            return intent.notional
+        return None if price is None else intent.qty * price
+
+    @staticmethod
+    def trim(intent, value, price):
+        """Return an intent trimmed to a dollar value."""
+        if intent.qty is None:
+            return intent._replace(notional=value)
+        return intent._replace(qty=math.floor(value / price * 1e9) / 1e9)
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent after a trade update from Alpaca's stream is applied to an order, with
+# the updated `order` and the `event` eg. fill
+trade_update = Signal()
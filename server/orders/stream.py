@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from accounts.ledger import apply_fill
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import Order
+from .signals import trade_update
+
+logger = logging.getLogger(__name__)
+
+# Order fields updated from trade updates
+UPDATE_FIELDS = [
+    "status",
+    "qty",
+    "filled_qty",
+    "filled_avg_price",
+    "updated_at",
+    "filled_at",
+    "expired_at",
+    "canceled_at",
+    "failed_at",
+    "replaced_at",
+]
+
+DECIMAL_FIELDS = ("qty", "filled_qty", "filled_avg_price")
+DATETIME_FIELDS = (
+    "updated_at",
+    "filled_at",
+    "expired_at",
+    "canceled_at",
+    "failed_at",
+    "replaced_at",
+)
+
+
+def parse_order(raw_order):
+    """Return the fields of an Alpaca order which trade updates change."""
+    values = {"status": raw_order["status"]}
+    for field in DECIMAL_FIELDS:
+        value = raw_order.get(field)
+        values[field] = None if value is None else Decimal(value)
+    for field in DATETIME_FIELDS:
+        value = raw_order.get(field)
+        values[field] = None if value is None else parse_datetime(value)
+    values["filled_qty"] = values["filled_qty"] or Decimal(0)
+    return values
+
+
+def fill_price(order, values):
+    """
+    Return the average price of the quantity filled since an order was last
+    updated, from the change in its average fill price.
+    """
+    filled = values["filled_qty"] - order.filled_qty
+    cost = values["filled_qty"] * (values["filled_avg_price"] or 0) - (
+        order.filled_qty * (order.filled_avg_price or 0)
+    )
+    return cost / filled
+
+
+def apply_trade_updates(updates):
+    """
+    Apply a batch of trade updates to orders, and their fills to the position
+    ledger, in one transaction.
+
+    Updates older than an order's last update are ignored, and fills are
+    applied from the change in the filled quantity, so replayed updates
+    aren't applied twice. Updates to orders which weren't placed through the
+    strategy runner or synced are skipped.
+
+    :param updates(list): trade updates from Alpaca's stream
+    :return(int): number of orders updated
+    """
+    updates = [
+        update.__dict__["_raw"] if hasattr(update, "_raw") else update
+        for update in updates
+    ]
+    orders = Order.objects.select_related("user", "asset_id").in_bulk(
+        {uuid.UUID(str(update["order"]["id"])) for update in updates}
+    )
+
+    changed = {}
+    fills = []
+    events = []
+    for update in updates:
+        order = orders.get(uuid.UUID(str(update["order"]["id"])))
+        if order is None:
+            logger.debug(f"Trade update for unknown order: {update['order']['id']}")
+            continue
+        values = parse_order(update["order"])
+        if (
+            order.updated_at is not None
+            and values["updated_at"] is not None
+            and values["updated_at"] < order.updated_at
+        ):
+            continue
+
+        filled = values["filled_qty"] - order.filled_qty
+        if filled > 0:
+            if values["filled_avg_price"] is None:
+                price = Decimal(update["price"])
+            else:
+                price = fill_price(order, values)
+            fills.append((order, filled, price))
+        for key, value in values.items():
+            if key == "qty" and value is None:
+                continue
+            setattr(order, key, value)
+        changed[order.pk] = order
+        events.append((order, update["event"]))
+
+    with transaction.atomic():
+        Order.objects.bulk_update(changed.values(), UPDATE_FIELDS)
+        for order, qty, price in fills:
+            apply_fill(order.user, order.asset_id, order.side, qty, price)
+
+    for order, event in events:
+        trade_update.send(sender=Order, order=order, event=event)
+
+    return len(changed)
+
+
+class LocalTradeStream:
+    """
+    Stand-in for Alpaca's stream, which sends a list of trade updates to the
+    subscribed handler and then stops.
+    """
+
+    def __init__(self, updates=None):
+        self.updates = list(updates or [])
+        self._handler = None
+
+    def subscribe_trade_updates(self, handler):
+        self._handler = handler
+
+    def push(self, event, order, **kwargs):
+        """Queue a trade update for an order (dict)."""
+        self.updates.append({"event": event, "order": order, **kwargs})
+
+    def run(self):
+        asyncio.run(self._run())
+
+    async def _run(self):
+        for update in self.updates:
+            await self._handler(update)
+
+    def stop(self):
+        pass
+
+
+class TradeUpdateConsumer:
+    """
+    Consume Alpaca's trade_updates stream, applying updates to orders in
+    micro-batches.
+
+    The stream runs in a thread, queuing updates. Each batch is applied once
+    `batch_size` updates have queued, or `interval` seconds after the first.
+    """
+
+    def __init__(self, batch_size=None, interval=None):
+        self.batch_size = batch_size or settings.TRADE_UPDATE_BATCH_SIZE
+        self.interval = (
+            interval
+            if interval is not None
+            else settings.TRADE_UPDATE_INTERVAL_MS / 1000
+        )
+        self.queue = queue.Queue()
+        self.applied = 0
+
+    async def handle(self, update):
+        """Queue a trade update received from the stream."""
+        self.queue.put(update)
+
+    def next_batch(self):
+        """Return the next batch of updates, or an empty list if none queued."""
+        try:
+            batch = [self.queue.get(timeout=self.interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self, *streams):
+        """
+        Apply trade updates from streams until every stream stops.
+
+        Each stream runs in its own thread, and their updates are applied
+        together.
+
+        :param streams(Stream): Alpaca streams or `LocalTradeStream`s
+        """
+        threads = []
+        for stream in streams:
+            stream.subscribe_trade_updates(self.handle)
+            thread = threading.Thread(target=stream.run, daemon=True)
+            thread.start()
+            threads.append(thread)
+        try:
+            while (
+                any(thread.is_alive() for thread in threads) or not self.queue.empty()
+            ):
+                batch = self.next_batch()
+                if batch:
+                    self.applied += apply_trade_updates(batch)
+        finally:
+            for stream in streams:
+                stream.stop()
+        return self.applied
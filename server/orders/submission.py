@@ -0,0 +1,150 @@
+import logging
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from alpaca_trade_api.rest import APIError
+from core.ratelimit import alpaca_bucket
+from django.conf import settings
+from requests.exceptions import RequestException
+
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+# Namespace of the client order ids derived from order intents
+CLIENT_ORDER_ID_NAMESPACE = uuid.UUID("6f1f4d5e-3a0b-4f3c-9a57-2d8d1b0c7e21")
+
+# Seconds before the first retry of a failed submission, doubled each retry
+RETRY_BACKOFF_SECONDS = 0.5
+
+OrderIntent = namedtuple(
+    "OrderIntent",
+    ["strategy", "t", "symbol", "side", "notional", "client_order_id", "qty"],
+    defaults=[None],
+)
+
+
+def order_intent(strategy, t, side, notional=None, qty=None, attempt=0):
+    """
+    Return an intent to place a market order for a strategy signal.
+
+    The client order id is derived from the strategy, the timestamp of the bar
+    which signalled, and the side, so the same signal is only ever filled once,
+    however many times it is submitted.
+
+    :param strategy(Strategy): strategy which signalled
+    :param t(int): Unix epoch of the bar which signalled
+    :param side(str): buy or sell
+    :param notional(float): dollar amount to trade
+    :param qty(float): number of shares to trade, instead of a dollar amount
+    :param attempt(int): number of earlier orders for the signal which closed
+    unfilled, so the signal can be placed again
+    """
+    key = f"{strategy.pk}:{int(t)}:{side}"
+    if qty is not None:
+        key = f"{key}:{qty}"
+    if attempt:
+        key = f"{key}:{attempt}"
+    client_order_id = uuid.uuid5(CLIENT_ORDER_ID_NAMESPACE, key)
+    return OrderIntent(
+        strategy,
+        int(t),
+        strategy.asset.symbol,
+        side,
+        notional,
+        str(client_order_id),
+        qty,
+    )
+
+
+def is_retryable(error):
+    """Return true if a failed request may succeed if retried."""
+    if isinstance(error, APIError):
+        status_code = error.status_code
+        return status_code is None or status_code == 429 or status_code >= 500
+    return isinstance(error, RequestException)
+
+
+def is_duplicate(error):
+    """Return true if an order with the same client order id was placed."""
+    return (
+        isinstance(error, APIError)
+        and error.status_code == 422
+        and "client_order_id" in str(error)
+    )
+
+
+class OrderSubmitter:
+    """
+    Submit order intents to Alpaca concurrently, under the shared rate limit.
+
+    Submissions failing with server or network errors are retried. The order
+    may have been placed before the error, so Alpaca is asked for the client
+    order id first, and resubmitting the same client order id is rejected, so
+    an intent is never filled twice.
+    """
+
+    def __init__(self, api, workers=None, retries=None, bucket=None):
+        self.api = api
+        self.workers = workers or settings.ORDER_SUBMISSION_WORKERS
+        self.retries = settings.ORDER_SUBMISSION_RETRIES if retries is None else retries
+        self.bucket = bucket or alpaca_bucket()
+
+    def submit(self, intents):
+        """
+        Submit intents concurrently.
+
+        :param intents(list): order intents
+        :return(list): (intent, order dict or None if it failed) tuples, in the
+        order of the intents
+        """
+        if not intents:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(intents))) as pool:
+            return list(zip(intents, pool.map(self.submit_intent, intents)))
+
+    def submit_intent(self, intent):
+        """Submit an intent, returning the placed order, or None."""
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+                order = self.placed_order(intent)
+                if order is not None:
+                    return order
+
+            if intent.qty is not None:
+                size = {"qty": intent.qty}
+            else:
+                size = {"notional": intent.notional}
+            self.bucket.acquire()
+            try:
+                order = self.api.submit_order(
+                    symbol=intent.symbol,
+                    **size,
+                    side=intent.side,
+                    type=Order.MARKET,
+                    time_in_force=Order.DAY,
+                    client_order_id=intent.client_order_id,
+                )
+            except Exception as e:
+                if is_duplicate(e):
+                    return self.placed_order(intent)
+                if not is_retryable(e) or attempt == self.retries:
+                    logger.warning(
+                        f"Order submission failed: {intent.client_order_id}: {e}"
+                    )
+                    return None
+                logger.info(f"Retrying order submission: {intent.client_order_id}")
+            else:
+                return order.__dict__["_raw"]
+
+    def placed_order(self, intent):
+        """Return the order placed for an intent, or None if none was placed."""
+        self.bucket.acquire()
+        try:
+            order = self.api.get_order_by_client_order_id(intent.client_order_id)
+        except Exception:
+            return None
+        return order.__dict__["_raw"]
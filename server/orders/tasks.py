@@ -1,31 +1,129 @@
 import logging
+from datetime import timedelta
 
+from accounts.clients import client_manager
+from accounts.models import Account, Credentials
 from config import celery_app
 from core.alpaca import TradeApiRest
+from django.db.models import Max, Min
 
 from .models import Order
-from .serializers import OrderCreateSerializer
+from .writer import write_orders
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of orders Alpaca returns in one request
+MAX_ORDERS_PER_REQUEST = 500
 
-def update_orders(orders=None):
-    """Update db with historical orders placed from Alpaca account."""
+
+@celery_app.task(ignore_result=True)
+def sync_orders():
+    """
+    Sync orders placed from the Alpaca account, and from every account with
+    credentials.
+    """
+    update_orders()
+
+    # Accounts with their own credentials are synced with their own client
+    manager = client_manager()
+    credentials_list = Credentials.objects.select_related("account__user").defer(
+        "secret_key"
+    )
+    for credentials in credentials_list:
+        try:
+            client = manager.get(credentials)
+            update_orders(
+                user=credentials.account.user, api=client.api, bucket=client.bucket
+            )
+        except Exception as e:
+            logger.warning(f"Unable to sync orders of {credentials.account_id}: {e}")
+
+
+def update_orders(orders=None, user=None, api=None, bucket=None):
+    """
+    Update db with historical orders placed from Alpaca account.
+
+    Orders are fetched a page at a time, oldest first, resuming from the
+    earliest order which may still change.
+
+    :param orders(list): orders to update, fetched from Alpaca if not given
+    :param user(User): user who placed the orders, defaults to the user
+    holding the Alpaca account
+    :param api(TradeApiRest): Alpaca api of the user's account, defaults to
+    the Alpaca account
+    :param bucket(TokenBucket): rate limit of the api, if it has its own
+    """
     logger.info("Updating historical orders...")
 
-    if orders is None:
-        api = TradeApiRest()
-        all_orders = api.get_orders(status="all", limit=500)
+    if orders is not None:
+        created, updated = write_orders(orders, user)
+        logger.info(f"Updates to orders: {created + updated}")
+        return
 
-    existing_orders = [
-        str(order_id) for order_id in Order.objects.all().values_list("pk", flat=True)
-    ]
-    new_orders = [
-        order for order in all_orders if str(order["id"]) not in existing_orders
-    ]
-    bulk_add_orders(new_orders)
+    api = api or TradeApiRest()
+    if user is None:
+        raw_account = api.account_info().__dict__["_raw"]
+        account = Account.objects.filter(pk=raw_account["id"]).first()
+        if account is None:
+            logger.info(f"No account to sync orders for: {raw_account['id']}")
+            return
+        user = account.user
 
-    logger.info(f"Updates to orders: {len(new_orders)}")
+    created = updated = 0
+    for page in order_pages(api, after=sync_cursor(user), bucket=bucket):
+        page_created, page_updated = write_orders(page, user)
+        created += page_created
+        updated += page_updated
+
+    logger.info(f"Orders created: {created}, updated: {updated}")
+
+
+def sync_cursor(user):
+    """
+    Return the submission time orders are synced after, or None to sync the
+    full history.
+
+    Orders which are still open may change, so syncing resumes from the
+    earliest open order, otherwise from the latest order. A second is
+    subtracted, as Alpaca's `after` is exclusive.
+    """
+    orders = Order.objects.filter(user=user, submitted_at__isnull=False)
+    cursor = (
+        orders.exclude(status__in=Order.CLOSED_STATUSES).aggregate(
+            submitted_at=Min("submitted_at")
+        )["submitted_at"]
+        or orders.aggregate(submitted_at=Max("submitted_at"))["submitted_at"]
+    )
+    if cursor is None:
+        return None
+    return (cursor - timedelta(seconds=1)).isoformat()
+
+
+def order_pages(api, after=None, until=None, bucket=None):
+    """
+    Yield pages of orders submitted in a period, oldest first.
+
+    :param api(TradeApiRest): Alpaca api
+    :param after(str): only orders submitted after this time, ISO format
+    :param until(str): only orders submitted until this time, ISO format
+    :param bucket(TokenBucket): rate limit acquired before each request
+    """
+    while True:
+        if bucket is not None:
+            bucket.acquire()
+        page = api.get_orders(
+            status="all",
+            limit=MAX_ORDERS_PER_REQUEST,
+            after=after,
+            until=until,
+            direction="asc",
+        )
+        page = [order.__dict__["_raw"] for order in page]
+        if page:
+            yield page
+        if len(page) < MAX_ORDERS_PER_REQUEST or page[-1]["submitted_at"] == after:
+            return
+        after = page[-1]["submitted_at"]
 
 
 @celery_app.task(ignore_result=True)
@@ -35,8 +133,5 @@ def bulk_add_orders(orders):
 
     :param orders(list): list of orders to be created
     """
-    for order in orders:
-        serializer = OrderCreateSerializer(data=order)
-        # Fail silently for bulk add
-        if serializer.is_valid():
-            serializer.save()
+    # Invalid orders are skipped
+    write_orders(orders)
@@ -0,0 +1,104 @@
+from unittest.mock import MagicMock
+
+from accounts.ledger import Ledger
+from accounts.models import Position
+from accounts.tests.factories import AccountFactory
+from assets.tests.factories import AssetFactory
+from core.tests.factories import StrategyFactory
+from django.test import TestCase
+from django.utils import timezone
+from orders.models import Order
+from orders.risk import RiskCheck
+from orders.submission import order_intent
+from users.tests.factories import UserFactory
+
+from .factories import OrderFactory
+
+
+class RiskCheckTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.account = AccountFactory(
+            user=self.user,
+            buying_power=1000,
+            equity=50000,
+            shorting_enabled=False,
+        )
+        self.tsla = AssetFactory(symbol="TSLA")
+        self.aapl = AssetFactory(symbol="AAPL")
+        self.tsla_strategy = StrategyFactory(user=self.user, asset=self.tsla)
+        self.aapl_strategy = StrategyFactory(user=self.user, asset=self.aapl)
+
+    def check(self, intents, **kwargs):
+        ledger = Ledger(self.user, MagicMock())
+        prices = {self.tsla.pk: 100, self.aapl.pk: 50}
+        return RiskCheck(ledger, prices, **kwargs).check(intents)
+
+    def test_buying_power(self):
+        """Buys are checked together against the buying power."""
+        first = order_intent(self.tsla_strategy, 900, Order.BUY, 600)
+        second = order_intent(self.aapl_strategy, 900, Order.BUY, 600)
+        third = order_intent(self.aapl_strategy, 1800, Order.BUY, 100)
+
+        accepted, rejected = self.check([first, second, third])
+
+        self.assertEqual([intent.notional for intent in accepted], [600, 400])
+        self.assertEqual(rejected, {third.client_order_id: "buying power"})
+
+    def test_exposure_limits(self):
+        """Buys are trimmed to the symbol and user exposure limits."""
+        Position.objects.create(user=self.user, asset=self.tsla, qty=3)
+        tsla = order_intent(self.tsla_strategy, 900, Order.BUY, 500)
+        aapl = order_intent(self.aapl_strategy, 900, Order.BUY, 500)
+
+        accepted, rejected = self.check(
+            [tsla, aapl], max_symbol_exposure=400, max_user_exposure=600
+        )
+
+        self.assertEqual([intent.notional for intent in accepted], [100, 200])
+        self.assertEqual(rejected, {})
+
+    def test_assets(self):
+        """Sells are trimmed to the long position, unless shortable."""
+        self.aapl.tradable = False
+        self.aapl.save()
+        Position.objects.create(user=self.user, asset=self.tsla, qty=2)
+        sell = order_intent(self.tsla_strategy, 900, Order.SELL, 500)
+        untradable = order_intent(self.aapl_strategy, 900, Order.BUY, 100)
+
+        accepted, rejected = self.check([sell, untradable])
+
+        self.assertEqual([intent.notional for intent in accepted], [200])
+        self.assertEqual(rejected, {untradable.client_order_id: "not tradable"})
+
+    def test_pattern_day_trader(self):
+        """Day trades are rejected once another would flag the account."""
+        self.account.equity = 10000
+        self.account.daytrade_count = 3
+        self.account.shorting_enabled = True
+        self.account.save()
+        OrderFactory(
+            user=self.user,
+            asset_id=self.tsla,
+            side=Order.BUY,
+            status=Order.FILLED,
+            submitted_at=timezone.now(),
+        )
+        sell = order_intent(self.tsla_strategy, 900, Order.SELL, 100)
+        buy = order_intent(self.tsla_strategy, 900, Order.BUY, 100)
+
+        accepted, rejected = self.check([sell, buy])
+
+        self.assertEqual(accepted, [buy])
+        self.assertEqual(rejected, {sell.client_order_id: "pattern day trader"})
+
+    def test_trading_blocked(self):
+        """Every intent is rejected while trading is blocked."""
+        self.account.trading_blocked = True
+        self.account.save()
+        buy = order_intent(self.tsla_strategy, 900, Order.BUY, 100)
+
+        accepted, rejected = self.check([buy])
+
+        self.assertEqual(accepted, [])
+        self.assertEqual(rejected, {buy.client_order_id: "trading_blocked"})
@@ -0,0 +1,157 @@
+from unittest.mock import MagicMock
+
+from accounts.models import Position
+from accounts.tests.factories import AccountFactory
+from assets.tests.factories import AssetFactory
+from django.test import TestCase
+from orders.models import Order
+from orders.signals import trade_update
+from orders.stream import LocalTradeStream, TradeUpdateConsumer, apply_trade_updates
+from users.tests.factories import UserFactory
+
+from .factories import OrderFactory
+
+
+def alpaca_order(order, status, filled_qty, filled_avg_price, updated_at, **kwargs):
+    return {
+        "id": str(order.id),
+        "status": status,
+        "qty": "10",
+        "filled_qty": str(filled_qty),
+        "filled_avg_price": None if filled_avg_price is None else str(filled_avg_price),
+        "updated_at": updated_at,
+        **kwargs,
+    }
+
+
+class TradeStreamTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.account = AccountFactory(user=self.user, cash=10000)
+        self.tsla = AssetFactory(symbol="TSLA")
+        self.order = OrderFactory(
+            user=self.user,
+            asset_id=self.tsla,
+            qty=10,
+            filled_qty=0,
+            side=Order.BUY,
+            status=Order.ACCEPTED,
+        )
+
+    def test_apply_trade_updates(self):
+        """Order state and fills are applied, and replayed updates ignored."""
+        partial_fill = {
+            "event": "partial_fill",
+            "price": "100",
+            "order": alpaca_order(
+                self.order,
+                Order.PARTIALLY_FILLED,
+                4,
+                100,
+                "2021-03-16T18:38:01Z",
+            ),
+        }
+        fill = {
+            "event": "fill",
+            "price": "110",
+            "order": alpaca_order(
+                self.order,
+                Order.FILLED,
+                10,
+                106,
+                "2021-03-16T18:38:02Z",
+                filled_at="2021-03-16T18:38:02Z",
+            ),
+        }
+
+        updated = apply_trade_updates([partial_fill, fill])
+        apply_trade_updates([partial_fill, fill])
+        order = Order.objects.get(pk=self.order.pk)
+        position = Position.objects.get(user=self.user, asset=self.tsla)
+        self.account.refresh_from_db()
+
+        self.assertEqual(updated, 1)
+        self.assertEqual(order.status, Order.FILLED)
+        self.assertEqual(order.filled_qty, 10)
+        self.assertEqual(order.filled_avg_price, 106)
+        self.assertIsNotNone(order.filled_at)
+        self.assertEqual(position.qty, 10)
+        self.assertEqual(position.cost_basis, 1060)
+        self.assertEqual(self.account.cash, 10000 - 1060)
+
+    def test_unknown_orders(self):
+        """Updates to orders which haven't been stored are skipped."""
+        other = OrderFactory.build(asset_id=self.tsla)
+
+        updated = apply_trade_updates(
+            [
+                {
+                    "event": "canceled",
+                    "order": alpaca_order(
+                        other, Order.CANCELED, 0, None, "2021-03-16T18:38:01Z"
+                    ),
+                }
+            ]
+        )
+
+        self.assertEqual(updated, 0)
+
+    def test_consumer(self):
+        """Updates from the stream are applied in batches, and published."""
+        receiver = MagicMock()
+        trade_update.connect(receiver)
+        self.addCleanup(trade_update.disconnect, receiver)
+        stream = LocalTradeStream()
+        stream.push(
+            "new",
+            alpaca_order(self.order, Order.NEW, 0, None, "2021-03-16T18:38:00Z"),
+        )
+        stream.push(
+            "canceled",
+            alpaca_order(
+                self.order,
+                Order.CANCELED,
+                0,
+                None,
+                "2021-03-16T18:38:03Z",
+                canceled_at="2021-03-16T18:38:03Z",
+            ),
+        )
+
+        applied = TradeUpdateConsumer(batch_size=10, interval=0.5).run(stream)
+
+        self.assertEqual(applied, 1)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, Order.CANCELED)
+        self.assertEqual(
+            [call.kwargs["event"] for call in receiver.call_args_list],
+            ["new", "canceled"],
+        )
+
+    def test_consumer_streams(self):
+        """Updates from the streams of several accounts are applied together."""
+        other = OrderFactory(
+            user=UserFactory(),
+            asset_id=self.tsla,
+            qty=10,
+            filled_qty=0,
+            side=Order.BUY,
+            status=Order.ACCEPTED,
+        )
+        streams = [LocalTradeStream(), LocalTradeStream()]
+        for stream, order in zip(streams, [self.order, other]):
+            stream.push(
+                "canceled",
+                alpaca_order(
+                    order,
+                    Order.CANCELED,
+                    0,
+                    None,
+                    "2021-03-16T18:38:03Z",
+                    canceled_at="2021-03-16T18:38:03Z",
+                ),
+            )
+
+        applied = TradeUpdateConsumer(batch_size=10, interval=0.5).run(*streams)
+
+        self.assertEqual(applied, 2)
+        self.assertEqual(Order.objects.filter(status=Order.CANCELED).count(), 2)
@@ -0,0 +1,116 @@
+import uuid
+from unittest.mock import MagicMock, patch
+
+from alpaca_trade_api.entity import Order as AlpacaOrder
+from alpaca_trade_api.rest import APIError
+from assets.tests.factories import AssetFactory
+from core.ratelimit import TokenBucket
+from core.tests.factories import StrategyFactory
+from django.test import TestCase
+from orders.models import Order
+from orders.submission import OrderSubmitter, order_intent
+from requests import HTTPError
+
+
+def api_error(status_code, message="error"):
+    response = MagicMock(status_code=status_code)
+    return APIError({"message": message}, HTTPError(response=response))
+
+
+@patch("orders.submission.RETRY_BACKOFF_SECONDS", 0)
+class OrderSubmitterTests(TestCase):
+    def setUp(self):
+        self.tsla = AssetFactory(symbol="TSLA")
+        self.strategy = StrategyFactory(asset=self.tsla)
+        self.api = MagicMock()
+        self.api.submit_order.side_effect = lambda **kwargs: AlpacaOrder(
+            {"id": str(uuid.uuid4()), **kwargs}
+        )
+        self.submitter = OrderSubmitter(
+            self.api, workers=4, retries=2, bucket=TokenBucket(1000, 1000)
+        )
+
+    def test_order_intent(self):
+        """Client order ids are derived from the strategy, bar and side."""
+        intent = order_intent(self.strategy, 1615910400, Order.BUY, 100)
+
+        self.assertEqual(
+            intent.client_order_id,
+            order_intent(self.strategy, 1615910400, Order.BUY, 200).client_order_id,
+        )
+        self.assertNotEqual(
+            intent.client_order_id,
+            order_intent(self.strategy, 1615911300, Order.BUY, 100).client_order_id,
+        )
+        self.assertNotEqual(
+            intent.client_order_id,
+            order_intent(self.strategy, 1615910400, Order.SELL, 100).client_order_id,
+        )
+
+    def test_submit_qty(self):
+        """Intents with a quantity are submitted by quantity."""
+        intent = order_intent(self.strategy, 1615910400, Order.SELL, qty=2.5)
+
+        self.submitter.submit([intent])
+
+        kwargs = self.api.submit_order.call_args.kwargs
+        self.assertEqual(kwargs["qty"], 2.5)
+        self.assertNotIn("notional", kwargs)
+
+    def test_submit(self):
+        """Intents are submitted concurrently, and failures don't stop others."""
+        intents = [
+            order_intent(self.strategy, t, Order.BUY, 100) for t in range(0, 9000, 900)
+        ]
+        failing = intents[3].client_order_id
+        submit_order = self.api.submit_order.side_effect
+
+        def side_effect(**kwargs):
+            if kwargs["client_order_id"] == failing:
+                raise api_error(403, "insufficient buying power")
+            return submit_order(**kwargs)
+
+        self.api.submit_order.side_effect = side_effect
+
+        results = self.submitter.submit(intents)
+
+        self.assertEqual([intent for intent, _ in results], intents)
+        self.assertIsNone(results[3][1])
+        self.assertEqual(
+            [order["client_order_id"] for _, order in results if order],
+            [
+                intent.client_order_id
+                for intent in intents
+                if intent.client_order_id != failing
+            ],
+        )
+        self.assertEqual(self.api.submit_order.call_count, 10)
+
+    def test_submit_retries(self):
+        """Orders placed before a failure are found rather than resubmitted."""
+        intent = order_intent(self.strategy, 0, Order.BUY, 100)
+        placed = AlpacaOrder({"id": str(uuid.uuid4()), "status": "accepted"})
+        self.api.submit_order.side_effect = api_error(504)
+        self.api.get_order_by_client_order_id.side_effect = [
+            api_error(404),
+            placed,
+        ]
+
+        order = self.submitter.submit_intent(intent)
+
+        self.assertEqual(order["id"], placed.id)
+        self.assertEqual(self.api.submit_order.call_count, 2)
+
+    def test_submit_duplicate(self):
+        """A client order id which has already been used returns its order."""
+        intent = order_intent(self.strategy, 0, Order.BUY, 100)
+        placed = AlpacaOrder({"id": str(uuid.uuid4()), "status": "filled"})
+        self.api.submit_order.side_effect = api_error(
+            422, "client_order_id must be unique"
+        )
+        self.api.get_order_by_client_order_id.return_value = placed
+
+        order = self.submitter.submit_intent(intent)
+
+        self.assertEqual(order["status"], "filled")
+        self.api.submit_order.assert_called_once()
@@ -1,11 +1,18 @@
 import uuid
+from unittest.mock import patch
 
+from accounts.clients import client_manager
+from accounts.models import Credentials
+from accounts.tests.factories import AccountFactory
+from alpaca_trade_api.entity import Account as AlpacaAccount
+from alpaca_trade_api.entity import Order as AlpacaOrder
 from assets.tests.factories import AssetFactory
 from core.tests.factories import StrategyFactory
-from django.test import TestCase
+from cryptography.fernet import Fernet
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from orders.models import Order
-from orders.tasks import update_orders
+from orders.tasks import sync_orders, update_orders
 from users.tests.factories import UserFactory
 
 
@@ -87,3 +94,78 @@ class OrderTaskTests(TestCase):
         update_orders(self.order_data)
 
         self.assertEqual(Order.objects.all().count(), 3)
+
+    def test_update_orders_changes(self):
+        """Status and fill changes to existing orders are applied."""
+        update_orders(self.order_data)
+        self.order_data[1]["status"] = "canceled"
+        self.order_data[1]["filled_qty"] = 20
+
+        update_orders(self.order_data)
+        order = Order.objects.get(pk=self.uuid_4)
+
+        self.assertEqual(order.status, Order.CANCELED)
+        self.assertEqual(order.filled_qty, 20)
+        self.assertEqual(Order.objects.filter(status=Order.FILLED).count(), 2)
+
+    @patch("orders.tasks.MAX_ORDERS_PER_REQUEST", 2)
+    @patch("orders.tasks.TradeApiRest")
+    def test_update_orders_pages(self, mock_trade_api):
+        """Orders are synced a page at a time, resuming from open orders."""
+        account = AccountFactory(user=self.user)
+        submitted = ["2021-03-01T15:00:00Z", "2021-03-01T16:00:00Z"]
+        for data, submitted_at in zip(self.order_data, submitted + submitted[1:]):
+            data.pop("user")
+            data["submitted_at"] = submitted_at
+            data["id"] = str(data["id"])
+            data["asset_id"] = str(data["asset_id"])
+        self.order_data[0]["status"] = "new"
+        mock_trade_api.return_value.account_info.return_value = AlpacaAccount(
+            {"id": str(account.id)}
+        )
+        mock_trade_api.return_value.get_orders.side_effect = [
+            [AlpacaOrder(data) for data in self.order_data[:2]],
+            [AlpacaOrder(self.order_data[2])],
+        ]
+
+        update_orders()
+
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(
+            mock_trade_api.return_value.get_orders.call_args_list[1].kwargs["after"],
+            "2021-03-01T16:00:00Z",
+        )
+
+        mock_trade_api.return_value.get_orders.side_effect = [[]]
+        update_orders()
+
+        self.assertEqual(
+            mock_trade_api.return_value.get_orders.call_args.kwargs["after"],
+            "2021-03-01T14:59:59+00:00",
+        )
+
+    @override_settings(CREDENTIALS_ENCRYPTION_KEYS=[Fernet.generate_key().decode()])
+    @patch("accounts.clients.TradeApiRest")
+    @patch("orders.tasks.TradeApiRest")
+    def test_sync_orders_credentials(self, mock_trade_api, mock_client_api):
+        """Orders of accounts with credentials are synced with their own client."""
+        self.addCleanup(client_manager().clear)
+        account = AccountFactory(user=self.user)
+        Credentials.objects.create(account=account, key_id="KEY", secret_key="secret")
+        data = self.order_data[0]
+        data.pop("user")
+        data.update(
+            id=str(data["id"]),
+            asset_id=str(data["asset_id"]),
+            submitted_at="2021-03-01T15:00:00Z",
+        )
+        mock_trade_api.return_value.account_info.return_value = AlpacaAccount(
+            {"id": str(uuid.uuid4())}
+        )
+        mock_client_api.return_value.get_orders.return_value = [AlpacaOrder(data)]
+
+        sync_orders()
+
+        self.assertEqual(Order.objects.get(user=self.user).id, self.uuid_2)
+        mock_trade_api.return_value.get_orders.assert_not_called()
+        mock_client_api.assert_called_once_with("KEY", "secret", Credentials.PAPER_URL)
@@ -0,0 +1,93 @@
+import uuid
+
+from assets.tests.factories import AssetFactory
+from core.tests.factories import StrategyFactory
+from django.test import TestCase
+from orders.models import Order
+from orders.writer import write_orders
+from users.tests.factories import UserFactory
+
+
+def alpaca_order(asset, **kwargs):
+    return {
+        "id": str(uuid.uuid4()),
+        "client_order_id": str(uuid.uuid4()),
+        "created_at": "2021-03-16T18:38:01.942282Z",
+        "submitted_at": "2021-03-16T18:38:01.937734Z",
+        "asset_id": str(asset.pk),
+        "symbol": asset.symbol,
+        "qty": "10",
+        "filled_qty": "0",
+        "order_class": "",
+        "type": "market",
+        "side": "buy",
+        "time_in_force": "day",
+        "status": "accepted",
+        "extended_hours": False,
+        "legs": None,
+        **kwargs,
+    }
+
+
+class OrderWriterTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.tsla = AssetFactory(symbol="TSLA")
+
+    def test_write_orders(self):
+        """Orders are created with their strategy, and changes updated."""
+        strategy = StrategyFactory(user=self.user, asset=self.tsla)
+        order = alpaca_order(self.tsla, strategy=strategy.pk)
+
+        self.assertEqual(write_orders([order], self.user), (1, 0))
+        self.assertEqual(write_orders([order], self.user), (0, 0))
+
+        order["status"] = "filled"
+        order["filled_qty"] = "10"
+
+        self.assertEqual(write_orders([order], self.user), (0, 1))
+        saved = Order.objects.get(pk=order["id"])
+        self.assertEqual(saved.strategy, strategy)
+        self.assertEqual(saved.order_class, Order.SIMPLE)
+        self.assertEqual(saved.status, Order.FILLED)
+        self.assertEqual(saved.filled_qty, 10)
+
+    def test_write_invalid_orders(self):
+        """Invalid orders, and orders of unknown assets, are skipped."""
+        orders = [
+            alpaca_order(self.tsla, notional="100"),
+            alpaca_order(self.tsla, side="hold"),
+            alpaca_order(AssetFactory.build()),
+            alpaca_order(self.tsla),
+        ]
+
+        self.assertEqual(write_orders(orders, self.user), (1, 0))
+        self.assertTrue(Order.objects.filter(pk=orders[3]["id"]).exists())
+
+    def test_write_references(self):
+        """Legs and replaced orders may refer to orders later in the batch."""
+        take_profit = alpaca_order(self.tsla, side="sell", type="limit")
+        stop_loss = alpaca_order(self.tsla, side="sell", type="stop")
+        bracket = alpaca_order(
+            self.tsla, order_class="bracket", legs=[take_profit, stop_loss]
+        )
+        replacement = alpaca_order(self.tsla)
+        replaced = alpaca_order(
+            self.tsla, status="replaced", replaced_by=replacement["id"]
+        )
+        replacement["replaces"] = replaced["id"]
+
+        created, _ = write_orders([bracket, replaced, replacement], self.user)
+        legs = Order.objects.get(pk=bracket["id"]).legs.all()
+
+        self.assertEqual(created, 5)
+        self.assertEqual(
+            {str(leg.pk) for leg in legs}, {take_profit["id"], stop_loss["id"]}
+        )
+        self.assertEqual(
+            str(Order.objects.get(pk=replaced["id"]).replaced_by_id),
+            replacement["id"],
+        )
+        self.assertEqual(
+            str(Order.objects.get(pk=replacement["id"]).replaces_id), replaced["id"]
+        )
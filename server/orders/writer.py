@@ -0,0 +1,236 @@
+import logging
+import uuid
+
+from assets.models import Asset
+from core.models import Strategy
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from users.models import User
+
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+# Order fields written from Alpaca orders, other than the primary key and
+# foreign keys
+ORDER_FIELDS = [
+    "client_order_id",
+    "created_at",
+    "updated_at",
+    "submitted_at",
+    "filled_at",
+    "expired_at",
+    "canceled_at",
+    "failed_at",
+    "replaced_at",
+    "notional",
+    "qty",
+    "filled_qty",
+    "type",
+    "side",
+    "order_class",
+    "time_in_force",
+    "limit_price",
+    "stop_price",
+    "filled_avg_price",
+    "status",
+    "extended_hours",
+    "trail_price",
+    "trail_percent",
+    "hwm",
+]
+
+# Self references, set once every order they refer to has been written
+REFERENCE_FIELDS = ["replaces", "replaced_by"]
+
+# Foreign keys which are resolved in batch, rather than validated per order
+RELATED_FIELDS = ["user", "strategy", "asset_id", "legs", *REFERENCE_FIELDS]
+
+
+def to_uuid(value):
+    """Return a UUID from an Alpaca id, or None."""
+    if value is None or value == "":
+        return None
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def to_python(field, value):
+    """Return an Alpaca order value as a model field value."""
+    if value is None:
+        return None
+    # Floats are converted through their shortest representation, rather than
+    # their exact binary value
+    if isinstance(value, float):
+        value = str(value)
+    return field.to_python(value)
+
+
+def flatten_orders(orders):
+    """
+    Return Alpaca orders with nested legs, as a list of orders with leg ids.
+
+    Legs are listed after their parent, and inherit its user and strategy.
+    """
+    flat = []
+    for order in orders:
+        if hasattr(order, "_raw"):
+            order = order.__dict__["_raw"]
+        order = dict(order)
+        legs = order.get("legs") or []
+        order["legs"] = [
+            to_uuid(leg["id"] if isinstance(leg, dict) else leg) for leg in legs
+        ]
+        flat.append(order)
+        flat.extend(
+            flatten_orders(
+                {"user": order.get("user"), "strategy": order.get("strategy"), **leg}
+                for leg in legs
+                if isinstance(leg, dict)
+            )
+        )
+    return flat
+
+
+def order_values(raw_order, fields):
+    """Return the model field values of an Alpaca order."""
+    values = {
+        name: to_python(field, raw_order.get(name)) for name, field in fields.items()
+    }
+    values["order_class"] = values["order_class"] or Order.SIMPLE
+    values["filled_qty"] = values["filled_qty"] or 0
+    values["extended_hours"] = bool(values["extended_hours"])
+    return values
+
+
+def new_order(raw_order, values, assets, strategies, user_ids, user=None):
+    """
+    Return a validated order to create from an Alpaca order, or None.
+
+    :param raw_order(dict): order returned from Alpaca
+    :param values(dict): model field values of the order
+    :param assets(dict): assets keyed by id
+    :param strategies(dict): strategies keyed by id
+    :param user_ids(set): ids of users who exist
+    :param user(User): user who placed the order, unless the order has a user
+    :return(Order): unsaved order, or None if it's invalid
+    """
+    order_id = to_uuid(raw_order["id"])
+    asset = assets.get(to_uuid(raw_order["asset_id"]))
+    user_id = raw_order.get("user") or (user.pk if user else None)
+    if asset is None or user_id not in user_ids:
+        logger.warning(f"Unknown asset or user of order: {order_id}")
+        return None
+    order = Order(id=order_id, user_id=user_id, asset_id=asset, **values)
+    if raw_order.get("strategy"):
+        order.strategy = strategies.get(raw_order["strategy"])
+    try:
+        order.clean_fields(exclude=RELATED_FIELDS)
+        order.clean()
+    except ValidationError as e:
+        logger.warning(f"Invalid order {order_id}: {e}")
+        return None
+    return order
+
+
+def write_references(written, references, legs):
+    """
+    Set the references and legs of written orders, to orders which exist.
+
+    :param written(dict): orders written, keyed by id
+    :param references(dict): `replaces_id`/`replaced_by_id` values keyed by
+    order id
+    :param legs(dict): leg ids keyed by order id
+    """
+    referenced_ids = {
+        pk for values in references.values() for pk in values.values() if pk
+    } | {pk for leg_ids in legs.values() for pk in leg_ids}
+    known = set(written) | set(
+        Order.objects.filter(
+            pk__in=[pk for pk in referenced_ids if pk not in written]
+        ).values_list("pk", flat=True)
+    )
+    referenced = []
+    for order_id, values in references.items():
+        order = written[order_id]
+        values = {name: pk if pk in known else None for name, pk in values.items()}
+        if any(getattr(order, name) != pk for name, pk in values.items()):
+            for name, pk in values.items():
+                setattr(order, name, pk)
+            referenced.append(order)
+    Order.objects.bulk_update(referenced, REFERENCE_FIELDS)
+
+    Order.legs.through.objects.bulk_create(
+        [
+            Order.legs.through(from_order_id=order_id, to_order_id=leg_id)
+            for order_id, leg_ids in legs.items()
+            for leg_id in leg_ids
+            if leg_id in known
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def write_orders(orders, user=None):
+    """
+    Create new orders, and update orders which have changed, in bulk.
+
+    Foreign keys are resolved with one query each, and orders are validated in
+    memory. Invalid orders, and orders of unknown assets or users, are
+    skipped. Orders are inserted before their `legs` and `replaces`/
+    `replaced_by` references are set, so orders may refer to others in the
+    same batch, in any order.
+
+    :param orders(list): orders returned from Alpaca, optionally with `user`
+    and `strategy` primary keys
+    :param user(User): user who placed the orders, unless an order has a user
+    :return(tuple): number of orders created and updated
+    """
+    orders = flatten_orders(orders)
+    if not orders:
+        return 0, 0
+
+    fields = {name: Order._meta.get_field(name) for name in ORDER_FIELDS}
+    assets = Asset.objects.in_bulk({to_uuid(order["asset_id"]) for order in orders})
+    strategies = Strategy.objects.select_related("asset").in_bulk(
+        {order["strategy"] for order in orders if order.get("strategy")}
+    )
+    user_ids = set(
+        User.objects.filter(
+            pk__in={order["user"] for order in orders if order.get("user")}
+        ).values_list("pk", flat=True)
+    )
+    if user is not None:
+        user_ids.add(user.pk)
+    existing = Order.objects.in_bulk([to_uuid(order["id"]) for order in orders])
+
+    created = {}
+    updated = {}
+    references = {}
+    legs = {}
+    for raw_order in orders:
+        order_id = to_uuid(raw_order["id"])
+        values = order_values(raw_order, fields)
+
+        order = existing.get(order_id)
+        if order is None:
+            order = new_order(raw_order, values, assets, strategies, user_ids, user)
+            if order is None:
+                continue
+            created[order_id] = order
+        elif any(getattr(order, name) != value for name, value in values.items()):
+            for name, value in values.items():
+                setattr(order, name, value)
+            updated[order_id] = order
+
+        references[order_id] = {
+            f"{name}_id": to_uuid(raw_order.get(name)) for name in REFERENCE_FIELDS
+        }
+        legs[order_id] = raw_order["legs"]
+
+    with transaction.atomic():
+        Order.objects.bulk_create(created.values(), ignore_conflicts=True)
+        Order.objects.bulk_update(updated.values(), ORDER_FIELDS)
+        # Set references to orders which now exist
+        write_references({**existing, **created}, references, legs)
+
+    return len(created), len(updated)